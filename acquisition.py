@@ -0,0 +1,168 @@
+# acquisition.py
+import logging
+import threading
+import time
+
+try:
+    from config import POLL_INTERVAL, RECONNECT_INITIAL, RECONNECT_MAX, LINK_LOST_AFTER
+except ImportError:
+    from .config import POLL_INTERVAL, RECONNECT_INITIAL, RECONNECT_MAX, LINK_LOST_AFTER
+
+logger = logging.getLogger(__name__)
+
+# Estados da conexão informados aos ouvintes de conexão
+DISCONNECTED = 'disconnected'  # Antes da primeira tentativa
+CONNECTING = 'connecting'      # Abrindo a porta e testando a comunicação
+CONNECTED = 'connected'        # Comunicação confirmada, leituras em andamento
+RECONNECTING = 'reconnecting'  # Conexão falhou ou foi perdida: aguardando nova tentativa
+
+
+class AcquisitionLoop:
+    """Laço de aquisição de taxa fixa, sem dependência de Qt.
+
+    Chama `modbus_client.poll()` a cada `interval` segundos e entrega o
+    resultado aos ouvintes: `callback(leituras)` para leituras não vazias,
+    `callback(mensagem)` para erros e `callback(duração)` ao fim de cada
+    ciclo. É usado pelo ModbusWorker da interface, pelo daemon sem interface
+    (daemon.py) e pelos processos de aquisição do supervisor (supervisor.py).
+
+    Com `connect` (função sem argumentos que abre o transporte e retorna
+    True/False), a conexão também é responsabilidade do laço: abre, testa
+    com `test_connection()`, tenta novamente com espera dobrando de
+    RECONNECT_INITIAL até RECONNECT_MAX e reabre a porta se nenhuma resposta
+    chegar em LINK_LOST_AFTER segundos. Transições são entregues a
+    `callback(estado_anterior, novo_estado)`.
+
+    Com `change_filter` (ex.: DeadbandFilter), os ouvintes de leituras recebem
+    apenas o conjunto de mudanças de cada ciclo, mais o estado completo
+    periódico; ciclos sem mudanças não são entregues. A cada nova conexão o
+    filtro é reiniciado, e o primeiro ciclo chega completo.
+    """
+
+    def __init__(self, modbus_client, interval=POLL_INTERVAL, connect=None, change_filter=None):
+        self.modbus_client = modbus_client
+        self.interval = interval
+        self.connector = connect
+        self.change_filter = change_filter
+        self.state = DISCONNECTED
+        self.retry_delay = RECONNECT_INITIAL
+        self.reconnects = 0
+        self.cycles = 0
+        self.late_cycles = 0
+        self.last_cycle_duration = 0.0
+        self._last_response = None
+        self._listeners = []
+        self._error_listeners = []
+        self._cycle_listeners = []
+        self._connection_listeners = []
+        self._stop_event = threading.Event()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def add_error_listener(self, callback):
+        self._error_listeners.append(callback)
+
+    def add_cycle_listener(self, callback):
+        self._cycle_listeners.append(callback)
+
+    def add_connection_listener(self, callback):
+        self._connection_listeners.append(callback)
+
+    def run(self):
+        """Executa até `stop()`; bloqueia a thread chamadora"""
+        next_cycle = time.monotonic()
+
+        while not self._stop_event.is_set():
+            if self.connector and not self.modbus_client.connected:
+                if not self._connect():
+                    continue
+                next_cycle = time.monotonic()
+
+            try:
+                if self.modbus_client.connected:
+                    started = time.perf_counter()
+                    readings = self.modbus_client.poll()
+                    self.cycles += 1
+                    if readings is None:
+                        self._notify_error("Falha ao obter leituras")
+                    elif readings:
+                        self._notify_readings(readings)
+                    self.last_cycle_duration = time.perf_counter() - started
+                    for callback in self._cycle_listeners:
+                        callback(self.last_cycle_duration)
+                    self._check_link(readings)
+            except Exception as e:
+                self._notify_error(f"Erro na thread: {str(e)}")
+
+            next_cycle += self.interval
+            delay = next_cycle - time.monotonic()
+            if delay < 0:
+                # Ciclo mais longo que o intervalo: realinha sem acumular atraso
+                logger.debug(f"Ciclo de leitura atrasado em {-delay:.3f}s")
+                self.late_cycles += 1
+                next_cycle = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _connect(self):
+        """Uma tentativa de conexão; em caso de falha, espera o backoff (interrompível por stop)"""
+        self._set_state(CONNECTING)
+        try:
+            connected = self.connector() and self.modbus_client.test_connection()
+        except Exception as e:
+            logger.error(f"Erro ao conectar: {e}")
+            connected = False
+
+        if connected:
+            self.retry_delay = RECONNECT_INITIAL
+            if self.change_filter:
+                self.change_filter.reset()
+            self._last_response = time.monotonic()
+            self._set_state(CONNECTED)
+            return True
+
+        if self.modbus_client.connected:
+            self.modbus_client.disconnect()  # Porta abriu, mas o dispositivo não respondeu
+        self._set_state(RECONNECTING)
+        self._notify_error(f"Falha na conexão. Nova tentativa em {self.retry_delay:.0f}s...")
+        self._stop_event.wait(self.retry_delay)
+        self.retry_delay = min(self.retry_delay * 2, RECONNECT_MAX)
+        return False
+
+    def _check_link(self, readings):
+        """Reabre a conexão se nenhum registro respondeu por LINK_LOST_AFTER segundos"""
+        if not self.connector or not readings:
+            return  # Ciclo sem registros vencidos não diz nada sobre o enlace
+        now = time.monotonic()
+        if any(value is not None for value in readings.values()):
+            self._last_response = now
+        elif now - self._last_response >= LINK_LOST_AFTER:
+            self._notify_error(f"Sem resposta há {now - self._last_response:.0f}s. Reabrindo a conexão...")
+            self.modbus_client.disconnect()
+            self.reconnects += 1
+            self._set_state(RECONNECTING)
+
+    def _set_state(self, new_state):
+        old_state = self.state
+        if old_state == new_state:
+            return
+        self.state = new_state
+        logger.info(f"Conexão: {old_state} -> {new_state}")
+        for callback in self._connection_listeners:
+            callback(old_state, new_state)
+
+    def _notify_readings(self, readings):
+        if self.change_filter:
+            readings = self.change_filter.changes(readings)
+            if not readings:
+                return
+        for callback in self._listeners:
+            callback(readings)
+
+    def _notify_error(self, message):
+        for callback in self._error_listeners:
+            callback(message)
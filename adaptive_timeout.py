@@ -0,0 +1,55 @@
+# adaptive_timeout.py
+from collections import deque
+import logging
+
+try:
+    from config import (TIMEOUT, LATENCY_WINDOW, LATENCY_MIN_SAMPLES, TIMEOUT_PERCENTILE, TIMEOUT_MARGIN,
+                        TIMEOUT_FLOOR, TIMEOUT_CEILING)
+except ImportError:
+    from .config import (TIMEOUT, LATENCY_WINDOW, LATENCY_MIN_SAMPLES, TIMEOUT_PERCENTILE, TIMEOUT_MARGIN,
+                         TIMEOUT_FLOOR, TIMEOUT_CEILING)
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveTimeout:
+    """Timeout efetivo derivado da distribuição de latências de um dispositivo.
+
+    O timeout é o percentil `percentile` da janela móvel de latências mais
+    `margin`, limitado entre `floor` e `ceiling`. Enquanto não houver
+    `min_samples` amostras, vale o TIMEOUT configurado.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=LATENCY_MIN_SAMPLES, percentile=TIMEOUT_PERCENTILE,
+                 margin=TIMEOUT_MARGIN, floor=TIMEOUT_FLOOR, ceiling=TIMEOUT_CEILING):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.margin = margin
+        self.floor = floor
+        self.ceiling = ceiling
+        self.timeout = min(max(TIMEOUT, floor), ceiling)
+
+    def record(self, latency):
+        """Registra a latência (segundos) de uma resposta recebida"""
+        self.samples.append(latency)
+        if len(self.samples) >= self.min_samples:
+            self.timeout = self._clamp(self.latency_percentile(self.percentile) + self.margin)
+
+    def record_timeout(self):
+        """Sem resposta: alarga o timeout para não ficar preso abaixo da latência real"""
+        self.timeout = self._clamp(self.timeout * 2)
+
+    def latency_percentile(self, percentile):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def reset(self):
+        self.samples.clear()
+        self.timeout = min(max(TIMEOUT, self.floor), self.ceiling)
+
+    def _clamp(self, value):
+        return min(max(value, self.floor), self.ceiling)
@@ -0,0 +1,293 @@
+# async_client.py
+import asyncio
+import logging
+import time
+
+from pymodbus.client import AsyncModbusSerialClient, AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException, ModbusIOException, ConnectionException
+from pymodbus.pdu import ExceptionResponse
+
+try:
+    from config import (SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES,
+                        ADAPTIVE_TIMEOUT, POLL_INTERVAL)
+    from read_planner import plan_reads, PollScheduler
+    from circuit_breaker import CircuitBreaker
+    from adaptive_timeout import AdaptiveTimeout
+except ImportError:
+    from .config import (SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES,
+                         ADAPTIVE_TIMEOUT, POLL_INTERVAL)
+    from .read_planner import plan_reads, PollScheduler
+    from .circuit_breaker import CircuitBreaker
+    from .adaptive_timeout import AdaptiveTimeout
+
+logger = logging.getLogger(__name__)
+
+
+def create_serial_transport(port, baudrate=BAUDRATE, parity=PARITY):
+    """Cria um cliente pymodbus assíncrono para um barramento RS-485"""
+    return AsyncModbusSerialClient(
+        port=port,
+        baudrate=baudrate,
+        bytesize=BYTESIZE,
+        parity=parity,
+        stopbits=STOPBITS,
+        timeout=TIMEOUT,
+        retries=RETRIES
+    )
+
+
+def create_tcp_transport(host, port=502):
+    """Cria um cliente pymodbus assíncrono para um gateway Modbus TCP"""
+    return AsyncModbusTcpClient(host, port=port, timeout=TIMEOUT, retries=RETRIES)
+
+
+class AsyncModbusClient:
+    """Equivalente assíncrono do ModbusClient para um dispositivo TPS.
+
+    Vários dispositivos podem compartilhar o mesmo transporte (um barramento
+    serial ou um gateway TCP) e o mesmo `bus_lock`, que garante uma transação
+    por vez com o timeout do dispositivo que a iniciou. O transporte pode ser
+    atribuído depois (`client`), já dentro do event loop.
+    """
+
+    def __init__(self, transport, slave=SLAVE_ADDRESS, name=None, bus_lock=None):
+        self.client = transport
+        self.bus_lock = bus_lock or asyncio.Lock()
+        self.slave = slave
+        self.name = name or f"tps{slave}"
+        self.last_readings = {}
+        self.read_plan = plan_reads()
+        self.scheduler = PollScheduler()
+        self.breaker = CircuitBreaker()
+        self.latency = AdaptiveTimeout() if ADAPTIVE_TIMEOUT else None
+        self.probe_block = plan_reads(['temperatura_bateria'])[0]
+
+    @property
+    def connected(self):
+        return self.client is not None and self.client.connected
+
+    async def connect(self):
+        if self.client.connected:
+            return True
+        logger.info(f"[{self.name}] Conectando a {self.client.comm_params.host}...")
+        connected = await self.client.connect()
+        if connected:
+            logger.info(f"[{self.name}] Conexão estabelecida com sucesso.")
+        else:
+            logger.error(f"[{self.name}] Falha ao conectar.")
+        return connected
+
+    def disconnect(self):
+        self.client.close()
+        self.last_readings.clear()
+        self.scheduler.reset()
+        self.breaker.reset()
+        if self.latency:
+            self.latency.reset()
+        logger.info(f"[{self.name}] Desconectado.")
+
+    def add_state_listener(self, callback):
+        self.breaker.add_listener(callback)
+
+    async def read_all(self):
+        """Lê todos os registros, independentemente do período de cada um"""
+        if not self.client.connected:
+            logger.warning(f"[{self.name}] Tentativa de leitura sem conexão.")
+            return None
+
+        now = time.monotonic()
+        results = await self._read_blocks(self.read_plan)
+        self.scheduler.mark_read(results, now)
+        return results
+
+    async def poll(self):
+        """Lê apenas os registros vencidos segundo o período de cada um"""
+        if not self.client.connected:
+            logger.warning(f"[{self.name}] Tentativa de leitura sem conexão.")
+            return None
+
+        now = time.monotonic()
+        results = await self._read_blocks(self.scheduler.due_blocks(now))
+        self.scheduler.mark_read(results, now)
+        return results
+
+    async def _read_blocks(self, blocks):
+        results = {}
+        error_count = 0
+
+        if not self.breaker.allows_requests() and blocks:
+            # Dispositivo sem resposta: apenas uma sondagem barata, com backoff
+            if not self.breaker.probe_due():
+                return dict.fromkeys(name for block in blocks for name in block.register_names())
+            self.breaker.begin_probe()
+            probe_results = await self._read_block(self.probe_block)
+            if not self.breaker.allows_requests():
+                results.update(dict.fromkeys(name for block in blocks for name in block.register_names()))
+                results.update(probe_results)
+                return results
+            logger.info(f"[{self.name}] Dispositivo voltou a responder, retomando leitura completa")
+
+        for block in blocks:
+            if not self.breaker.allows_requests():
+                block_results = dict.fromkeys(block.register_names())
+            else:
+                block_results = await self._read_block(block)
+            for name, value in block_results.items():
+                results[name] = value
+                if value is None:
+                    error_count += 1
+                else:
+                    self.last_readings[name] = value
+
+        if results and error_count == len(results):
+            logger.warning(f"[{self.name}] Todos os registros falharam - dispositivo pode estar desligado")
+            self.last_readings.clear()
+
+        return results
+
+    async def _read_block(self, block):
+        names = block.register_names()
+        try:
+            async with self.bus_lock:
+                if self.latency:
+                    self.client.comm_params.timeout_connect = self.latency.timeout
+                start_time = time.perf_counter()
+                response = await self.client.read_input_registers(
+                    address=block.start,
+                    count=block.count,
+                    slave=self.slave
+                )
+                elapsed = time.perf_counter() - start_time
+
+            if isinstance(response, ModbusIOException):
+                self._record_timeout()
+                logger.warning(f"[{self.name}] Sem resposta no bloco {block.start}: {response}")
+                return dict.fromkeys(names)
+
+            self.breaker.record_success()
+            if self.latency:
+                self.latency.record(elapsed)
+
+            if response.isError():
+                if isinstance(response, ExceptionResponse) and len(names) > 1:
+                    logger.warning(f"[{self.name}] Bloco {block.start} recusado ({response}), "
+                                   f"lendo registros individualmente")
+                    results = {}
+                    for name in names:
+                        results.update(await self._read_block(plan_reads([name])[0]))
+                    return results
+                logger.warning(f"[{self.name}] Erro na leitura do bloco {block.start}: {response}")
+                return dict.fromkeys(names)
+
+            return block.decode(response.registers)
+
+        except (ModbusIOException, ConnectionException, asyncio.TimeoutError) as e:
+            if asyncio.current_task().cancelling():
+                # O pymodbus converte o cancelamento da tarefa em ModbusIOException
+                raise asyncio.CancelledError() from e
+            self._record_timeout()
+            logger.error(f"[{self.name}] Sem resposta no bloco {block.start}: {e}")
+        except ModbusException as e:
+            logger.error(f"[{self.name}] Exceção Modbus no bloco {block.start}: {e}")
+        except Exception as e:
+            logger.error(f"[{self.name}] Erro inesperado no bloco {block.start}: {e}")
+        return dict.fromkeys(names)
+
+    def _record_timeout(self):
+        self.breaker.record_failure()
+        if self.latency:
+            self.latency.record_timeout()
+
+
+class AsyncAcquisitionEngine:
+    """Aquisição de vários barramentos e gateways em um único event loop.
+
+    Cada dispositivo roda sua própria tarefa de polling; dispositivos no mesmo
+    barramento compartilham o transporte. Os clientes assíncronos do pymodbus
+    exigem um event loop em execução, então os transportes só são criados em
+    `run()`: os dispositivos podem ser adicionados em qualquer thread. Os
+    resultados são entregues aos listeners como `callback(nome_dispositivo, leituras)`.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.devices = []
+        self._factories = {}  # Chave do barramento -> função que cria o transporte
+        self._device_keys = []
+        self._transports = {}
+        self._bus_locks = {}
+        self._listeners = []
+        self._stop_event = None
+        self._stop_requested = False
+
+    def add_serial_device(self, port, slave=SLAVE_ADDRESS, name=None):
+        key = ('serial', port)
+        self._factories.setdefault(key, lambda: create_serial_transport(port))
+        return self._add_device(key, slave, name or f"{port}:{slave}")
+
+    def add_tcp_device(self, host, port=502, slave=SLAVE_ADDRESS, name=None):
+        key = ('tcp', host, port)
+        self._factories.setdefault(key, lambda: create_tcp_transport(host, port))
+        return self._add_device(key, slave, name or f"{host}:{port}:{slave}")
+
+    def _add_device(self, key, slave, name):
+        if key not in self._bus_locks:
+            self._bus_locks[key] = asyncio.Lock()
+        device = AsyncModbusClient(None, slave, name, self._bus_locks[key])
+        self.devices.append(device)
+        self._device_keys.append(key)
+        return device
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    async def run(self):
+        """Conecta todos os transportes e executa o polling até `stop()`"""
+        self._stop_event = asyncio.Event()
+        if self._stop_requested:
+            return
+        self._transports = {key: factory() for key, factory in self._factories.items()}
+        for device, key in zip(self.devices, self._device_keys):
+            device.client = self._transports[key]
+        await asyncio.gather(*(transport.connect() for transport in self._transports.values()))
+        tasks = [asyncio.create_task(self._poll_device(device)) for device in self.devices]
+        try:
+            await self._stop_event.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for transport in self._transports.values():
+                transport.close()
+            logger.info("Motor de aquisição assíncrono encerrado.")
+
+    def stop(self):
+        """Solicita a parada; deve ser chamado na thread do event loop"""
+        self._stop_requested = True
+        if self._stop_event:
+            self._stop_event.set()
+
+    async def _poll_device(self, device):
+        next_cycle = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                if device.connected:
+                    readings = await device.poll()
+                    if readings:
+                        self._notify(device.name, readings)
+            except Exception as e:
+                logger.error(f"[{device.name}] Erro no polling: {e}")
+
+            next_cycle += self.interval
+            delay = next_cycle - time.monotonic()
+            if delay < 0:
+                next_cycle = time.monotonic()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def _notify(self, name, readings):
+        for callback in self._listeners:
+            try:
+                callback(name, readings)
+            except Exception as e:
+                logger.error(f"Erro no listener do motor de aquisição: {e}")
@@ -0,0 +1,222 @@
+# benchmark.py
+"""Benchmark reprodutível do caminho de leitura Modbus.
+
+Mede leitura de registro único, leitura em bloco e ciclo completo (read_all),
+grava amostras e estatísticas em JSON e compara com um baseline salvo.
+
+    python benchmark.py --port /dev/pts/3 --iterations 200 --output resultado.json
+    python benchmark.py --host 127.0.0.1 --tcp-port 5020 --baseline baseline.json
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import pymodbus
+from pymodbus.client import ModbusSerialClient, ModbusTcpClient
+
+try:
+    from config import SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES, REGISTER_MAP
+    from modbus_client import ModbusClient
+    from read_planner import plan_reads
+except ImportError:
+    from .config import SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES, REGISTER_MAP
+    from .modbus_client import ModbusClient
+    from .read_planner import plan_reads
+
+# Cenários de build_scenarios(), na ordem de execução
+SCENARIOS = ['single_register', 'block', 'full_cycle']
+
+# Métricas comparadas com o baseline: (nome, maior é melhor)
+COMPARED_METRICS = [('p50_ms', False), ('p95_ms', False), ('p99_ms', False), ('throughput', True)]
+
+
+def percentile(samples, pct):
+    """Percentil por interpolação linear (amostras não precisam estar ordenadas)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = pct / 100 * (len(ordered) - 1)
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples, errors, elapsed):
+    """Estatísticas de um cenário a partir das amostras reais (ms)"""
+    summary = {
+        'count': len(samples),
+        'errors': errors,
+        'throughput': len(samples) / elapsed if elapsed > 0 else 0.0,  # operações/s com sucesso
+    }
+    if samples:
+        summary.update({
+            'min_ms': min(samples),
+            'mean_ms': statistics.mean(samples),
+            'p50_ms': percentile(samples, 50),
+            'p95_ms': percentile(samples, 95),
+            'p99_ms': percentile(samples, 99),
+            'max_ms': max(samples),
+            'std_ms': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        })
+    return summary
+
+
+def run_scenario(operation, iterations, warmup=5):
+    """Executa `operation` repetidamente; retorna (amostras em ms, erros, tempo total em s)"""
+    for _ in range(warmup):
+        try:
+            operation()
+        except Exception:
+            pass
+
+    samples = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            ok = operation()
+        except Exception:
+            ok = False
+        t1 = time.perf_counter()
+        if ok:
+            samples.append((t1 - t0) * 1000)
+        else:
+            errors += 1
+    return samples, errors, time.perf_counter() - start
+
+
+def build_scenarios(client, device):
+    """Cenários: registro único, blocos do plano de leitura e ciclo completo"""
+    slave = device.slave
+    single_address = REGISTER_MAP['temperatura_bateria']
+    blocks = plan_reads()
+
+    def single_register():
+        return not client.read_input_registers(address=single_address, count=1, slave=slave).isError()
+
+    def block_read():
+        return all(
+            not client.read_input_registers(address=block.start, count=block.count, slave=slave).isError()
+            for block in blocks
+        )
+
+    def full_cycle():
+        readings = device.read_all()
+        return bool(readings) and all(value is not None for value in readings.values())
+
+    return {
+        'single_register': single_register,
+        'block': block_read,
+        'full_cycle': full_cycle,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Compara com o baseline; retorna a lista de regressões encontradas"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if not reference:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            new = current.get(metric)
+            old = reference.get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            marker = "REGRESSÃO" if worse else "ok"
+            print(f"  {name:<16} {metric:<11} {old:>10.2f} -> {new:>10.2f} ({change * 100:+.1f}%) {marker}")
+            if worse:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'Cenário':<16} {'N':>5} {'Erros':>6} {'p50(ms)':>8} {'p95(ms)':>8} "
+          f"{'p99(ms)':>8} {'Máx(ms)':>8} {'ops/s':>8}")
+    print("-" * 76)
+    for name, s in results['scenarios'].items():
+        if s['count']:
+            print(f"{name:<16} {s['count']:>5} {s['errors']:>6} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} "
+                  f"{s['p99_ms']:>8.2f} {s['max_ms']:>8.2f} {s['throughput']:>8.1f}")
+        else:
+            print(f"{name:<16} {0:>5} {s['errors']:>6}   (nenhuma resposta)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do caminho de leitura Modbus do TPS")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--port', help="Porta serial (ex.: COM4, /dev/ttyUSB0, /dev/pts/3)")
+    target.add_argument('--host', help="Servidor Modbus TCP (ex.: simulador ou gateway)")
+    parser.add_argument('--tcp-port', type=int, default=502, help="Porta Modbus TCP")
+    parser.add_argument('--slave', type=int, default=SLAVE_ADDRESS, help="Endereço do escravo")
+    parser.add_argument('--baudrate', type=int, default=BAUDRATE)
+    parser.add_argument('--iterations', type=int, default=100, help="Iterações por cenário")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, help="Cenários a executar (padrão: todos)")
+    parser.add_argument('--output', help="Arquivo JSON de saída com amostras e estatísticas")
+    parser.add_argument('--baseline', help="JSON de execução anterior para comparação")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Variação tolerada antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    if args.port:
+        client = ModbusSerialClient(port=args.port, baudrate=args.baudrate, bytesize=BYTESIZE,
+                                    parity=PARITY, stopbits=STOPBITS, timeout=TIMEOUT, retries=RETRIES)
+    else:
+        client = ModbusTcpClient(args.host, port=args.tcp_port, timeout=TIMEOUT, retries=RETRIES)
+
+    if not client.connect():
+        print("ERRO: Falha na conexão!")
+        return 2
+
+    device = ModbusClient(slave=args.slave)
+    device.attach(client)
+    scenarios = build_scenarios(client, device)
+    selected = args.scenarios or SCENARIOS
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'target': args.port or f"{args.host}:{args.tcp_port}",
+            'slave': args.slave,
+            'baudrate': args.baudrate if args.port else None,
+            'iterations': args.iterations,
+            'python': platform.python_version(),
+            'pymodbus': pymodbus.__version__,
+        },
+        'scenarios': {},
+    }
+
+    try:
+        for name in selected:
+            print(f"Executando {name} ({args.iterations} iterações)...")
+            samples, errors, elapsed = run_scenario(scenarios[name], args.iterations)
+            results['scenarios'][name] = summarize(samples, errors, elapsed)
+            results['scenarios'][name]['samples_ms'] = samples
+    finally:
+        client.close()
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nComparação com {args.baseline} (tolerância {args.tolerance * 100:.0f}%):")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# bus_scheduler.py
+import logging
+import threading
+import time
+
+from pymodbus.client import ModbusSerialClient
+
+try:
+    from config import BUS_SLAVES, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES, INTER_FRAME_DELAY
+    from modbus_client import ModbusClient
+except ImportError:
+    from .config import BUS_SLAVES, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES, INTER_FRAME_DELAY
+    from .modbus_client import ModbusClient
+
+logger = logging.getLogger(__name__)
+
+
+def inter_frame_delay(baudrate, bytesize=BYTESIZE, parity=PARITY, stopbits=STOPBITS):
+    """Silêncio mínimo entre quadros RTU: 3,5 caracteres, fixo em 1,75 ms acima de 19200 baud"""
+    if baudrate > 19200:
+        return 0.00175
+    bits_per_char = 1 + bytesize + (0 if parity == 'N' else 1) + stopbits
+    return 3.5 * bits_per_char / baudrate
+
+
+class SerialBus:
+    """Acesso exclusivo ao barramento, respeitando o silêncio entre quadros.
+
+    Usado como context manager em volta de cada transação Modbus.
+    """
+
+    def __init__(self, gap):
+        self.gap = gap
+        self._lock = threading.Lock()
+        self._last_frame_end = 0.0
+
+    def __enter__(self):
+        self._lock.acquire()
+        wait = self._last_frame_end + self.gap - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._last_frame_end = time.perf_counter()
+        self._lock.release()
+        return False
+
+
+class BusScheduler:
+    """Polling de vários escravos TPS compartilhando uma porta RS-485.
+
+    Cada escravo tem seu próprio ModbusClient (plano de leitura, períodos,
+    disjuntor e timeout adaptativo). A cada passo é atendido o escravo com o
+    prazo mais antigo (EDF); empates são resolvidos em rodízio.
+
+    Também pode ser conduzido por um AcquisitionLoop no lugar de um
+    ModbusClient (`connect`, `connected`, `test_connection`, `poll` e
+    `disconnect`), como no processo de aquisição do supervisor.
+    """
+
+    def __init__(self, port, slaves=None, baudrate=BAUDRATE, parity=PARITY, frame_gap=INTER_FRAME_DELAY):
+        if slaves is None:
+            slaves = BUS_SLAVES
+        self.port = port
+        self.baudrate = baudrate
+        self.parity = parity
+        if frame_gap is None:
+            frame_gap = inter_frame_delay(baudrate, parity=parity)
+        self.bus = SerialBus(frame_gap)
+        self.transport = None
+        self.devices = {slave: ModbusClient(slave=slave) for slave in slaves}
+        self.stats = {slave: {'polls': 0, 'errors': 0, 'last_ok': None} for slave in slaves}
+        self._served = dict.fromkeys(slaves, 0)
+        self._serial = 0
+        self._listeners = []
+
+    @property
+    def connected(self):
+        return self.transport is not None and self.transport.connected
+
+    def connect(self):
+        logger.info(f"Abrindo barramento {self.port} para escravos {list(self.devices)}...")
+        if self.transport:
+            self.transport.close()  # Transporte anterior, de uma conexão perdida
+        self.transport = ModbusSerialClient(
+            port=self.port,
+            baudrate=self.baudrate,
+            bytesize=BYTESIZE,
+            parity=self.parity,
+            stopbits=STOPBITS,
+            timeout=TIMEOUT,
+            retries=RETRIES
+        )
+        if not self.transport.connect():
+            logger.error(f"Falha ao abrir {self.port}.")
+            return False
+        for device in self.devices.values():
+            device.attach(self.transport, self.bus)
+        return True
+
+    def disconnect(self):
+        for device in self.devices.values():
+            device.disconnect()
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+        logger.info(f"Barramento {self.port} fechado.")
+
+    def add_listener(self, callback):
+        """Registra `callback(escravo, leituras)` chamado após cada leitura"""
+        self._listeners.append(callback)
+
+    def test_connection(self):
+        """True se algum escravo do barramento responde"""
+        return any(device.test_connection() for device in self.devices.values())
+
+    def next_deadline(self):
+        return min(device.next_poll_time() for device in self.devices.values())
+
+    def run_once(self, now=None):
+        """Atende o escravo vencido de prazo mais antigo; retorna False se nenhum estava vencido"""
+        if now is None:
+            now = time.monotonic()
+        due = self._due(now)
+        if not due:
+            return False
+        self._serve(due[0])
+        return True
+
+    def poll(self):
+        """Atende uma vez cada escravo vencido, em ordem EDF.
+
+        Retorna as leituras de todos eles com chaves (escravo, registro), ou
+        None sem conexão.
+        """
+        if not self.connected:
+            logger.warning(f"Tentativa de leitura sem conexão em {self.port}.")
+            return None
+        results = {}
+        for slave in self._due(time.monotonic()):
+            readings = self._serve(slave)
+            if readings:
+                results.update(((slave, name), value) for name, value in readings.items())
+        return results
+
+    def _due(self, now):
+        """Escravos vencidos, do prazo mais antigo ao mais recente (empates: o atendido há mais tempo)"""
+        due = [
+            (device.next_poll_time(), self._served[slave], slave)
+            for slave, device in self.devices.items()
+            if device.next_poll_time() <= now
+        ]
+        return [slave for _, _, slave in sorted(due)]
+
+    def _serve(self, slave):
+        self._serial += 1
+        self._served[slave] = self._serial
+
+        readings = self.devices[slave].poll()
+        if readings:
+            self._update_stats(slave, readings)
+            for callback in self._listeners:
+                try:
+                    callback(slave, readings)
+                except Exception as e:
+                    logger.error(f"Erro no listener do barramento: {e}")
+        return readings
+
+    def run(self, stop_event):
+        """Laço de polling até `stop_event` ser sinalizado"""
+        while not stop_event.is_set():
+            if not self.run_once():
+                stop_event.wait(max(self.next_deadline() - time.monotonic(), 0))
+
+    def health(self):
+        """Estado de saúde de cada escravo"""
+        report = {}
+        for slave, device in self.devices.items():
+            report[slave] = dict(self.stats[slave])
+            report[slave]['state'] = device.breaker.state
+            report[slave]['timeout'] = device.latency.timeout if device.latency else TIMEOUT
+        return report
+
+    def _update_stats(self, slave, readings):
+        stats = self.stats[slave]
+        stats['polls'] += 1
+        if any(value is not None for value in readings.values()):
+            stats['last_ok'] = time.time()
+        else:
+            stats['errors'] += 1
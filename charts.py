@@ -0,0 +1,167 @@
+# charts.py
+import time
+
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QTimer, QPointF
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF, QFont
+
+try:
+    from config import (CHART_WINDOW, CHART_MIN_WINDOW, CHART_MAX_WINDOW, CHART_REFRESH_HZ,
+                        CHART_MAX_GAP)
+except ImportError:
+    from .config import (CHART_WINDOW, CHART_MIN_WINDOW, CHART_MAX_WINDOW, CHART_REFRESH_HZ,
+                         CHART_MAX_GAP)
+
+CORES_SERIES = ['#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd']
+
+
+def decimate_minmax(segments, start, end, buckets):
+    """Reduz as amostras em [start, end) a `buckets` pares (mínimo, máximo).
+
+    `segments` é uma lista de pares (timestamps, valores) em ordem crescente de
+    tempo, como os retornados por ReadingHistory.series(). Cada segmento é
+    percorrido uma vez com reduceat, sem cópias; janelas sem amostras ficam NaN.
+    Retorna (centros das janelas, mínimos, máximos).
+    """
+    edges = np.linspace(start, end, buckets + 1)
+    low = np.full(buckets, np.nan)
+    high = np.full(buckets, np.nan)
+    for times, values in segments:
+        index = np.searchsorted(times, edges)
+        nonempty = np.diff(index) > 0
+        if not nonempty.any():
+            continue
+        visible = values[index[0]:index[-1]]
+        starts = index[:-1][nonempty] - index[0]
+        low[nonempty] = np.fmin(low[nonempty], np.fmin.reduceat(visible, starts))
+        high[nonempty] = np.fmax(high[nonempty], np.fmax.reduceat(visible, starts))
+    return (edges[:-1] + edges[1:]) / 2, low, high
+
+
+def format_window(seconds):
+    if seconds >= 86400:
+        return f"{seconds / 86400:.1f} d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f} h"
+    if seconds >= 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds:.0f} s"
+
+
+class TrendChart(QWidget):
+    """Gráfico de tendência de um grupo de registros, desenhado com QPainter.
+
+    Os dados vêm do ReadingHistory (e, para janelas mais longas que o
+    histórico em memória, dos agregados do RollupStore) reduzidos a um par
+    min/max por coluna de pixel. O redesenho é limitado a CHART_REFRESH_HZ e
+    só acontece quando há amostras novas ou a janela mudou. A roda do mouse
+    altera a janela entre CHART_MIN_WINDOW e CHART_MAX_WINDOW.
+    """
+
+    MARGIN_LEFT = 42
+    MARGIN_RIGHT = 6
+    MARGIN_TOP = 6
+    MARGIN_BOTTOM = 18
+
+    def __init__(self, history, names, labels=None, rollups=None, window=CHART_WINDOW, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.names = list(names)
+        self.labels = labels or {}
+        self.rollups = rollups
+        self.window = window
+        self.setMinimumHeight(140)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self._drawn_version = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._refresh)
+        self._timer.start(int(1000 / CHART_REFRESH_HZ))
+
+    def _refresh(self):
+        """Agenda um redesenho apenas se houver amostras novas ou a janela tiver mudado"""
+        version = (self.history.head, self.history.size, self.window, self.width(), self.height())
+        if version != self._drawn_version and self.isVisible():
+            self._drawn_version = version
+            self.update()
+
+    def wheelEvent(self, event):
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        self.window = min(max(self.window * factor, CHART_MIN_WINDOW), CHART_MAX_WINDOW)
+        event.accept()
+
+    def series_data(self, name, start, end, buckets):
+        """(centros, mínimos, máximos, largura da janela) de `name`, do histórico em memória ou dos agregados"""
+        segments = self.history.series(name)
+        oldest = segments[0][0][0] if segments else end
+        if self.rollups is not None and start < oldest:
+            data = self.rollups.query(name, start, end, max_points=buckets)
+            if len(data['bucket']):
+                centers = data['bucket'] + data['resolution'] / 2
+                return centers, data['min'], data['max'], data['resolution']
+        return (*decimate_minmax(segments, start, end, buckets), (end - start) / buckets)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        plot_width = self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT
+        plot_height = self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM
+        if plot_width < 10 or plot_height < 10:
+            return
+
+        end = time.time()
+        start = end - self.window
+        data = [self.series_data(name, start, end, plot_width) for name in self.names]
+
+        lows = [low for _, low, _, _ in data if np.isfinite(low).any()]
+        highs = [high for _, _, high, _ in data if np.isfinite(high).any()]
+        painter.setFont(QFont("Arial", 7))
+        painter.setPen(QColor('#888888'))
+        painter.drawRect(self.MARGIN_LEFT, self.MARGIN_TOP, plot_width, plot_height)
+        painter.drawText(self.MARGIN_LEFT, self.height() - 4, f"-{format_window(self.window)}")
+        painter.drawText(self.width() - self.MARGIN_RIGHT - 30, self.height() - 4, "agora")
+        if not lows:
+            painter.drawText(self.MARGIN_LEFT + 6, self.MARGIN_TOP + 14, "sem dados")
+            return
+
+        y_min = min(np.nanmin(low) for low in lows)
+        y_max = max(np.nanmax(high) for high in highs)
+        if y_max - y_min < 1e-9:
+            y_min -= 1
+            y_max += 1
+        padding = (y_max - y_min) * 0.05
+        y_min -= padding
+        y_max += padding
+        painter.drawText(2, self.MARGIN_TOP + 8, f"{y_max:.1f}")
+        painter.drawText(2, self.MARGIN_TOP + plot_height, f"{y_min:.1f}")
+
+        x_scale = plot_width / (end - start)
+        y_scale = plot_height / (y_max - y_min)
+        bottom = self.MARGIN_TOP + plot_height
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        legend_x = self.MARGIN_LEFT + 4
+        for index, (name, (centers, low, high, step)) in enumerate(zip(self.names, data)):
+            color = QColor(CORES_SERIES[index % len(CORES_SERIES)])
+            painter.setPen(QPen(color, 1))
+            xs = self.MARGIN_LEFT + (centers - start) * x_scale
+            y_low = bottom - (low - y_min) * y_scale
+            y_high = bottom - (high - y_min) * y_scale
+            self._draw_runs(painter, centers, xs, y_low, y_high, max(CHART_MAX_GAP, 2 * step))
+            label = self.labels.get(name, name)
+            painter.drawText(legend_x, self.MARGIN_TOP + 10, label)
+            legend_x += painter.fontMetrics().width(label) + 6
+
+    @staticmethod
+    def _draw_runs(painter, centers, xs, y_low, y_high, max_gap):
+        """Desenha polilinhas alternando mínimo e máximo; interrompe em lacunas maiores que `max_gap`"""
+        valid = np.flatnonzero(np.isfinite(y_low))
+        if not len(valid):
+            return
+        # Janelas vazias entre amostras próximas são ligadas; lacunas longas (sem comunicação) não
+        breaks = np.flatnonzero(np.diff(centers[valid]) > max_gap) + 1
+        for run in np.split(valid, breaks):
+            polygon = QPolygonF()
+            for x, low, high in zip(xs[run], y_low[run], y_high[run]):
+                polygon.append(QPointF(x, low))
+                polygon.append(QPointF(x, high))
+            painter.drawPolyline(polygon)
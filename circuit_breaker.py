@@ -0,0 +1,93 @@
+# circuit_breaker.py
+import logging
+import time
+
+try:
+    from config import BREAKER_FAILURE_THRESHOLD, BREAKER_PROBE_INITIAL, BREAKER_PROBE_MAX
+except ImportError:
+    from .config import BREAKER_FAILURE_THRESHOLD, BREAKER_PROBE_INITIAL, BREAKER_PROBE_MAX
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'        # Polling normal
+OPEN = 'open'            # Dispositivo sem resposta: apenas sondagens espaçadas
+HALF_OPEN = 'half_open'  # Sondagem em andamento
+
+
+class CircuitBreaker:
+    """Disjuntor de comunicação para dispositivo sem resposta.
+
+    Após `threshold` timeouts consecutivos o ciclo de leitura é interrompido e
+    passa-se a sondar um único registro, com intervalo crescendo
+    exponencialmente até `probe_max`. A primeira resposta fecha o disjuntor.
+    """
+
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, probe_initial=BREAKER_PROBE_INITIAL,
+                 probe_max=BREAKER_PROBE_MAX):
+        self.threshold = threshold
+        self.probe_initial = probe_initial
+        self.probe_max = probe_max
+        self.state = CLOSED
+        self.failures = 0
+        self.probe_interval = probe_initial
+        self.next_probe = 0.0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Registra `callback(estado_anterior, novo_estado)` para transições"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def allows_requests(self):
+        return self.state == CLOSED
+
+    def probe_due(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        return self.state == OPEN and now >= self.next_probe
+
+    def begin_probe(self):
+        self._transition(HALF_OPEN)
+
+    def record_success(self):
+        self.failures = 0
+        self.probe_interval = self.probe_initial
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        self.failures += 1
+
+        if self.state == HALF_OPEN:
+            # Sondagem falhou: dobra o intervalo até o máximo
+            self.probe_interval = min(self.probe_interval * 2, self.probe_max)
+            self.next_probe = now + self.probe_interval
+            self._transition(OPEN)
+        elif self.state == CLOSED and self.failures >= self.threshold:
+            self.probe_interval = self.probe_initial
+            self.next_probe = now + self.probe_interval
+            self._transition(OPEN)
+
+    def reset(self):
+        """Volta ao estado inicial sem notificar (ex.: ao desconectar)"""
+        self.state = CLOSED
+        self.failures = 0
+        self.probe_interval = self.probe_initial
+        self.next_probe = 0.0
+
+    def _transition(self, new_state):
+        old_state = self.state
+        if old_state == new_state:
+            return
+        self.state = new_state
+        logger.info(f"Disjuntor: {old_state} -> {new_state} (falhas consecutivas: {self.failures})")
+        for callback in self._listeners:
+            try:
+                callback(old_state, new_state)
+            except Exception as e:
+                logger.error(f"Erro no listener do disjuntor: {e}")
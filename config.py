@@ -4,41 +4,160 @@ PARITY = 'N'
 STOPBITS = 1
 BYTESIZE = 8
 TIMEOUT = 0.5
+RETRIES = 0    # Novas tentativas do pymodbus por requisição: falhas vão ao disjuntor e ao timeout adaptativo
 
-REGISTER_MAP = {
-    # Entradas binárias (não usadas)
-    # Registros de entrada (FC 0x04)
-    'tensao_r': 63,
-    'tensao_s': 64,
-    'tensao_t': 65,
-    'corrente_r': 66,
-    'corrente_s': 67,
-    'corrente_t': 68,
-    'frequencia': 69,
-    'tensao_retificador': 70,
-    'tensao_bateria': 71,
-    'tensao_consumidor': 72,
-    'corrente_retificador': 73,
-    'corrente_bateria': 74,
-    'temperatura_bateria': 76
+# Escravos no mesmo barramento RS-485 (BusScheduler)
+BUS_SLAVES = [SLAVE_ADDRESS]
+INTER_FRAME_DELAY = None   # Silêncio entre quadros (s); None: 3,5 caracteres (1,75 ms acima de 19200 baud)
+
+# Visão geral do site na interface (AsyncAcquisitionEngine): outros TPS em barramentos seriais ou gateways
+# Modbus TCP, fora da porta da conexão principal. Ex.: {'port': '/dev/ttyUSB1', 'slave': 31},
+# {'host': '192.168.0.50', 'tcp_port': 502, 'slave': 30, 'name': 'Sala 2'}
+SITE_DEVICES = []
+
+# Timeout adaptativo (derivado da latência medida em cada dispositivo)
+ADAPTIVE_TIMEOUT = True
+LATENCY_WINDOW = 200       # Respostas consideradas na janela móvel
+LATENCY_MIN_SAMPLES = 20   # Amostras necessárias antes de adaptar
+TIMEOUT_PERCENTILE = 99    # Percentil da latência usado como base
+TIMEOUT_MARGIN = 0.02      # Margem somada ao percentil (segundos)
+TIMEOUT_FLOOR = 0.05       # Timeout mínimo (segundos)
+TIMEOUT_CEILING = TIMEOUT  # Timeout máximo (segundos)
+
+# Esquema dos registros de entrada (FC 0x04), compilado em register_schema.py:
+#   type: u16, s16, u32, s32 ou float32 (32 bits ocupam dois registros; padrão u16)
+#   word_order: 'big' (palavra alta primeiro, padrão) ou 'little'
+#   valor = bruto / scale + offset
+REGISTER_SCHEMA = {
+    'tensao_r': {'address': 63, 'unit': 'V'},
+    'tensao_s': {'address': 64, 'unit': 'V'},
+    'tensao_t': {'address': 65, 'unit': 'V'},
+    'corrente_r': {'address': 66, 'scale': 10, 'unit': 'A'},
+    'corrente_s': {'address': 67, 'scale': 10, 'unit': 'A'},
+    'corrente_t': {'address': 68, 'scale': 10, 'unit': 'A'},
+    'frequencia': {'address': 69, 'scale': 10, 'unit': 'Hz'},
+    'tensao_retificador': {'address': 70, 'scale': 10, 'unit': 'V'},
+    'tensao_bateria': {'address': 71, 'scale': 10, 'unit': 'V'},
+    'tensao_consumidor': {'address': 72, 'scale': 10, 'unit': 'V'},
+    'corrente_retificador': {'address': 73, 'scale': 10, 'unit': 'A'},
+    'corrente_bateria': {'address': 74, 'type': 's16', 'scale': 10, 'unit': 'A'},  # Negativa na descarga
+    'temperatura_bateria': {'address': 76, 'scale': 10, 'unit': '°C'}
+}
+
+# Derivados do esquema, para quem só precisa do endereço ou da escala
+REGISTER_MAP = {name: spec['address'] for name, spec in REGISTER_SCHEMA.items()}
+SCALE_FACTORS = {name: spec.get('scale', 1) for name, spec in REGISTER_SCHEMA.items()}
+
+# Período de leitura de cada registro (segundos)
+POLL_PERIODS = {
+    'tensao_r': 1.0,
+    'tensao_s': 1.0,
+    'tensao_t': 1.0,
+    'corrente_r': 1.0,
+    'corrente_s': 1.0,
+    'corrente_t': 1.0,
+    'frequencia': 10.0,
+    'tensao_retificador': 1.0,
+    'tensao_bateria': 0.25,
+    'tensao_consumidor': 1.0,
+    'corrente_retificador': 0.25,
+    'corrente_bateria': 0.5,
+    'temperatura_bateria': 5.0
 }
 
-# Registros prioritários (lidos primeiro para interface responsiva)
-PRIORITY_REGISTERS = ['tensao_bateria', 'corrente_retificador', 'temperatura_bateria']
-
-# Fatores de escala
-SCALE_FACTORS = {
-    'tensao_r': 1,
-    'tensao_s': 1,
-    'tensao_t': 1,
-    'corrente_r': 10,
-    'corrente_s': 10,
-    'corrente_t': 10,
-    'frequencia': 10,
-    'tensao_retificador': 10,
-    'tensao_bateria': 10,
-    'tensao_consumidor': 10,
-    'corrente_retificador': 10,
-    'corrente_bateria': 10,
-    'temperatura_bateria': 10
-}
\ No newline at end of file
+# Período padrão para registros sem entrada em POLL_PERIODS
+DEFAULT_POLL_PERIOD = 3.0
+
+# Resolução do laço de aquisição (segundos)
+POLL_INTERVAL = min(POLL_PERIODS.values())
+
+# Detecção de mudanças (deadband.py): variação mínima para republicar um registro.
+# Número: absoluta, na unidade do registro (use valores entre passos da resolução, ex.: 0.15
+# para resolução 0.1); texto 'N%': relativa ao último valor publicado
+DEADBAND_ENABLED = True
+DEADBANDS = {
+    'tensao_r': 1.5,
+    'tensao_s': 1.5,
+    'tensao_t': 1.5,
+    'corrente_r': '2%',
+    'corrente_s': '2%',
+    'corrente_t': '2%',
+    'frequencia': 0.15,
+    'tensao_retificador': 0.15,
+    'tensao_bateria': 0.05,
+    'tensao_consumidor': 0.15,
+    'corrente_retificador': '2%',
+    'corrente_bateria': 0.15,
+    'temperatura_bateria': 0.25
+}
+DEFAULT_DEADBAND = 0.0      # Registros sem entrada: qualquer mudança é publicada
+DEADBAND_HEARTBEAT = 10.0   # Intervalo entre envios do estado completo (segundos)
+
+# Planejamento de leituras em bloco (FC 0x04)
+READ_GAP_TOLERANCE = 1        # Endereços não mapeados tolerados dentro de um bloco (ex.: 75)
+MAX_REGISTERS_PER_READ = 125  # Limite de registros por requisição (máximo do protocolo: 125)
+
+# Disjuntor de comunicação (dispositivo sem resposta)
+BREAKER_FAILURE_THRESHOLD = 3  # Timeouts consecutivos para interromper o ciclo
+BREAKER_PROBE_INITIAL = 1.0    # Intervalo inicial entre sondagens (segundos)
+BREAKER_PROBE_MAX = 30.0       # Intervalo máximo entre sondagens (segundos)
+
+# Reconexão automática (laço de aquisição)
+RECONNECT_INITIAL = 1.0   # Espera após a primeira tentativa de conexão falha (segundos)
+RECONNECT_MAX = 30.0      # Espera máxima entre tentativas (segundos)
+LINK_LOST_AFTER = 15.0    # Sem nenhuma resposta por este tempo, a porta é fechada e reaberta (segundos)
+
+# Descoberta automática de porta, baud rate e escravo (port_discovery.py)
+DISCOVERY_BAUDRATES = [57600, 19200, 9600, 38400, 115200]  # Na ordem de tentativa
+DISCOVERY_PARITIES = ['N', 'E', 'O']
+DISCOVERY_TIMEOUT = 0.1   # Espera por resposta em cada sondagem (segundos)
+
+# Supervisor com um processo de aquisição por porta (supervisor.py)
+SUPERVISOR_HANG_TIMEOUT = 60.0    # Processo sem sinal de vida por este tempo é encerrado e reiniciado (segundos)
+SUPERVISOR_RESTART_INITIAL = 1.0  # Espera antes de reiniciar um processo que terminou (segundos)
+SUPERVISOR_RESTART_MAX = 60.0     # Espera máxima entre reinícios seguidos (segundos)
+
+# Captura de quadros RTU (frame_capture.py)
+CAPTURE_BUFFER_SIZE = 64 * 1024  # Buffer de escrita do arquivo de captura (bytes)
+
+# Histórico em memória (amostras por registro; ~21 MB = 1 dia a 4 leituras/s)
+HISTORY_CAPACITY = 345600
+
+# Historiador em disco (SQLite em modo WAL, escrita em lotes)
+HISTORIAN_ENABLED = True
+HISTORIAN_DIR = 'historico'
+HISTORIAN_FLUSH_INTERVAL = 2.0    # Intervalo máximo entre gravações (segundos)
+HISTORIAN_BATCH_SIZE = 500        # Amostras por transação
+HISTORIAN_QUEUE_SIZE = 20000      # Amostras pendentes antes de descartar
+HISTORIAN_MAX_FILE_MB = 256       # Tamanho para rotação do arquivo
+HISTORIAN_RETENTION_DAYS = 365    # Arquivos mais antigos são apagados (0: sem limite)
+
+# Agregados pré-calculados (min/max/média/contagem) para consultas de longo prazo
+ROLLUP_ENABLED = True
+ROLLUP_PATH = 'historico/agregados.db'
+ROLLUP_RESOLUTIONS = [60, 3600, 86400]  # 1 min, 1 h, 1 dia (segundos)
+
+# Exportador de métricas (formato texto do Prometheus) do daemon
+METRICS_ENABLED = False
+METRICS_HOST = '0.0.0.0'
+METRICS_PORT = 9105
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]  # segundos
+
+# Gateway Modbus TCP que serve as leituras em cache (daemon)
+GATEWAY_ENABLED = False
+GATEWAY_HOST = '0.0.0.0'
+GATEWAY_PORT = 5020
+GATEWAY_MAX_AGE = 5.0             # Atraso (s) além do período de leitura para responder com exceção 0x0B
+GATEWAY_AGE_REGISTER = 100        # Registro com a idade do cache em décimos de segundo
+
+# Snapshot das últimas leituras em memória compartilhada (daemon)
+SNAPSHOT_ENABLED = False
+SNAPSHOT_NAME = 'tps_snapshot'
+SNAPSHOT_READ_TIMEOUT = 0.1       # Espera máxima (s) do leitor por um snapshot consistente
+
+# Gráficos de tendência
+CHART_WINDOW = 600                # Janela inicial (segundos)
+CHART_MIN_WINDOW = 60
+CHART_MAX_WINDOW = 30 * 86400
+CHART_REFRESH_HZ = 20             # Taxa máxima de redesenho, independente da leitura
+CHART_MAX_GAP = 30.0              # Intervalo sem amostras (s) desenhado como lacuna
@@ -0,0 +1,309 @@
+# daemon.py
+"""Aquisição sem interface gráfica (não importa PyQt5).
+
+Executa o laço de leitura do ModbusClient, registra as leituras no log e/ou
+as repassa como JSON por linha, grava histórico e agregados e encerra de
+forma limpa em SIGINT/SIGTERM. As opções vêm de um arquivo INI (seção
+[daemon]) e podem ser sobrescritas pela linha de comando:
+
+    python daemon.py --port /dev/ttyUSB0 --output -
+    python daemon.py --config /etc/tps/daemon.ini
+
+Exemplo de arquivo:
+
+    [daemon]
+    port = /dev/ttyUSB0
+    slave = 30
+    interval = 0.25
+    historian = yes
+    rollups = yes
+    output = /var/lib/tps/leituras.jsonl
+    metrics_port = 9105
+    gateway_port = 5020
+    snapshot = tps_snapshot
+    archive = /var/lib/tps/leituras.tpsc
+    deadband = yes
+    log_level = INFO
+"""
+import argparse
+import configparser
+import json
+import logging
+import signal
+import sys
+import time
+
+from pymodbus.client import ModbusTcpClient
+
+try:
+    from config import (SLAVE_ADDRESS, POLL_INTERVAL, TIMEOUT, RETRIES, HISTORIAN_ENABLED, ROLLUP_ENABLED,
+                        METRICS_ENABLED, METRICS_HOST, METRICS_PORT, GATEWAY_ENABLED, GATEWAY_HOST,
+                        GATEWAY_PORT, SNAPSHOT_ENABLED, SNAPSHOT_NAME, DEADBAND_ENABLED)
+    from modbus_client import ModbusClient
+    from acquisition import AcquisitionLoop, CONNECTED
+    from historian import Historian
+    from rollups import RollupStore
+    from metrics_exporter import MetricsExporter
+    from tcp_gateway import ModbusTcpGateway
+    from shm_snapshot import SnapshotWriter
+    from frame_capture import FrameRecorder
+    from deadband import DeadbandFilter
+    from sample_codec import SampleEncoder
+except ImportError:
+    from .config import (SLAVE_ADDRESS, POLL_INTERVAL, TIMEOUT, RETRIES, HISTORIAN_ENABLED, ROLLUP_ENABLED,
+                         METRICS_ENABLED, METRICS_HOST, METRICS_PORT, GATEWAY_ENABLED, GATEWAY_HOST,
+                         GATEWAY_PORT, SNAPSHOT_ENABLED, SNAPSHOT_NAME, DEADBAND_ENABLED)
+    from .modbus_client import ModbusClient
+    from .acquisition import AcquisitionLoop, CONNECTED
+    from .historian import Historian
+    from .rollups import RollupStore
+    from .metrics_exporter import MetricsExporter
+    from .tcp_gateway import ModbusTcpGateway
+    from .shm_snapshot import SnapshotWriter
+    from .frame_capture import FrameRecorder
+    from .deadband import DeadbandFilter
+    from .sample_codec import SampleEncoder
+
+logger = logging.getLogger('daemon')
+
+DEFAULTS = {
+    'port': None,
+    'host': None,
+    'tcp_port': 502,
+    'replay': None,
+    'replay_speed': 1.0,
+    'slave': SLAVE_ADDRESS,
+    'interval': POLL_INTERVAL,
+    'historian': HISTORIAN_ENABLED,
+    'rollups': ROLLUP_ENABLED,
+    'output': None,
+    'deadband': DEADBAND_ENABLED,
+    'metrics_host': METRICS_HOST,
+    'metrics_port': METRICS_PORT if METRICS_ENABLED else 0,
+    'gateway_host': GATEWAY_HOST,
+    'gateway_port': GATEWAY_PORT if GATEWAY_ENABLED else 0,
+    'snapshot': SNAPSHOT_NAME if SNAPSHOT_ENABLED else None,
+    'capture': None,
+    'archive': None,
+    'log_readings': False,
+    'log_level': 'INFO',
+    'log_file': None,
+}
+
+
+def load_config(path):
+    """Lê a seção [daemon] do arquivo INI, convertendo para os tipos de DEFAULTS"""
+    parser = configparser.ConfigParser()
+    if not parser.read(path, encoding='utf-8'):
+        raise FileNotFoundError(f"Arquivo de configuração não encontrado: {path}")
+    if not parser.has_section('daemon'):
+        return {}
+    section = parser['daemon']
+    options = {}
+    for key in section:
+        if key not in DEFAULTS:
+            raise ValueError(f"Opção desconhecida em {path}: {key}")
+        default = DEFAULTS[key]
+        if isinstance(default, bool):
+            options[key] = section.getboolean(key)
+        elif isinstance(default, int):
+            options[key] = section.getint(key)
+        elif isinstance(default, float):
+            options[key] = section.getfloat(key)
+        else:
+            options[key] = section.get(key) or None
+    return options
+
+
+def parse_options(argv=None):
+    parser = argparse.ArgumentParser(description="Aquisição do TPS sem interface gráfica")
+    parser.add_argument('--config', help="Arquivo INI com a seção [daemon]")
+    parser.add_argument('--port', help="Porta serial (ex.: /dev/ttyUSB0, COM4)")
+    parser.add_argument('--host', help="Gateway Modbus TCP (alternativa à porta serial)")
+    parser.add_argument('--tcp-port', type=int, help="Porta Modbus TCP")
+    parser.add_argument('--replay', help="Reproduz uma captura de quadros (frame_capture.py) no lugar da porta")
+    parser.add_argument('--replay-speed', type=float, help="Velocidade da reprodução (1 = original, 0 = sem espera)")
+    parser.add_argument('--slave', type=int, help="Endereço do escravo")
+    parser.add_argument('--interval', type=float, help="Intervalo do laço de leitura (s)")
+    parser.add_argument('--historian', action=argparse.BooleanOptionalAction, help="Grava o histórico em disco")
+    parser.add_argument('--rollups', action=argparse.BooleanOptionalAction, help="Mantém os agregados")
+    parser.add_argument('--output', help="Repassa as leituras como JSON por linha ('-' para a saída padrão)")
+    parser.add_argument('--deadband', action=argparse.BooleanOptionalAction,
+                        help="Na saída JSON, só os registros que mudaram além da banda morta (DEADBANDS)")
+    parser.add_argument('--metrics-host', help="Endereço do endpoint /metrics")
+    parser.add_argument('--metrics-port', type=int, help="Porta do endpoint /metrics (0 desativa)")
+    parser.add_argument('--gateway-host', help="Endereço do gateway Modbus TCP")
+    parser.add_argument('--gateway-port', type=int, help="Porta do gateway Modbus TCP com as leituras em cache (0 desativa)")
+    parser.add_argument('--snapshot', metavar='NOME', help="Publica as leituras em memória compartilhada com este nome")
+    parser.add_argument('--capture', help="Grava os quadros RTU enviados e recebidos neste arquivo")
+    parser.add_argument('--archive', help="Grava as leituras neste arquivo no formato compacto (sample_codec.py)")
+    parser.add_argument('--log-readings', action=argparse.BooleanOptionalAction, help="Registra cada leitura no log")
+    parser.add_argument('--log-level', help="DEBUG, INFO, WARNING ou ERROR")
+    parser.add_argument('--log-file', help="Arquivo de log (padrão: saída de erro)")
+    args = parser.parse_args(argv)
+
+    options = dict(DEFAULTS)
+    if args.config:
+        options.update(load_config(args.config))
+    for key, value in vars(args).items():
+        if key != 'config' and value is not None:
+            options[key] = value
+    if not options['port'] and not options['host'] and not options['replay']:
+        parser.error("informe --port, --host ou --replay (na linha de comando ou no arquivo)")
+    return options
+
+
+class Daemon:
+    """Aquisição contínua com consumidores configuráveis e encerramento por sinal"""
+
+    def __init__(self, options):
+        self.options = options
+        self.modbus_client = ModbusClient(slave=options['slave'])
+        self.loop = AcquisitionLoop(self.modbus_client, options['interval'], connect=self.connect)
+        self.loop.add_error_listener(lambda message: logger.error(message))
+        self.historian = None
+        self.rollups = None
+        self.metrics = None
+        self.gateway = None
+        self.snapshot = None
+        self.capture = None
+        self.archive = None
+        self.output = None
+        self.changes = None
+        self.transport = None
+
+        if options['historian']:
+            self.historian = Historian()
+            self.modbus_client.add_sink(self.historian)
+        if options['rollups']:
+            self.rollups = RollupStore()
+            self.modbus_client.add_sink(self.rollups)
+        if options['output']:
+            self.output = sys.stdout if options['output'] == '-' else open(options['output'], 'a', encoding='utf-8')
+            self.modbus_client.add_sink(self)
+            if options['deadband']:
+                self.changes = DeadbandFilter()
+                self.loop.add_connection_listener(self._reset_changes)
+        if options['metrics_port']:
+            self.metrics = MetricsExporter(options['metrics_host'], options['metrics_port'])
+            self.metrics.add_device(options['host'] or options['port'] or options['replay'], self.modbus_client)
+            self.metrics.observe_loop(self.loop)
+        if options['gateway_port']:
+            self.gateway = ModbusTcpGateway(options['gateway_host'], options['gateway_port'])
+            self.gateway.add_device(options['slave'], self.modbus_client)
+        if options['snapshot']:
+            self.snapshot = SnapshotWriter(options['snapshot'])
+            self.modbus_client.add_sink(self.snapshot)
+        if options['capture']:
+            self.capture = FrameRecorder(options['capture'])
+            self.modbus_client.add_packet_listener(self.capture.record)
+        if options['archive']:
+            self.archive = SampleEncoder(open(options['archive'], 'wb'))
+            self.modbus_client.add_sink(self.archive)
+            logger.info(f"Gravando as leituras em {options['archive']}")
+        if options['replay']:
+            self.loop.add_cycle_listener(self._check_replay)
+        if options['log_readings']:
+            self.loop.add_listener(lambda readings: logger.info(f"Leituras: {readings}"))
+
+    def append(self, timestamp, readings):
+        """Consumidor de leituras: uma linha JSON por ciclo (com banda morta, só ciclos com mudanças)"""
+        if self.changes:
+            readings = self.changes.changes(readings)
+            if not readings:
+                return
+        self.output.write(json.dumps({'timestamp': timestamp, 'readings': readings}) + '\n')
+        self.output.flush()
+
+    def connect(self):
+        """Uma tentativa de conexão; novas tentativas e backoff ficam com o AcquisitionLoop"""
+        if self.options['replay']:
+            return self.modbus_client.connect_replay(self.options['replay'], self.options['replay_speed'])
+        if not self.options['host']:
+            return self.modbus_client.connect(self.options['port'])
+        if self.transport:
+            self.transport.close()  # Transporte anterior, de uma conexão perdida
+        self.transport = ModbusTcpClient(self.options['host'], port=self.options['tcp_port'], timeout=TIMEOUT,
+                                         retries=RETRIES)
+        if not self.transport.connect():
+            logger.error(f"Falha ao conectar a {self.options['host']}:{self.options['tcp_port']}")
+            return False
+        logger.info(f"Conectado a {self.options['host']}:{self.options['tcp_port']}")
+        self.modbus_client.attach(self.transport)
+        return True
+
+    def _reset_changes(self, old_state, new_state):
+        if new_state == CONNECTED:
+            self.changes.reset()  # Primeira linha após (re)conectar com o estado completo
+
+    def _check_replay(self, duration):
+        if self.modbus_client.client.finished:
+            logger.info(f"Fim da captura {self.options['replay']}")
+            self.stop()
+
+    def run(self):
+        if self.historian:
+            self.historian.start()
+        if self.metrics:
+            self.metrics.start()
+        if self.gateway:
+            self.gateway.start()
+        started = time.monotonic()
+        try:
+            logger.info(f"Aquisição iniciada (intervalo {self.options['interval']}s)")
+            self.loop.run()
+        finally:
+            self.shutdown()
+        logger.info(f"Aquisição encerrada após {time.monotonic() - started:.0f}s "
+                    f"({self.loop.cycles} ciclos, {self.loop.late_cycles} atrasados)")
+        if self.changes:
+            logger.info(f"Banda morta: {self.changes.suppression():.0%} dos valores não repassados à saída")
+
+    def stop(self, signum=None, frame=None):
+        if signum is not None:
+            logger.info(f"Sinal {signal.Signals(signum).name} recebido, encerrando...")
+        self.loop.stop()
+
+    def shutdown(self):
+        if self.modbus_client.connected:
+            self.modbus_client.disconnect()
+        if self.transport:
+            self.transport.close()
+        if self.metrics:
+            self.metrics.stop()
+        if self.gateway:
+            self.gateway.stop()
+        if self.snapshot:
+            self.snapshot.close()
+        if self.capture:
+            self.capture.close()
+        if self.archive:
+            self.archive.close()
+        if self.historian:
+            self.historian.stop()
+        if self.rollups:
+            self.rollups.close()
+        if self.output and self.output is not sys.stdout:
+            self.output.close()
+
+
+def main(argv=None):
+    options = parse_options(argv)
+    logging.basicConfig(
+        level=getattr(logging, options['log_level'].upper(), logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        filename=options['log_file']
+    )
+    daemon = Daemon(options)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    try:
+        daemon.run()
+    except Exception as e:
+        logger.critical(f"Erro fatal: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
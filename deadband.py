@@ -0,0 +1,82 @@
+# deadband.py
+"""Detecção de mudanças com banda morta por registro.
+
+`DeadbandFilter.changes(leituras)` compara cada valor com o último publicado
+e retorna apenas os que mudaram além da banda morta do registro: absoluta
+(número, na unidade do registro) ou relativa ao último valor publicado
+(texto terminado em '%'). Transições de/para falha (None) sempre passam. A
+cada `heartbeat` segundos, e na primeira chamada após `reset()`, retorna o
+estado completo (todos os valores publicados, atualizados com o ciclo).
+
+Com a bateria em flutuação a maioria dos ciclos não muda nada, e o ciclo
+inteiro é suprimido (dicionário vazio).
+"""
+import time
+
+try:
+    from config import DEADBANDS, DEFAULT_DEADBAND, DEADBAND_HEARTBEAT
+except ImportError:
+    from .config import DEADBANDS, DEFAULT_DEADBAND, DEADBAND_HEARTBEAT
+
+
+def parse_deadband(value):
+    """Retorna (absoluta, relativa): 0.5 -> (0.5, 0.0); '2%' -> (0.0, 0.02)"""
+    if isinstance(value, str):
+        text = value.strip()
+        if not text.endswith('%'):
+            raise ValueError(f"Banda morta inválida: {value!r} (use um número ou 'N%')")
+        return 0.0, float(text[:-1]) / 100
+    return float(value), 0.0
+
+
+class DeadbandFilter:
+    """Filtro de mudanças entre o laço de aquisição e os consumidores de leituras"""
+
+    def __init__(self, deadbands=None, default=DEFAULT_DEADBAND, heartbeat=DEADBAND_HEARTBEAT):
+        if deadbands is None:
+            deadbands = DEADBANDS
+        self.default = parse_deadband(default)
+        self.bands = {name: parse_deadband(value) for name, value in deadbands.items()}
+        self.heartbeat = heartbeat
+        self.published = {}  # Último valor publicado de cada registro
+        self.values_in = 0
+        self.values_out = 0
+        self._next_full = None
+
+    def reset(self):
+        """Esquece os valores publicados; a próxima chamada retorna o estado completo"""
+        self.published.clear()
+        self._next_full = None
+
+    def changes(self, readings, now=None):
+        if now is None:
+            now = time.monotonic()
+        self.values_in += len(readings)
+
+        if self._next_full is None or (self.heartbeat and now >= self._next_full):
+            self.published.update(readings)
+            self._next_full = now + self.heartbeat
+            self.values_out += len(self.published)
+            return dict(self.published)
+
+        changed = {}
+        published = self.published
+        for name, value in readings.items():
+            last = published.get(name)
+            if value is None or last is None:
+                if value is last and name in published:
+                    continue
+            else:
+                absolute, relative = self.bands.get(name, self.default)
+                delta = abs(value - last)
+                if delta == 0 or delta < absolute or delta < relative * abs(last):
+                    continue
+            changed[name] = value
+        if changed:
+            published.update(changed)
+            self.values_out += len(changed)
+        return changed
+
+    def suppression(self):
+        """Fração dos valores recebidos que não foi repassada"""
+        return 1 - self.values_out / self.values_in if self.values_in else 0.0
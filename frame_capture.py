@@ -0,0 +1,311 @@
+# frame_capture.py
+"""Captura de quadros RTU brutos e reprodução determinística.
+
+Arquivo de captura: cabeçalho de 8 bytes ('TPSF', versão u16, reservado)
+seguido de um registro por quadro (little-endian):
+
+    f64 timestamp monotônico   u8 direção (0 = enviado, 1 = recebido, 2 = ciclo)
+    u8 CRC (0 = ok, 1 = inválido, 2 = resposta incompleta)   u16 tamanho   bytes
+
+Os registros de ciclo (sem bytes) marcam o instante usado pelo agendador do
+ModbusClient em cada ciclo com requisições; a reprodução os usa como relógio.
+
+    recorder = FrameRecorder('campo.tpsf')
+    modbus_client.add_packet_listener(recorder.record)
+    ...
+    recorder.close()
+
+Na reprodução, `ReplayTransport` substitui o cliente pymodbus: cada
+`read_input_registers()` é respondido com o quadro gravado, decodificado pelo
+framer RTU do pymodbus, no ritmo original multiplicado por `speed` (0: sem
+espera). Sem resposta gravada ou com CRC inválido, levanta ModbusIOException
+como um timeout real.
+
+    python frame_capture.py info campo.tpsf
+    python frame_capture.py dump campo.tpsf
+    python frame_capture.py bench campo.tpsf
+    python daemon.py --replay campo.tpsf --replay-speed 10 --interval 0.025 --output -
+"""
+import argparse
+import logging
+import struct
+import sys
+import time
+
+from pymodbus.exceptions import ModbusIOException
+from pymodbus.framer import FramerRTU
+from pymodbus.pdu import DecodePDU
+
+try:
+    from config import CAPTURE_BUFFER_SIZE, RETRIES
+    from read_planner import ReadBlock, block_members
+    import modbus_frames as frames
+except ImportError:
+    from .config import CAPTURE_BUFFER_SIZE, RETRIES
+    from .read_planner import ReadBlock, block_members
+    from . import modbus_frames as frames
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TPSF'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sH2x')
+RECORD = struct.Struct('<dBBH')
+
+SENT = 0
+RECEIVED = 1
+POLL = 2
+
+CRC_OK = 0
+CRC_BAD = 1
+CRC_INCOMPLETE = 2
+
+
+class FrameRecorder:
+    """Grava quadros em arquivo de captura; `record()` segue a assinatura dos ouvintes de pacotes do ModbusClient"""
+
+    def __init__(self, path, buffer_size=CAPTURE_BUFFER_SIZE):
+        self.path = path
+        self.frames = 0
+        self.file = open(path, 'wb', buffering=buffer_size)
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        logger.info(f"Capturando quadros RTU em {path}")
+
+    def record(self, timestamp, sending, frame, crc_ok):
+        if sending is None:
+            direction, crc = POLL, CRC_OK
+        else:
+            direction = SENT if sending else RECEIVED
+            if crc_ok is None:
+                crc = CRC_INCOMPLETE
+            else:
+                crc = CRC_OK if crc_ok else CRC_BAD
+        self.file.write(RECORD.pack(timestamp, direction, crc, len(frame)))
+        self.file.write(frame)
+        self.frames += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            logger.info(f"Captura encerrada: {self.frames} quadros em {self.path}")
+
+
+def read_capture(path):
+    """Gera (timestamp, direção, crc, quadro) para cada registro; ignora um registro final truncado"""
+    with open(path, 'rb') as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError(f"{path} não é um arquivo de captura")
+        magic, version = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} não é uma captura TPS v{VERSION}")
+        while True:
+            record = f.read(RECORD.size)
+            if len(record) < RECORD.size:
+                return
+            timestamp, direction, crc, length = RECORD.unpack(record)
+            frame = f.read(length)
+            if len(frame) < length:
+                return  # Captura interrompida no meio de um registro
+            yield timestamp, direction, crc, frame
+
+
+def read_exchanges(path):
+    """Agrupa a captura em trocas.
+
+    Lista de (timestamp, requisição, timestamp da resposta, resposta ou None,
+    instante do ciclo ou None se a requisição veio fora de um ciclo).
+    """
+    exchanges = []
+    poll_at = None
+    for timestamp, direction, crc, frame in read_capture(path):
+        if direction == POLL:
+            poll_at = timestamp
+        elif direction == SENT:
+            exchanges.append([timestamp, frame, None, None, poll_at])
+        elif exchanges and exchanges[-1][3] is None:
+            exchanges[-1][2] = timestamp
+            exchanges[-1][3] = frame
+    return exchanges
+
+
+class ReplayTransport:
+    """Substituto do cliente pymodbus que responde com os quadros de uma captura.
+
+    Cada requisição é atendida pela próxima troca gravada com o mesmo escravo,
+    endereço e quantidade; trocas diferentes são puladas (contadas em
+    `skipped`). Uma troca sem resposta válida seguida da mesma requisição é
+    uma nova tentativa do pymodbus (até `retries`, o valor usado na gravação)
+    e pertence à mesma chamada.
+
+    `clock()` é o instante, na captura, do ciclo da próxima requisição (ou da
+    falha recém-ocorrida, até o ModbusClient registrá-la): o ModbusClient o usa
+    no agendador e no disjuntor, de modo que pede os mesmos blocos da sessão
+    original em qualquer velocidade. Após a última troca, `finished` fica True
+    e novas requisições levantam ModbusIOException.
+    """
+
+    def __init__(self, path, speed=1.0, trace_packet=None, retries=RETRIES):
+        self.path = path
+        self.speed = speed
+        self.trace_packet = trace_packet
+        self.retries = retries
+        self.exchanges = read_exchanges(path)
+        self.position = 0
+        self.skipped = 0
+        self.connected = False
+        self.finished = not self.exchanges
+        self.framer = FramerRTU(DecodePDU(False))
+        self._failed_at = None
+        self._origin = None  # (instante da captura, instante da reprodução) da primeira troca
+
+    def clock(self):
+        if self._failed_at is not None:
+            failed_at, self._failed_at = self._failed_at, None
+            return failed_at
+        if self.position < len(self.exchanges):
+            sent_at, _, _, _, poll_at = self.exchanges[self.position]
+            return sent_at if poll_at is None else poll_at
+        return self.exchanges[-1][0] if self.exchanges else 0.0
+
+    def connect(self):
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def read_input_registers(self, address, count=1, slave=1):
+        request = frames.rtu_frame(slave, frames.read_registers_request(address, count))
+        self._failed_at = None
+        exchange = self._next_exchange(request)
+        if exchange is None:
+            self.finished = True
+            raise ModbusIOException(f"Fim da captura {self.path}")
+
+        attempts = 0
+        while True:
+            pdu = self._replay_exchange(*exchange[:4])
+            attempts += 1
+            if (pdu is not None or attempts > self.retries or self.position >= len(self.exchanges)
+                    or self.exchanges[self.position][1] != request):
+                break
+            exchange = self.exchanges[self.position]
+            self.position += 1
+
+        self.finished = self.position >= len(self.exchanges)
+        if pdu is None:
+            sent_at, sent, received_at, response, _ = exchange
+            self._failed_at = sent_at if received_at is None else received_at
+            if response is None:
+                raise ModbusIOException("Sem resposta (gravada na captura)")
+            raise ModbusIOException("Resposta gravada com CRC inválido ou incompleta")
+        return pdu
+
+    def _replay_exchange(self, sent_at, sent, received_at, response):
+        """Reproduz uma troca; retorna o PDU decodificado ou None"""
+        self._wait_until(sent_at)
+        if self.trace_packet:
+            self.trace_packet(True, sent)
+        if response is None:
+            return None
+        self._wait_until(received_at)
+        if self.trace_packet:
+            response = self.trace_packet(False, response)
+        used, pdu = self.framer.processIncomingFrame(response)
+        return pdu
+
+    def _next_exchange(self, request):
+        for position in range(self.position, len(self.exchanges)):
+            if self.exchanges[position][1] == request:
+                self.skipped += position - self.position
+                self.position = position + 1
+                return self.exchanges[position]
+        self.position = len(self.exchanges)
+        return None
+
+    def _wait_until(self, captured_at):
+        """Reproduz o intervalo original entre quadros, dividido por `speed`"""
+        if not self.speed:
+            return
+        now = time.monotonic()
+        if self._origin is None:
+            self._origin = (captured_at, now)
+            return
+        delay = self._origin[1] + (captured_at - self._origin[0]) / self.speed - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def summarize(path):
+    frames_total = sent = polls = crc_bad = incomplete = 0
+    first = last = None
+    for timestamp, direction, crc, frame in read_capture(path):
+        if direction == POLL:
+            polls += 1
+            continue
+        frames_total += 1
+        sent += direction == SENT
+        crc_bad += crc == CRC_BAD
+        incomplete += crc == CRC_INCOMPLETE
+        first = timestamp if first is None else first
+        last = timestamp
+    duration = (last - first) if frames_total else 0.0
+    unanswered = sum(1 for exchange in read_exchanges(path) if exchange[3] is None)
+    return {'frames': frames_total, 'polls': polls, 'requests': sent, 'unanswered': unanswered, 'crc_errors': crc_bad,
+            'incomplete': incomplete, 'duration': duration}
+
+
+def block_for(address, count):
+    """ReadBlock com os registros mapeados na faixa lida pela requisição"""
+    return ReadBlock(address, count, block_members(address, count))
+
+
+def bench_decode(path):
+    """Decodifica todas as respostas da captura (framer RTU + ReadBlock.decode); retorna (respostas, segundos)"""
+    exchanges = [(block_for(*frames.parse_read_request(request[1:-2])[1:]), response)
+                 for _, request, _, response, _ in read_exchanges(path) if response is not None]
+    framer = FramerRTU(DecodePDU(False))
+
+    started = time.perf_counter()
+    decoded = 0
+    for block, response in exchanges:
+        used, pdu = framer.processIncomingFrame(response)
+        if pdu is None or pdu.isError():
+            continue
+        block.decode(pdu.registers)
+        decoded += 1
+    return decoded, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspeciona e reproduz capturas de quadros RTU")
+    parser.add_argument('command', choices=['info', 'dump', 'bench'])
+    parser.add_argument('capture', help="Arquivo de captura (.tpsf)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        for key, value in summarize(args.capture).items():
+            print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+    elif args.command == 'dump':
+        first = None
+        for timestamp, direction, crc, frame in read_capture(args.capture):
+            first = timestamp if first is None else first
+            if direction == POLL:
+                print(f"{timestamp - first:10.4f} -- ciclo")
+                continue
+            arrow = '->' if direction == SENT else '<-'
+            status = ('', ' CRC INVÁLIDO', ' INCOMPLETO')[crc]
+            print(f"{timestamp - first:10.4f} {arrow} {frame.hex(' ')}{status}")
+    else:
+        decoded, elapsed = bench_decode(args.capture)
+        rate = decoded / elapsed if elapsed else 0.0
+        print(f"{decoded} respostas decodificadas em {elapsed * 1000:.1f}ms ({rate:.0f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# historian.py
+import glob
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+try:
+    from config import (REGISTER_MAP, HISTORIAN_DIR, HISTORIAN_FLUSH_INTERVAL, HISTORIAN_BATCH_SIZE,
+                        HISTORIAN_QUEUE_SIZE, HISTORIAN_MAX_FILE_MB, HISTORIAN_RETENTION_DAYS)
+except ImportError:
+    from .config import (REGISTER_MAP, HISTORIAN_DIR, HISTORIAN_FLUSH_INTERVAL, HISTORIAN_BATCH_SIZE,
+                         HISTORIAN_QUEUE_SIZE, HISTORIAN_MAX_FILE_MB, HISTORIAN_RETENTION_DAYS)
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = 'historico_'
+
+
+class Historian:
+    """Persistência de todas as leituras em SQLite (modo WAL), em lotes.
+
+    `append()` apenas enfileira a amostra e nunca bloqueia a aquisição; se a
+    fila estiver cheia a amostra é descartada e contada em `dropped`. Uma
+    thread própria grava os lotes em uma única transação a cada
+    `flush_interval` segundos ou `batch_size` amostras, rotaciona o arquivo
+    ao atingir `max_file_mb` e apaga arquivos mais antigos que
+    `retention_days`.
+    """
+
+    def __init__(self, directory=HISTORIAN_DIR, device='tps', flush_interval=HISTORIAN_FLUSH_INTERVAL,
+                 batch_size=HISTORIAN_BATCH_SIZE, queue_size=HISTORIAN_QUEUE_SIZE,
+                 max_file_mb=HISTORIAN_MAX_FILE_MB, retention_days=HISTORIAN_RETENTION_DAYS):
+        self.directory = directory
+        self.device = device
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_file_bytes = max_file_mb * 1024 * 1024
+        self.retention_days = retention_days
+        self.names = list(REGISTER_MAP)
+        self.dropped = 0
+        self.written = 0
+        self.path = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._db = None
+        columns = ', '.join(['ts', 'device'] + self.names)
+        placeholders = ', '.join('?' * (len(self.names) + 2))
+        self._insert_sql = f"INSERT INTO readings ({columns}) VALUES ({placeholders})"
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._writer_loop, name='historian', daemon=True)
+        self._thread.start()
+        logger.info(f"Historiador gravando em {self.directory}")
+
+    def stop(self):
+        """Grava o que estiver pendente e encerra a thread de escrita"""
+        self._stop_event.set()
+        try:
+            self._queue.put_nowait(None)  # Acorda a thread de escrita sem esperar o intervalo
+        except queue.Full:
+            pass
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def append(self, timestamp, readings, device=None):
+        try:
+            self._queue.put_nowait((timestamp, device or self.device, readings))
+        except queue.Full:
+            self.dropped += 1
+
+    def for_device(self, device):
+        """Consumidor (sink) que grava as leituras com o nome de dispositivo dado"""
+        return _DeviceSink(self, device)
+
+    def _writer_loop(self):
+        self._open_new_file()
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                timeout = max(deadline - time.monotonic(), 0)
+                try:
+                    item = self._queue.get(timeout=timeout)
+                    if item is not None:
+                        batch.append(self._row(*item))
+                except queue.Empty:
+                    pass
+
+                stopping = self._stop_event.is_set()
+                if stopping:
+                    # Drena o restante da fila antes de encerrar
+                    while True:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is not None:
+                            batch.append(self._row(*item))
+
+                if len(batch) >= self.batch_size or time.monotonic() >= deadline or stopping:
+                    if batch:
+                        self._write_batch(batch)
+                        batch = []
+                    deadline = time.monotonic() + self.flush_interval
+                    self._maintain()
+
+                if stopping:
+                    break
+        finally:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def _row(self, timestamp, device, readings):
+        return (timestamp, device) + tuple(readings.get(name) for name in self.names)
+
+    def _write_batch(self, batch):
+        try:
+            with self._db:
+                self._db.executemany(self._insert_sql, batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao gravar {len(batch)} amostras no histórico: {e}")
+
+    def _open_new_file(self):
+        if self._db:
+            self._db.close()
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        self.path = os.path.join(self.directory, f"{FILE_PREFIX}{stamp}.db")
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = ', '.join(f"{name} REAL" for name in self.names)
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS readings (ts REAL NOT NULL, device TEXT NOT NULL, {columns})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings (ts)")
+        self._db.commit()
+        logger.info(f"Novo arquivo de histórico: {self.path}")
+
+    def _maintain(self):
+        """Rotação por tamanho e retenção por idade"""
+        try:
+            size = os.path.getsize(self.path)
+            if os.path.exists(self.path + '-wal'):
+                size += os.path.getsize(self.path + '-wal')  # Páginas ainda não transferidas ao arquivo
+            if size >= self.max_file_bytes:
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._open_new_file()
+        except OSError as e:
+            logger.error(f"Erro ao verificar tamanho do histórico: {e}")
+
+        if not self.retention_days:
+            return
+        limit = time.time() - self.retention_days * 86400
+        for path in glob.glob(os.path.join(self.directory, f"{FILE_PREFIX}*.db")):
+            if path == self.path:
+                continue
+            try:
+                if os.path.getmtime(path) < limit:
+                    for suffix in ('', '-wal', '-shm'):
+                        if os.path.exists(path + suffix):
+                            os.remove(path + suffix)
+                    logger.info(f"Histórico removido por retenção: {path}")
+            except OSError as e:
+                logger.error(f"Erro ao aplicar retenção em {path}: {e}")
+
+
+class _DeviceSink:
+    def __init__(self, historian, device):
+        self.historian = historian
+        self.device = device
+
+    def append(self, timestamp, readings):
+        self.historian.append(timestamp, readings, self.device)
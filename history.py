@@ -0,0 +1,89 @@
+# history.py
+import numpy as np
+
+try:
+    from config import REGISTER_MAP, HISTORY_CAPACITY
+except ImportError:
+    from .config import REGISTER_MAP, HISTORY_CAPACITY
+
+
+class ReadingHistory:
+    """Histórico de leituras em memória, de capacidade fixa (buffer circular).
+
+    Os arrays são alocados uma única vez: `timestamps` (float64, epoch) e
+    `values` (float32, uma linha contígua por registro). Registros ausentes no
+    ciclo (leitura parcial ou erro) ficam como NaN. Quando cheio, sobrescreve
+    as amostras mais antigas.
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY, names=None):
+        self.names = list(names or REGISTER_MAP)
+        self.columns = {name: index for index, name in enumerate(self.names)}
+        self.capacity = capacity
+        self.timestamps = np.full(capacity, np.nan, dtype=np.float64)
+        self.values = np.full((len(self.names), capacity), np.nan, dtype=np.float32)
+        self.head = 0  # Próxima posição de escrita
+        self.size = 0
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def __len__(self):
+        return self.size
+
+    def append(self, timestamp, readings):
+        """Acrescenta uma amostra sem alocar memória"""
+        index = self.head
+        self.values[:, index] = np.nan
+        for name, value in readings.items():
+            column = self.columns.get(name)
+            if column is not None and value is not None:
+                self.values[column, index] = value
+        self.timestamps[index] = timestamp
+        self.head = (index + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def segments(self, count=None):
+        """Últimas `count` amostras como até dois pares (timestamps, values) de views, em ordem cronológica"""
+        if count is None or count > self.size:
+            count = self.size
+        if count <= 0:
+            return []
+        start = (self.head - count) % self.capacity
+        if start < self.head:
+            return [(self.timestamps[start:self.head], self.values[:, start:self.head])]
+        return [
+            (self.timestamps[start:], self.values[:, start:]),
+            (self.timestamps[:self.head], self.values[:, :self.head]),
+        ]
+
+    def since(self, timestamp):
+        """Views das amostras com tempo >= `timestamp`"""
+        result = []
+        for times, values in self.segments():
+            first = np.searchsorted(times, timestamp)
+            if first < len(times):
+                result.append((times[first:], values[:, first:]))
+        return result
+
+    def series(self, name, count=None):
+        """Views (timestamps, valores) de um único registro"""
+        column = self.columns[name]
+        return [(times, values[column]) for times, values in self.segments(count)]
+
+    def latest(self, count=None):
+        """Cópia contígua das últimas `count` amostras: (timestamps, values)"""
+        parts = self.segments(count)
+        if not parts:
+            return np.empty(0), np.empty((len(self.names), 0), dtype=np.float32)
+        if len(parts) == 1:
+            times, values = parts[0]
+            return times.copy(), values.copy()
+        return (np.concatenate([times for times, _ in parts]),
+                np.concatenate([values for _, values in parts], axis=1))
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
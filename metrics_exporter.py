@@ -0,0 +1,202 @@
+# metrics_exporter.py
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from config import REGISTER_MAP, METRICS_HOST, METRICS_PORT, METRICS_LATENCY_BUCKETS
+    from circuit_breaker import CLOSED, OPEN, HALF_OPEN
+except ImportError:
+    from .config import REGISTER_MAP, METRICS_HOST, METRICS_PORT, METRICS_LATENCY_BUCKETS
+    from .circuit_breaker import CLOSED, OPEN, HALF_OPEN
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Contadores do ModbusClient.stats expostos como <nome>_total
+STATS_METRICS = [
+    ('requests', 'tps_requests_total', "Requisições Modbus enviadas"),
+    ('timeouts', 'tps_timeouts_total', "Requisições sem resposta"),
+    ('exception_responses', 'tps_exception_responses_total', "Respostas de exceção Modbus"),
+    ('crc_errors', 'tps_crc_errors_total', "Respostas RTU com CRC inválido"),
+    ('errors', 'tps_errors_total', "Outros erros de comunicação"),
+]
+
+
+def escape_label(value):
+    """Valor de rótulo no formato texto do Prometheus: escapa barra invertida, aspas e quebra de linha"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _DeviceMetrics:
+    """Últimas leituras e histograma de latência de um dispositivo (sem cliente: só leituras)"""
+
+    def __init__(self, name, slave, buckets, modbus_client=None):
+        self.name = name
+        self.client = modbus_client
+        self.labels = f'device="{escape_label(name)}",slave="{escape_label(slave)}"'
+        self.readings = {}
+        self.last_update = None
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+
+    def append(self, timestamp, readings):
+        for name, value in readings.items():
+            if value is not None:
+                self.readings[name] = value
+        self.last_update = timestamp
+
+    def observe(self, elapsed):
+        self.latency_sum += elapsed
+        self.latency_count += 1
+        for index, bound in enumerate(self.buckets):
+            if elapsed <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+
+class MetricsExporter:
+    """Endpoint HTTP no formato texto do Prometheus com leituras e estatísticas de aquisição.
+
+    As métricas são renderizadas na thread de aquisição, ao fim de cada ciclo
+    (ou a cada leitura, sem laço observado), e o texto pronto substitui o
+    anterior em uma única atribuição. As requisições HTTP apenas devolvem esse
+    texto: nunca acessam o barramento nem esperam pela thread de leitura.
+
+    Dispositivos lidos em outro processo (supervisor.py) entram por
+    `add_source()`, que devolve um consumidor de leituras; para eles são
+    exportadas apenas as leituras e sua idade.
+    """
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT, buckets=METRICS_LATENCY_BUCKETS):
+        self.host = host
+        self.port = port
+        self.buckets = sorted(buckets)
+        self.devices = []
+        self.loop = None
+        self.snapshot = b''
+        self._server = None
+        self._thread = None
+
+    def add_device(self, name, modbus_client):
+        """Passa a exportar as leituras e estatísticas de `modbus_client` com o rótulo device=`name`"""
+        device = _DeviceMetrics(name, modbus_client.slave, self.buckets, modbus_client)
+        modbus_client.add_sink(_RenderingSink(self, device))
+        modbus_client.add_request_listener(device.observe)
+        self.devices.append(device)
+        self.render()
+
+    def add_source(self, name, slave):
+        """Dispositivo sem ModbusClient local; retorna o consumidor `append(timestamp, leituras)` a alimentar"""
+        device = _DeviceMetrics(name, slave, self.buckets)
+        self.devices.append(device)
+        self.render()
+        return _RenderingSink(self, device)
+
+    def observe_loop(self, loop):
+        """Renderiza ao fim de cada ciclo do AcquisitionLoop e exporta suas estatísticas"""
+        self.loop = loop
+        loop.add_cycle_listener(lambda duration: self.render())
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.snapshot
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+        logger.info(f"Métricas em http://{self.host}:{self._server.server_address[1]}/metrics")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def render(self):
+        lines = []
+        now = time.time()
+
+        lines += ["# HELP tps_reading Último valor lido de cada registro (em escala)",
+                  "# TYPE tps_reading gauge"]
+        for device in self.devices:
+            for name in REGISTER_MAP:
+                value = device.readings.get(name)
+                if value is not None:
+                    lines.append(f'tps_reading{{{device.labels},register="{escape_label(name)}"}} {value}')
+
+        lines += ["# HELP tps_reading_age_seconds Tempo desde a última leitura recebida",
+                  "# TYPE tps_reading_age_seconds gauge"]
+        for device in self.devices:
+            if device.last_update is not None:
+                lines.append(f'tps_reading_age_seconds{{{device.labels}}} {now - device.last_update:.3f}')
+
+        lines += ["# HELP tps_link_state Estado do disjuntor de comunicação (1 no estado atual)",
+                  "# TYPE tps_link_state gauge"]
+        clients = [device for device in self.devices if device.client is not None]
+        for device in clients:
+            for state in (CLOSED, OPEN, HALF_OPEN):
+                active = 1 if device.client.breaker.state == state else 0
+                lines.append(f'tps_link_state{{{device.labels},state="{state}"}} {active}')
+
+        for key, metric, description in STATS_METRICS:
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+            for device in clients:
+                lines.append(f'{metric}{{{device.labels}}} {device.client.stats[key]}')
+
+        lines += ["# HELP tps_request_duration_seconds Tempo de resposta das requisições Modbus",
+                  "# TYPE tps_request_duration_seconds histogram"]
+        for device in clients:
+            cumulative = 0
+            for bound, count in zip(device.buckets, device.bucket_counts):
+                cumulative += count
+                lines.append(f'tps_request_duration_seconds_bucket{{{device.labels},le="{bound}"}} {cumulative}')
+            lines.append(f'tps_request_duration_seconds_bucket{{{device.labels},le="+Inf"}} {device.latency_count}')
+            lines.append(f'tps_request_duration_seconds_sum{{{device.labels}}} {device.latency_sum:.6f}')
+            lines.append(f'tps_request_duration_seconds_count{{{device.labels}}} {device.latency_count}')
+
+        if self.loop is not None:
+            lines += ["# HELP tps_cycle_duration_seconds Duração do último ciclo de leitura",
+                      "# TYPE tps_cycle_duration_seconds gauge",
+                      f"tps_cycle_duration_seconds {self.loop.last_cycle_duration:.6f}",
+                      "# HELP tps_cycles_total Ciclos de leitura executados",
+                      "# TYPE tps_cycles_total counter",
+                      f"tps_cycles_total {self.loop.cycles}",
+                      "# HELP tps_skipped_cycles_total Ciclos que excederam o intervalo (leitura atrasada)",
+                      "# TYPE tps_skipped_cycles_total counter",
+                      f"tps_skipped_cycles_total {self.loop.late_cycles}"]
+
+        self.snapshot = ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _RenderingSink:
+    """Consumidor que atualiza as leituras do dispositivo; renderiza se não houver laço observado"""
+
+    def __init__(self, exporter, device):
+        self.exporter = exporter
+        self.device = device
+
+    def append(self, timestamp, readings):
+        self.device.append(timestamp, readings)
+        if self.exporter.loop is None:
+            self.exporter.render()
@@ -1,38 +1,68 @@
 from pymodbus.client import ModbusSerialClient
-from pymodbus.exceptions import ModbusException
+from pymodbus.exceptions import ModbusException, ModbusIOException, ConnectionException
+from pymodbus.pdu import ExceptionResponse
 
 try:
-    from config import REGISTER_MAP, SCALE_FACTORS, SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, PRIORITY_REGISTERS
+    from config import REGISTER_MAP, SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES, ADAPTIVE_TIMEOUT
 except ImportError:
-    from .config import REGISTER_MAP, SCALE_FACTORS, SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, PRIORITY_REGISTERS
+    from .config import REGISTER_MAP, SLAVE_ADDRESS, BAUDRATE, PARITY, STOPBITS, BYTESIZE, TIMEOUT, RETRIES, ADAPTIVE_TIMEOUT
 
+try:
+    from read_planner import plan_reads, PollScheduler
+    from circuit_breaker import CircuitBreaker
+    from adaptive_timeout import AdaptiveTimeout
+    from frame_capture import ReplayTransport
+    import modbus_frames as frames
+except ImportError:
+    from .read_planner import plan_reads, PollScheduler
+    from .circuit_breaker import CircuitBreaker
+    from .adaptive_timeout import AdaptiveTimeout
+    from .frame_capture import ReplayTransport
+    from . import modbus_frames as frames
+
+import contextlib
 import logging
+import time
 
-# Configuração de logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
 
 class ModbusClient:
-    def __init__(self):
+    def __init__(self, slave=SLAVE_ADDRESS):
         self.client = None
+        self.slave = slave
         self.connected = False
+        self.owns_client = True  # False quando o transporte é compartilhado (BusScheduler)
+        self.bus_guard = contextlib.nullcontext()
         self.last_readings = {}  # Para armazenar leituras válidas
+        self.read_plan = plan_reads()
+        self.scheduler = PollScheduler()
+        self.breaker = CircuitBreaker()
+        self.latency = AdaptiveTimeout() if ADAPTIVE_TIMEOUT else None
+        self.probe_block = plan_reads(['temperatura_bateria'])[0]
+        self.clock = time.monotonic  # Relógio do agendador e do disjuntor; na reprodução, o tempo da captura
+        self.sinks = []  # Consumidores de cada ciclo: sink.append(timestamp, leituras)
+        self.request_listeners = []  # callback(duração em s) para cada requisição respondida
+        self.packet_listeners = []  # callback(timestamp, enviado, quadro, crc_ok) para cada quadro RTU
+        self.stats = {'requests': 0, 'timeouts': 0, 'exception_responses': 0, 'crc_errors': 0, 'errors': 0}
+        self._expected_response = None  # Tamanho do quadro RTU esperado para a requisição em curso
+        self._partial_response = None  # (timestamp, bytes) de uma resposta ainda incompleta
 
-    def connect(self, port):
+    def connect(self, port, baudrate=BAUDRATE, parity=PARITY):
         try:
             logger.info(f"Conectando à porta {port}...")
             self.client = ModbusSerialClient(
                 port=port,
-                baudrate=BAUDRATE,
+                baudrate=baudrate,
                 bytesize=BYTESIZE,
-                parity=PARITY,
+                parity=parity,
                 stopbits=STOPBITS,
-                timeout=TIMEOUT
+                timeout=TIMEOUT,
+                retries=RETRIES,
+                trace_packet=self._trace_packet
             )
+            self.owns_client = True
+            self.clock = time.monotonic
             self.connected = self.client.connect()
             if self.connected:
                 logger.info("Conexão estabelecida com sucesso.")
@@ -43,12 +73,33 @@ class ModbusClient:
             logger.error(f"Erro na conexão: {e}")
             return False
 
+    def connect_replay(self, path, speed=1.0):
+        """Usa uma captura de quadros (frame_capture.py) no lugar da porta serial"""
+        logger.info(f"Reproduzindo captura {path} (velocidade {speed or 'máxima'})")
+        self.client = ReplayTransport(path, speed, trace_packet=self._trace_packet, retries=RETRIES)
+        self.owns_client = True
+        self.clock = self.client.clock
+        self.connected = self.client.connect()
+        return self.connected
+
+    def attach(self, transport, bus_guard=None):
+        """Usa um cliente pymodbus já aberto, compartilhado com outros escravos do barramento"""
+        self.client = transport
+        self.owns_client = False
+        self.clock = time.monotonic
+        self.bus_guard = bus_guard or contextlib.nullcontext()
+        self.connected = transport.connected
+
     def disconnect(self):
-        if self.client:
+        if self.client and self.owns_client:
             self.client.close()
             logger.info("Desconectado.")
         self.connected = False
         self.last_readings.clear()  # Limpa cache ao desconectar
+        self.scheduler.reset()
+        self.breaker.reset()
+        if self.latency:
+            self.latency.reset()
 
     def test_connection(self):
         if not self.connected:
@@ -58,11 +109,12 @@ class ModbusClient:
             # Testa com um endereço que sabemos existir (temperatura da bateria)
             address = REGISTER_MAP['temperatura_bateria']
             logger.debug(f"Testando conexão lendo endereço: {address}")
-            response = self.client.read_input_registers(
-                address=address,
-                count=1,
-                slave=SLAVE_ADDRESS
-            )
+            with self.bus_guard:
+                response = self.client.read_input_registers(
+                    address=address,
+                    count=1,
+                    slave=self.slave
+                )
 
             if response.isError():
                 logger.error(f"Teste de conexão falhou: {response}")
@@ -73,57 +125,237 @@ class ModbusClient:
             return False
 
     def read_all(self):
+        """Lê todos os registros, independentemente do período de cada um"""
+        if not self.connected or not self.client:
+            logger.warning("Tentativa de leitura sem conexão.")
+            return None
+
+        now = self.clock()
+        self._notify_packet(now, None, b'', None)
+        results = self._read_blocks(self.read_plan)
+        self.scheduler.mark_read(results, now)
+        self._publish(results)
+        return results
+
+    def poll(self):
+        """Lê apenas os registros vencidos segundo o período de cada um"""
         if not self.connected or not self.client:
             logger.warning("Tentativa de leitura sem conexão.")
             return None
 
+        now = self.clock()
+        blocks = self.scheduler.due_blocks(now)
+        if blocks:
+            self._notify_packet(now, None, b'', None)  # Instante do ciclo, relógio da reprodução
+        results = self._read_blocks(blocks)
+        self.scheduler.mark_read(results, now)
+        self._publish(results)
+        return results
+
+    def next_poll_time(self):
+        """Instante (monotônico) em que há leitura ou sondagem a fazer"""
+        deadline = self.scheduler.next_deadline()
+        if not self.breaker.allows_requests():
+            deadline = max(deadline, self.breaker.next_probe)
+        return deadline
+
+    def add_sink(self, sink):
+        """Registra um consumidor chamado como `sink.append(timestamp, leituras)` após cada ciclo"""
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def _publish(self, results):
+        if not results:
+            return
+        timestamp = time.time()
+        for sink in self.sinks:
+            try:
+                sink.append(timestamp, results)
+            except Exception as e:
+                logger.error(f"Erro no consumidor {type(sink).__name__}: {e}")
+
+    def add_request_listener(self, callback):
+        """Registra `callback(duração)` chamado com o tempo de cada requisição respondida"""
+        self.request_listeners.append(callback)
+
+    def remove_request_listener(self, callback):
+        if callback in self.request_listeners:
+            self.request_listeners.remove(callback)
+
+    def add_packet_listener(self, callback):
+        """Registra `callback(timestamp, enviado, quadro, crc_ok)` para cada quadro RTU.
+
+        crc_ok None: resposta incompleta. enviado None (quadro vazio): início de
+        um ciclo com requisições, no instante usado pelo agendador.
+        """
+        self.packet_listeners.append(callback)
+
+    def remove_packet_listener(self, callback):
+        if callback in self.packet_listeners:
+            self.packet_listeners.remove(callback)
+
+    def _trace_packet(self, sending, data):
+        """Observa os quadros RTU brutos para contar respostas com CRC inválido e repassá-los aos ouvintes"""
+        if sending:
+            if self._partial_response:
+                # A resposta anterior não se completou antes do timeout
+                self._notify_packet(self._partial_response[0], False, self._partial_response[1], None)
+                self._partial_response = None
+            try:
+                self._expected_response = frames.rtu_response_length(data[1:-2])
+            except ValueError:
+                self._expected_response = None
+            self._notify_packet(time.monotonic(), True, data, True)
+        elif self._expected_response and data:
+            # Resposta de exceção tem 5 bytes; a normal, o tamanho calculado no envio
+            length = 5 if len(data) > 1 and data[1] & 0x80 else self._expected_response
+            if len(data) >= length:
+                frame = data[:length]
+                crc_ok = frames.check_crc(frame)
+                if not crc_ok:
+                    self.stats['crc_errors'] += 1
+                    logger.warning(f"Resposta com CRC inválido: {frame.hex()}")
+                self._expected_response = None
+                self._partial_response = None
+                self._notify_packet(time.monotonic(), False, frame, crc_ok)
+            elif self.packet_listeners:
+                self._partial_response = (time.monotonic(), bytes(data))
+        return data
+
+    def _notify_packet(self, timestamp, sending, frame, crc_ok):
+        for callback in self.packet_listeners:
+            try:
+                callback(timestamp, sending, frame, crc_ok)
+            except Exception as e:
+                logger.error(f"Erro no ouvinte de quadros: {e}")
+
+    def add_state_listener(self, callback):
+        """Registra `callback(estado_anterior, novo_estado)` para o disjuntor de comunicação"""
+        self.breaker.add_listener(callback)
+
+    def remove_state_listener(self, callback):
+        self.breaker.remove_listener(callback)
+
+    def _read_blocks(self, blocks):
         results = {}
         error_count = 0
-        
-        # Leitura prioritária primeiro
-        priority_items = [(name, REGISTER_MAP[name]) for name in PRIORITY_REGISTERS if name in REGISTER_MAP]
-        other_items = [(name, address) for name, address in REGISTER_MAP.items() if name not in PRIORITY_REGISTERS]
-        
-        # Combina prioritários + demais
-        all_items = priority_items + other_items
-        
-        for name, address in all_items:
-            try:
-                logger.debug(f"Lendo {name} no endereço {address}")
-                response = self.client.read_input_registers(
-                    address=address,
-                    count=1,
-                    slave=SLAVE_ADDRESS
-                )
 
-                if response.isError():
-                    logger.warning(f"Erro na leitura de {name}: {response}")
-                    results[name] = None
+        if not self.breaker.allows_requests() and blocks:
+            # Dispositivo sem resposta: apenas uma sondagem barata, com backoff
+            if not self.breaker.probe_due(self.clock()):
+                return dict.fromkeys(name for block in blocks for name in block.register_names())
+            self.breaker.begin_probe()
+            probe_results = self._read_block(self.probe_block)
+            if not self.breaker.allows_requests():
+                results.update(dict.fromkeys(name for block in blocks for name in block.register_names()))
+                results.update(probe_results)
+                return results
+            logger.info("Dispositivo voltou a responder, retomando leitura completa")
+
+        for block in blocks:
+            if not self.breaker.allows_requests():
+                # Disjuntor aberto no meio do ciclo: não espera pelos demais timeouts
+                block_results = dict.fromkeys(block.register_names())
+            else:
+                block_results = self._read_block(block)
+            for name, value in block_results.items():
+                results[name] = value
+                if value is None:
                     error_count += 1
                 else:
-                    raw_value = response.registers[0]
-                    factor = SCALE_FACTORS.get(name, 1)
-                    value = raw_value / factor
-                    results[name] = value
                     self.last_readings[name] = value  # Atualiza cache
-                    logger.debug(f"{name}: {raw_value} -> {value} (fator: {factor})")
-
-            except ModbusException as e:
-                logger.error(f"Exceção Modbus em {name}: {e}")
-                results[name] = None
-                error_count += 1
-            except Exception as e:
-                logger.error(f"Erro inesperado em {name}: {e}")
-                results[name] = None
-                error_count += 1
 
         # Se todos os registros falharam, limpa o cache (dispositivo provavelmente desligado)
-        if error_count == len(REGISTER_MAP):
+        if results and error_count == len(results):
             logger.warning("Todos os registros falharam - dispositivo pode estar desligado")
             self.last_readings.clear()
 
         return results
 
+    def _read_block(self, block):
+        """Lê um bloco de registros em uma única requisição FC 0x04"""
+        names = block.register_names()
+        try:
+            logger.debug(f"Lendo bloco {block.start}-{block.start + block.count - 1} ({len(names)} registros)")
+            self.stats['requests'] += 1
+            with self.bus_guard:
+                self._apply_timeout()
+                start_time = time.perf_counter()
+                response = self.client.read_input_registers(
+                    address=block.start,
+                    count=block.count,
+                    slave=self.slave
+                )
+                elapsed = time.perf_counter() - start_time
+
+            if isinstance(response, ModbusIOException):
+                # Versões antigas do pymodbus retornam o timeout em vez de levantá-lo
+                self._record_timeout()
+                logger.warning(f"Sem resposta no bloco {block.start}: {response}")
+                return dict.fromkeys(names)
+
+            # Qualquer resposta, mesmo de exceção, indica dispositivo presente
+            self.breaker.record_success()
+            if self.latency:
+                self.latency.record(elapsed)
+            for callback in self.request_listeners:
+                callback(elapsed)
+
+            if response.isError():
+                if isinstance(response, ExceptionResponse):
+                    self.stats['exception_responses'] += 1
+                if isinstance(response, ExceptionResponse) and len(names) > 1:
+                    # O dispositivo respondeu, mas recusou a faixa (ex.: endereço não implementado no buraco)
+                    logger.warning(f"Bloco {block.start} recusado ({response}), lendo registros individualmente")
+                    return self._read_individually(block)
+                logger.warning(f"Erro na leitura do bloco {block.start}: {response}")
+                return dict.fromkeys(names)
+
+            values = block.decode(response.registers)
+            logger.debug(f"Bloco {block.start}: {response.registers} -> {values}")
+            return values
+
+        except (ModbusIOException, ConnectionException) as e:
+            self._record_timeout()
+            logger.error(f"Sem resposta no bloco {block.start}: {e}")
+        except ModbusException as e:
+            self.stats['errors'] += 1
+            logger.error(f"Exceção Modbus no bloco {block.start}: {e}")
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Erro inesperado no bloco {block.start}: {e}")
+        return dict.fromkeys(names)
+
+    def _record_timeout(self):
+        self.stats['timeouts'] += 1
+        self.breaker.record_failure(self.clock())
+        if self.latency:
+            self.latency.record_timeout()
+
+    def _apply_timeout(self):
+        """Aplica o timeout adaptativo ao cliente pymodbus antes de cada requisição"""
+        if not self.latency:
+            return
+        timeout = self.latency.timeout
+        comm_params = getattr(self.client, 'comm_params', None)
+        if comm_params is not None and comm_params.timeout_connect != timeout:
+            comm_params.timeout_connect = timeout
+            socket = getattr(self.client, 'socket', None)
+            if hasattr(socket, 'settimeout'):
+                socket.settimeout(timeout)  # Socket TCP: atributo timeout é somente leitura
+            elif socket is not None:
+                socket.timeout = timeout  # pyserial
+            logger.debug(f"Timeout efetivo ajustado para {timeout * 1000:.1f}ms")
+
+    def _read_individually(self, block):
+        results = {}
+        for name in block.register_names():
+            results.update(self._read_block(plan_reads([name])[0]))
+        return results
+
     def __del__(self):
         """Destrutor para garantir desconexão segura"""
         self.disconnect()
\ No newline at end of file
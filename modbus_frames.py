@@ -0,0 +1,107 @@
+# modbus_frames.py
+import struct
+
+READ_INPUT_REGISTERS = 0x04
+MAX_PDU_SIZE = 253  # Limite do protocolo (256 bytes do ADU RTU - endereço - CRC)
+
+# Códigos de exceção Modbus
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+GATEWAY_TARGET_FAILED = 0x0B
+
+
+def _build_crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _build_crc_table()
+
+
+def crc16(data):
+    """CRC-16/MODBUS de `data`"""
+    crc = 0xFFFF
+    for byte in data:
+        crc = (crc >> 8) ^ _CRC_TABLE[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def add_crc(frame):
+    return frame + struct.pack('<H', crc16(frame))
+
+
+def check_crc(frame):
+    """True se os dois últimos bytes de `frame` são o CRC correto"""
+    if len(frame) < 4:
+        return False
+    return crc16(frame[:-2]) == struct.unpack('<H', frame[-2:])[0]
+
+
+def read_registers_request(address, count, function=READ_INPUT_REGISTERS):
+    """PDU de leitura de registros (FC 0x03/0x04)"""
+    return struct.pack('>BHH', function, address, count)
+
+
+def parse_read_request(pdu):
+    """Retorna (função, endereço, quantidade) de um PDU de leitura"""
+    if len(pdu) != 5:
+        raise ValueError(f"PDU de leitura com tamanho inválido: {len(pdu)}")
+    return struct.unpack('>BHH', pdu)
+
+
+def read_registers_response(registers, function=READ_INPUT_REGISTERS):
+    """PDU de resposta com os valores dos registros"""
+    return struct.pack(f'>BB{len(registers)}H', function, 2 * len(registers), *registers)
+
+
+def parse_read_response(pdu):
+    """Retorna a lista de registros de um PDU de resposta; levanta ValueError se for exceção"""
+    if not pdu or pdu[0] & 0x80:
+        code = pdu[1] if len(pdu) > 1 else None
+        raise ValueError(f"Resposta de exceção (código {code})")
+    byte_count = pdu[1]
+    if len(pdu) != 2 + byte_count or byte_count % 2:
+        raise ValueError("Resposta com tamanho inválido")
+    return list(struct.unpack(f'>{byte_count // 2}H', pdu[2:]))
+
+
+def exception_response(function, code):
+    return struct.pack('>BB', function | 0x80, code)
+
+
+def rtu_frame(slave, pdu):
+    """Quadro RTU completo: endereço + PDU + CRC"""
+    return add_crc(bytes([slave]) + pdu)
+
+
+def parse_rtu_frame(frame):
+    """Retorna (escravo, PDU) de um quadro RTU; levanta ValueError se o CRC não confere"""
+    if not check_crc(frame):
+        raise ValueError("CRC inválido")
+    return frame[0], frame[1:-2]
+
+
+def rtu_response_length(pdu_request):
+    """Tamanho esperado do quadro de resposta RTU a uma leitura de `count` registros"""
+    _, _, count = parse_read_request(pdu_request)
+    return 1 + 2 + 2 * count + 2
+
+
+def mbap_frame(transaction_id, unit, pdu):
+    """Quadro Modbus TCP: cabeçalho MBAP + PDU"""
+    return struct.pack('>HHHB', transaction_id, 0, len(pdu) + 1, unit) + pdu
+
+
+def parse_mbap_header(header):
+    """Retorna (transação, protocolo, tamanho restante, unidade) dos 7 bytes do MBAP"""
+    transaction_id, protocol, length, unit = struct.unpack('>HHHB', header)
+    return transaction_id, protocol, length - 1, unit
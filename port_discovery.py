@@ -0,0 +1,204 @@
+# port_discovery.py
+"""Descoberta automática de porta serial, baud rate, paridade e escravo.
+
+Uma thread por porta envia leituras FC 0x04 do registro da temperatura da
+bateria (76) com timeout curto, percorrendo DISCOVERY_BAUDRATES x
+DISCOVERY_PARITIES e os escravos candidatos (primeiro os de BUS_SLAVES, depois
+1-247). Só conta como dispositivo uma resposta com CRC válido vinda do escravo
+consultado; cada porta para na primeira resposta.
+
+    python port_discovery.py                          # Todas as portas do sistema
+    python port_discovery.py /dev/ttyUSB0 /dev/ttyUSB1 --slaves 30 31
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+
+import serial
+import serial.tools.list_ports
+
+try:
+    from config import (REGISTER_MAP, BUS_SLAVES, BYTESIZE, STOPBITS, DISCOVERY_BAUDRATES,
+                        DISCOVERY_PARITIES, DISCOVERY_TIMEOUT)
+    from bus_scheduler import inter_frame_delay
+    import modbus_frames as frames
+except ImportError:
+    from .config import (REGISTER_MAP, BUS_SLAVES, BYTESIZE, STOPBITS, DISCOVERY_BAUDRATES,
+                         DISCOVERY_PARITIES, DISCOVERY_TIMEOUT)
+    from .bus_scheduler import inter_frame_delay
+    from . import modbus_frames as frames
+
+logger = logging.getLogger(__name__)
+
+PROBE_ADDRESS = REGISTER_MAP['temperatura_bateria']
+EXCEPTION_FRAME_LENGTH = 5  # Escravo + função | 0x80 + código + CRC
+
+
+class DiscoveredDevice:
+    """Combinação porta/baud rate/paridade/escravo que respondeu à sondagem"""
+
+    def __init__(self, port, baudrate, parity, slave, raw_value, elapsed):
+        self.port = port
+        self.baudrate = baudrate
+        self.parity = parity
+        self.slave = slave
+        self.raw_value = raw_value  # None se o escravo respondeu com exceção
+        self.elapsed = elapsed      # Tempo de resposta da sondagem (s)
+
+    def __repr__(self):
+        return (f"DiscoveredDevice({self.port}, {self.baudrate} {BYTESIZE}{self.parity}{STOPBITS}, "
+                f"escravo {self.slave}, {self.elapsed * 1000:.1f}ms)")
+
+
+def candidate_slaves(preferred=None):
+    """Escravos na ordem de sondagem: os preferidos primeiro, depois o restante de 1-247"""
+    preferred = list(preferred if preferred is not None else BUS_SLAVES)
+    return preferred + [slave for slave in range(1, 248) if slave not in preferred]
+
+
+def probe(port, slave, address=PROBE_ADDRESS):
+    """Uma sondagem FC 0x04 em uma porta pyserial já configurada.
+
+    Retorna (valor bruto ou None se exceção, tempo de resposta) para uma
+    resposta válida do escravo, ou None sem resposta válida.
+    """
+    pdu = frames.read_registers_request(address, 1)
+    expected = frames.rtu_response_length(pdu)
+    port.reset_input_buffer()  # Descarta ruído e respostas atrasadas da sondagem anterior
+    started = time.perf_counter()
+    port.write(frames.rtu_frame(slave, pdu))
+    frame = port.read(expected)
+    elapsed = time.perf_counter() - started
+
+    if len(frame) >= EXCEPTION_FRAME_LENGTH and frame[1] == frames.READ_INPUT_REGISTERS | 0x80:
+        frame = frame[:EXCEPTION_FRAME_LENGTH]
+    if len(frame) < EXCEPTION_FRAME_LENGTH or not frames.check_crc(frame) or frame[0] != slave:
+        return None
+    try:
+        registers = frames.parse_read_response(frame[1:-2])
+    except ValueError:
+        return None, elapsed  # Exceção Modbus: o escravo existe, mas recusou o registro
+    return registers[0], elapsed
+
+
+class PortDiscovery:
+    """Sonda várias portas em paralelo, uma thread por porta.
+
+    `run()` bloqueia até todas as portas terminarem (ou `stop()`) e retorna os
+    dispositivos encontrados; cada um também é entregue a `callback(dispositivo)`
+    assim que responde, na thread da porta. Com `stop_on_first`, a primeira
+    resposta em qualquer porta encerra todas.
+    """
+
+    def __init__(self, ports=None, baudrates=DISCOVERY_BAUDRATES, parities=DISCOVERY_PARITIES,
+                 slaves=None, timeout=DISCOVERY_TIMEOUT, stop_on_first=False):
+        if ports is None:
+            ports = [port.device for port in serial.tools.list_ports.comports()]
+        self.ports = list(ports)
+        self.baudrates = baudrates
+        self.parities = parities
+        preferred = list(slaves if slaves is not None else BUS_SLAVES)
+        # Primeiro os escravos preferidos em todas as configurações, depois a varredura completa
+        self.slave_groups = [preferred, [slave for slave in candidate_slaves(preferred) if slave not in preferred]]
+        self.timeout = timeout
+        self.stop_on_first = stop_on_first
+        self.devices = []
+        self.probes = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def run(self):
+        self._stop_event.clear()
+        started = time.monotonic()
+        threads = [threading.Thread(target=self._scan_port, args=(port,), name=f'discovery-{port}', daemon=True)
+                   for port in self.ports]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.info(f"Descoberta concluída em {time.monotonic() - started:.1f}s: "
+                    f"{len(self.devices)} dispositivo(s), {self.probes} sondagens em {len(self.ports)} porta(s)")
+        return list(self.devices)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _scan_port(self, name):
+        try:
+            port = serial.Serial(name, bytesize=BYTESIZE, stopbits=STOPBITS, timeout=self.timeout)
+        except (serial.SerialException, OSError) as e:
+            logger.warning(f"Porta {name} indisponível para descoberta: {e}")
+            return
+
+        try:
+            for slaves in self.slave_groups:
+                for baudrate in self.baudrates:
+                    for parity in self.parities:
+                        try:
+                            port.baudrate = baudrate
+                            port.parity = parity
+                        except Exception as e:
+                            # Adaptadores (e pseudo-terminais) podem recusar algumas combinações
+                            logger.debug(f"{name} não aceita {baudrate} baud, paridade {parity}: {e}")
+                            continue
+                        gap = inter_frame_delay(baudrate, parity=parity)
+                        for slave in slaves:
+                            if self._stop_event.is_set():
+                                return
+                            time.sleep(gap)
+                            with self._lock:
+                                self.probes += 1
+                            result = probe(port, slave)
+                            if result is not None:
+                                self._found(DiscoveredDevice(name, baudrate, parity, slave, *result))
+                                return
+            logger.info(f"Nenhum dispositivo respondeu em {name}")
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"Erro na descoberta em {name}: {e}")
+        finally:
+            port.close()
+
+    def _found(self, device):
+        logger.info(f"Dispositivo encontrado: {device}")
+        with self._lock:
+            self.devices.append(device)
+        if self.stop_on_first:
+            self._stop_event.set()
+        for callback in self._listeners:
+            callback(device)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descobre porta, baud rate e escravo dos TPS conectados")
+    parser.add_argument('ports', nargs='*', help="Portas a sondar (padrão: todas as portas seriais)")
+    parser.add_argument('--slaves', type=int, nargs='+', help="Escravos sondados primeiro (padrão: BUS_SLAVES)")
+    parser.add_argument('--baudrates', type=int, nargs='+', default=DISCOVERY_BAUDRATES)
+    parser.add_argument('--timeout', type=float, default=DISCOVERY_TIMEOUT, help="Espera por resposta (s)")
+    parser.add_argument('--first', action='store_true', help="Para na primeira resposta em qualquer porta")
+    args = parser.parse_args(argv)
+
+    discovery = PortDiscovery(args.ports or None, baudrates=args.baudrates, slaves=args.slaves,
+                              timeout=args.timeout, stop_on_first=args.first)
+    if not discovery.ports:
+        print("Nenhuma porta serial encontrada.")
+        return 1
+    try:
+        devices = discovery.run()
+    except KeyboardInterrupt:
+        discovery.stop()
+        return 130
+    for device in devices:
+        print(f"{device.port}: escravo {device.slave}, {device.baudrate} baud, "
+              f"{BYTESIZE}{device.parity}{STOPBITS} ({device.elapsed * 1000:.1f}ms)")
+    return 0 if devices else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main())
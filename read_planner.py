@@ -0,0 +1,130 @@
+# read_planner.py
+try:
+    from config import REGISTER_MAP, READ_GAP_TOLERANCE, MAX_REGISTERS_PER_READ, POLL_PERIODS, DEFAULT_POLL_PERIOD
+    from register_schema import REGISTERS, compile_block
+except ImportError:
+    from .config import REGISTER_MAP, READ_GAP_TOLERANCE, MAX_REGISTERS_PER_READ, POLL_PERIODS, DEFAULT_POLL_PERIOD
+    from .register_schema import REGISTERS, compile_block
+
+
+class ReadBlock:
+    """Faixa contígua de registros lida em uma única requisição FC 0x04"""
+
+    def __init__(self, start, count, names):
+        self.start = start
+        self.count = count
+        self.names = names  # Lista de (nome, deslocamento dentro do bloco)
+        self._plan = None
+
+    def decode(self, registers):
+        """Converte a resposta do bloco em valores nomeados e escalados (plano compilado do esquema)"""
+        if self._plan is None:
+            self._plan = compile_block(self.count, tuple(self.names))
+        return self._plan.decode(registers)
+
+    def register_names(self):
+        return [name for name, _ in self.names]
+
+    def __repr__(self):
+        return f"ReadBlock(start={self.start}, count={self.count}, names={self.register_names()})"
+
+
+def raw_value(name, value):
+    """Inverso de ReadBlock.decode: valor bruto do registro a partir do valor em escala"""
+    return REGISTERS[name].raw_value(value)
+
+
+def block_members(start, count, names=None):
+    """(nome, deslocamento) dos registros inteiramente contidos na faixa"""
+    if names is None:
+        names = REGISTERS.keys()
+    end = start + count
+    return [(name, REGISTERS[name].address - start) for name in names
+            if start <= REGISTERS[name].address and REGISTERS[name].end < end]
+
+
+def plan_reads(names=None, gap_tolerance=READ_GAP_TOLERANCE, max_registers=MAX_REGISTERS_PER_READ):
+    """Agrupa os registros no menor conjunto de leituras em bloco.
+
+    Registros separados por até `gap_tolerance` endereços não mapeados são lidos
+    na mesma requisição, desde que o bloco não ultrapasse `max_registers`.
+    """
+    if names is None:
+        names = REGISTER_MAP.keys()
+
+    items = sorted((REGISTERS[name].address, REGISTERS[name].end, name) for name in names if name in REGISTERS)
+    blocks = []
+    start = None
+    end = None
+    members = []
+
+    for address, last, name in items:
+        if start is not None:
+            gap = address - end - 1
+            if gap <= gap_tolerance and last - start + 1 <= max_registers:
+                end = max(end, last)
+                members.append((name, address - start))
+                continue
+            blocks.append(ReadBlock(start, end - start + 1, members))
+
+        start = address
+        end = last
+        members = [(name, 0)]
+
+    if start is not None:
+        blocks.append(ReadBlock(start, end - start + 1, members))
+
+    return blocks
+
+
+class PollScheduler:
+    """Escalonador de leituras por período de cada registro.
+
+    A cada ciclo monta os blocos apenas com os registros vencidos. Registros
+    ainda não vencidos cujo endereço cai dentro de um bloco são lidos de carona,
+    sem custo extra de transação.
+
+    O próximo prazo avança a partir do prazo anterior, não do instante da
+    leitura: com período igual ao intervalo do laço, o registro é lido em todo
+    ciclo, mesmo que o ciclo acorde um pouco antes ou depois do prazo
+    (`tolerance`, fração do período).
+    """
+
+    tolerance = 0.1
+
+    def __init__(self, periods=None, gap_tolerance=READ_GAP_TOLERANCE, max_registers=MAX_REGISTERS_PER_READ):
+        if periods is None:
+            periods = POLL_PERIODS
+        self.periods = {name: periods.get(name, DEFAULT_POLL_PERIOD) for name in REGISTER_MAP}
+        self.gap_tolerance = gap_tolerance
+        self.max_registers = max_registers
+        self.next_due = dict.fromkeys(self.periods, 0.0)
+
+    def due_blocks(self, now):
+        """Retorna os blocos a ler no instante `now` (relógio monotônico)"""
+        due = [name for name, deadline in self.next_due.items()
+               if deadline <= now + self.periods[name] * self.tolerance]
+        if not due:
+            return []
+        blocks = plan_reads(due, self.gap_tolerance, self.max_registers)
+        return [self._with_passengers(block) for block in blocks]
+
+    def mark_read(self, names, now):
+        for name in names:
+            period = self.periods[name]
+            deadline = self.next_due[name]
+            if deadline > now + period * self.tolerance or deadline + period <= now:
+                # Lido de carona, ou atrasado um período inteiro: recomeça a partir da leitura
+                self.next_due[name] = now + period
+            else:
+                self.next_due[name] = deadline + period
+
+    def next_deadline(self):
+        return min(self.next_due.values())
+
+    def reset(self):
+        for name in self.next_due:
+            self.next_due[name] = 0.0
+
+    def _with_passengers(self, block):
+        return ReadBlock(block.start, block.count, block_members(block.start, block.count, self.periods))
@@ -0,0 +1,138 @@
+# register_schema.py
+"""Esquema declarativo dos registros e planos de decodificação compilados.
+
+Cada entrada de REGISTER_SCHEMA (config.py) vira um `RegisterSpec` na
+importação. Valores de 32 bits (u32, s32, float32) ocupam dois registros, na
+ordem `word_order`; o valor em escala é `bruto / scale + offset`.
+
+`compile_block()` transforma os membros de um bloco lido em um `DecodePlan`:
+um único `struct.Struct` que converte a resposta inteira (com os buracos como
+bytes ignorados) ou, em blocos só de u16, um `itemgetter` dos deslocamentos,
+seguido da escala, sem consultas a dicionários por registro no laço de
+leitura. Os planos ficam em cache por faixa e membros.
+"""
+import operator
+import struct
+from functools import lru_cache
+
+try:
+    from config import REGISTER_SCHEMA
+except ImportError:
+    from .config import REGISTER_SCHEMA
+
+# Tipo: (código struct, registros ocupados, faixa do valor bruto ou None para float)
+TYPES = {
+    'u16': ('H', 1, (0, 0xFFFF)),
+    's16': ('h', 1, (-0x8000, 0x7FFF)),
+    'u32': ('I', 2, (0, 0xFFFFFFFF)),
+    's32': ('i', 2, (-0x80000000, 0x7FFFFFFF)),
+    'float32': ('f', 2, None),
+}
+WORD_ORDERS = ('big', 'little')
+
+
+class RegisterSpec:
+    """Descrição de um valor: endereço, tipo, ordem das palavras, escala, offset e unidade"""
+
+    def __init__(self, name, address, type='u16', word_order='big', scale=1, offset=0.0, unit=''):
+        if type not in TYPES:
+            raise ValueError(f"Tipo desconhecido para {name}: {type}")
+        if word_order not in WORD_ORDERS:
+            raise ValueError(f"Ordem de palavras desconhecida para {name}: {word_order}")
+        if not scale:
+            raise ValueError(f"Escala inválida para {name}: {scale}")
+        self.name = name
+        self.address = address
+        self.type = type
+        self.word_order = word_order
+        self.scale = scale
+        self.offset = offset
+        self.unit = unit
+        self.code, self.width, self.limits = TYPES[type]
+
+    @property
+    def end(self):
+        """Último endereço ocupado pelo valor"""
+        return self.address + self.width - 1
+
+    def raw_value(self, value):
+        """Valor bruto (antes de escala e offset) a partir do valor em escala"""
+        raw = (value - self.offset) * self.scale
+        if self.limits is None:
+            return raw
+        return min(max(int(round(raw)), self.limits[0]), self.limits[1])
+
+    def encode(self, value):
+        """Palavras de 16 bits do valor em escala, na ordem dos endereços"""
+        words = list(struct.unpack(f'>{self.width}H', struct.pack('>' + self.code, self.raw_value(value))))
+        if self.word_order == 'little':
+            words.reverse()
+        return words
+
+    def __repr__(self):
+        return f"RegisterSpec({self.name}, {self.address}, {self.type}, scale={self.scale}, unit={self.unit!r})"
+
+
+def load_schema(schema=REGISTER_SCHEMA):
+    """Valida o esquema e retorna {nome: RegisterSpec}; ValueError se dois valores se sobrepõem"""
+    specs = {name: RegisterSpec(name, **entry) for name, entry in schema.items()}
+    owners = {}
+    for spec in specs.values():
+        for address in range(spec.address, spec.end + 1):
+            if address in owners:
+                raise ValueError(f"{spec.name} e {owners[address]} ocupam o registro {address}")
+            owners[address] = spec.name
+    return specs
+
+
+REGISTERS = load_schema()
+
+
+class DecodePlan:
+    """Conversão compilada de uma resposta de `count` registros nos valores dos membros"""
+
+    def __init__(self, count, members, specs=REGISTERS):
+        members = sorted(members, key=operator.itemgetter(1))
+        fmt = '>'
+        position = 0
+        order = list(range(count))
+        for name, offset in members:
+            spec = specs[name]
+            if offset < position or offset + spec.width > count:
+                raise ValueError(f"{name} não cabe no bloco em {offset}")
+            fmt += 'x' * (2 * (offset - position)) + spec.code
+            position = offset + spec.width
+            if spec.width == 2 and spec.word_order == 'little':
+                order[offset], order[offset + 1] = offset + 1, offset
+        fmt += 'x' * (2 * (count - position))  # Registros não mapeados após o último membro
+        self.names = tuple(name for name, _ in members)
+        self.divisors = tuple(float(specs[name].scale) for name in self.names)
+        offsets = tuple(float(specs[name].offset) for name in self.names)
+        self.offsets = offsets if any(offsets) else None
+
+        if all(specs[name].type == 'u16' for name in self.names):
+            # Só u16: os inteiros da resposta já são os valores brutos
+            indexes = [offset for _, offset in members]
+            self.extract = operator.itemgetter(*indexes) if len(indexes) > 1 else lambda registers: (registers[indexes[0]],)
+        else:
+            pack = struct.Struct(f'>{count}H').pack
+            unpack = struct.Struct(fmt).unpack
+            if order != list(range(count)):
+                # Palavras dos valores 'little' trocadas em uma única chamada
+                reorder = operator.itemgetter(*order)
+                self.extract = lambda registers: unpack(pack(*reorder(registers)))
+            else:
+                self.extract = lambda registers: unpack(pack(*registers))
+
+    def decode(self, registers):
+        raw = self.extract(registers)
+        if self.offsets:
+            return {name: value / divisor + offset
+                    for name, value, divisor, offset in zip(self.names, raw, self.divisors, self.offsets)}
+        return {name: value / divisor for name, value, divisor in zip(self.names, raw, self.divisors)}
+
+
+@lru_cache(maxsize=256)
+def compile_block(count, members):
+    """DecodePlan em cache para `count` registros e membros ((nome, deslocamento), ...)"""
+    return DecodePlan(count, members)
@@ -0,0 +1,247 @@
+# rollups.py
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+
+import numpy as np
+
+try:
+    from config import ROLLUP_PATH, ROLLUP_RESOLUTIONS
+except ImportError:
+    from .config import ROLLUP_PATH, ROLLUP_RESOLUTIONS
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_SQL = """
+    INSERT INTO rollups (resolution, device, register, bucket, min, max, sum, count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolution, device, register, bucket) DO UPDATE SET
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max),
+        sum = sum + excluded.sum,
+        count = count + excluded.count
+"""
+
+
+class RollupStore:
+    """Agregados min/max/média/contagem por registro em janelas fixas (padrão 1 min, 1 h, 1 dia).
+
+    Os agregados são mantidos incrementalmente em memória a cada amostra
+    (`append()`, interface de consumidor do ModbusClient) e cada janela é
+    gravada em SQLite uma única vez, quando fecha. As janelas fechadas vão
+    para uma fila gravada por uma thread própria, como no Historian: a
+    aquisição nunca espera o disco. As janelas são alinhadas ao epoch (dias
+    em UTC). `query()` escolhe a resolução adequada ao intervalo pedido e ao
+    número máximo de pontos, e inclui as janelas ainda não gravadas.
+    """
+
+    def __init__(self, path=ROLLUP_PATH, resolutions=ROLLUP_RESOLUTIONS, device='tps'):
+        self.path = path
+        self.resolutions = sorted(resolutions)
+        self.device = device
+        self._open = {}  # (resolução, dispositivo, registro) -> [janela, min, max, soma, contagem]
+        # Janelas fechadas ainda não gravadas: (resolução, dispositivo, registro) -> [(seq, linha), ...]
+        self._pending = {}
+        self._seq = 0
+        self._retry = []  # Linhas de uma gravação que falhou, repetidas na próxima (thread de escrita)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Cada gravação registra a última seq gravada na mesma transação; a consulta lê os
+        # agregados e essa seq de um mesmo instantâneo e só soma as pendentes posteriores.
+        self._writer_id = f"{os.getpid()}:{id(self)}"
+        self._db = self._connect()
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS rollups (
+                resolution INTEGER NOT NULL, device TEXT NOT NULL, register TEXT NOT NULL,
+                bucket REAL NOT NULL, min REAL, max REAL, sum REAL, count INTEGER,
+                PRIMARY KEY (resolution, device, register, bucket)
+            ) WITHOUT ROWID
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS rollup_writers (writer TEXT PRIMARY KEY, seq INTEGER)")
+        self._db.execute("INSERT OR REPLACE INTO rollup_writers VALUES (?, 0)", (self._writer_id,))
+        self._db.commit()
+        self._read_db = self._connect()
+        self._read_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer_loop, name='rollups', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def append(self, timestamp, readings, device=None):
+        device = device or self.device
+        closed = []
+        with self._lock:
+            for name, value in readings.items():
+                if value is None:
+                    continue
+                for resolution in self.resolutions:
+                    bucket = math.floor(timestamp / resolution) * resolution
+                    key = (resolution, device, name)
+                    current = self._open.get(key)
+                    if current is not None and current[0] == bucket:
+                        if value < current[1]:
+                            current[1] = value
+                        if value > current[2]:
+                            current[2] = value
+                        current[3] += value
+                        current[4] += 1
+                        continue
+                    if current is not None:
+                        closed.append((key, current))
+                    self._open[key] = [bucket, value, value, value, 1]
+            if closed:
+                self._enqueue(closed)
+
+    def for_device(self, device):
+        """Consumidor (sink) que agrega as leituras com o nome de dispositivo dado"""
+        return _DeviceSink(self, device)
+
+    def _enqueue(self, closed):
+        """Passa janelas fechadas para a thread de escrita (chamado com `_lock`)"""
+        self._seq += 1
+        for key, current in closed:
+            self._pending.setdefault(key, []).append((self._seq, current))
+        self._queue.put((self._seq, [(*key, *current) for key, current in closed]))
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            seq, rows = item
+            self._write(seq, rows)
+
+    def _write(self, seq, rows):
+        rows = self._retry + rows
+        try:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(_UPSERT_SQL, rows)
+                self._db.execute("UPDATE rollup_writers SET seq = ? WHERE writer = ?", (seq, self._writer_id))
+        except sqlite3.Error as e:
+            # As janelas continuam pendentes (e nas consultas) até uma gravação seguinte dar certo
+            logger.error(f"Erro ao gravar {len(rows)} agregados, nova tentativa na próxima gravação: {e}")
+            self._retry = rows
+            return
+        self._retry = []
+        with self._lock:
+            for resolution, device, name, *_ in rows:
+                entries = self._pending.get((resolution, device, name))
+                if entries:
+                    entries.pop(0)
+                    if not entries:
+                        del self._pending[(resolution, device, name)]
+
+    def flush(self):
+        """Enfileira as janelas ainda abertas (mescladas com as próximas amostras, se houver)"""
+        with self._lock:
+            closed = list(self._open.items())
+            self._open.clear()
+            if closed:
+                self._enqueue(closed)
+
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread de escrita"""
+        self.flush()
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            if self._retry:
+                logger.error(f"{len(self._retry)} agregados descartados: a última gravação falhou")
+            self._db.execute("DELETE FROM rollup_writers WHERE writer = ?", (self._writer_id,))
+            self._db.close()
+            with self._read_lock:
+                self._read_db.close()
+
+    def pick_resolution(self, start, end, max_points=None):
+        """Resolução mais fina cujo número de janelas no intervalo cabe em `max_points`"""
+        if max_points:
+            for resolution in self.resolutions:
+                if (end - start) / resolution <= max_points:
+                    return resolution
+            return self.resolutions[-1]
+        return self.resolutions[0]
+
+    def query(self, name, start, end, max_points=None, resolution=None, device=None):
+        """Agregados de `name` no intervalo [start, end).
+
+        Retorna um dict com 'resolution' e arrays NumPy 'bucket', 'min', 'max',
+        'mean' e 'count', em ordem cronológica, incluindo a janela em aberto.
+        """
+        device = device or self.device
+        if resolution is None:
+            resolution = self.pick_resolution(start, end, max_points)
+        first = math.floor(start / resolution) * resolution
+        key = (resolution, device, name)
+        with self._lock:
+            # Janelas em memória copiadas antes da leitura: uma gravação concluída depois
+            # aparece com seq já gravada e não é somada duas vezes
+            pending = list(self._pending.get(key, ()))
+            current = self._open.get(key)
+            current = list(current) if current is not None else None
+        with self._read_lock:
+            self._read_db.execute("BEGIN")
+            try:
+                written = self._read_db.execute(
+                    "SELECT seq FROM rollup_writers WHERE writer = ?", (self._writer_id,)).fetchone()
+                rows = self._read_db.execute(
+                    "SELECT bucket, min, max, sum, count FROM rollups "
+                    "WHERE resolution = ? AND device = ? AND register = ? AND bucket >= ? AND bucket < ? "
+                    "ORDER BY bucket",
+                    (resolution, device, name, first, end),
+                ).fetchall()
+            finally:
+                self._read_db.execute("COMMIT")
+        written = written[0] if written else 0
+
+        unwritten = [window for seq, window in pending if seq > written]
+        if current is not None:
+            unwritten.append(current)
+        for window in unwritten:
+            if first <= window[0] < end:
+                rows = self._merge(rows, window)
+
+        data = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        return {
+            'resolution': resolution,
+            'bucket': data[:, 0],
+            'min': data[:, 1],
+            'max': data[:, 2],
+            'mean': data[:, 3] / data[:, 4] if len(data) else data[:, 3],
+            'count': data[:, 4].astype(np.int64),
+        }
+
+    @staticmethod
+    def _merge(rows, window):
+        """Soma uma janela em memória às linhas lidas (ordenadas por janela)"""
+        bucket = window[0]
+        for index, row in enumerate(rows):
+            if row[0] == bucket:
+                rows[index] = (bucket, min(row[1], window[1]), max(row[2], window[2]),
+                               row[3] + window[3], row[4] + window[4])
+                return rows
+            if row[0] > bucket:
+                rows.insert(index, tuple(window))
+                return rows
+        rows.append(tuple(window))
+        return rows
+
+
+class _DeviceSink:
+    def __init__(self, store, device):
+        self.store = store
+        self.device = device
+
+    def append(self, timestamp, readings):
+        self.store.append(timestamp, readings, self.device)
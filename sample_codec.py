@@ -0,0 +1,326 @@
+# sample_codec.py
+"""Formato compacto para séries de leituras (estilo Gorilla, orientado a bytes).
+
+Cada arquivo começa com um cabeçalho autodescritivo (resolução do tempo e,
+por registro, nome, endereço, tipo, escala e offset do esquema) seguido de um
+registro por amostra:
+
+    varint zigzag   delta-of-delta do timestamp (em unidades de `resolution`)
+    varint          máscara dos registros que mudaram (valor ou presença)
+    varint          por registro marcado: 0 = ausente, senão zigzag(delta) + 1
+
+Os valores são os inteiros brutos dos registros (antes de escala e offset;
+float32 pelo padrão de bits), com delta em relação ao último valor conhecido.
+Uma amostra em que nada mudou e o intervalo é regular ocupa 2 bytes. O
+decodificador converte os valores com o esquema gravado no cabeçalho, não com
+o da instalação que lê o arquivo.
+
+    with open('tps30.tpsc', 'wb') as f:
+        encoder = SampleEncoder(f)
+        encoder.append(time.time(), client.read_all())
+
+    with open('tps30.tpsc', 'rb') as f:
+        for timestamp, readings in SampleDecoder(f):
+            ...
+"""
+import logging
+import struct
+import sys
+
+try:
+    from register_schema import REGISTERS, RegisterSpec
+except ImportError:
+    from .register_schema import REGISTERS, RegisterSpec
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TPSC'
+VERSION = 2
+
+
+class _NeedMoreData(Exception):
+    """Registro incompleto no buffer de leitura"""
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def write_varint(out, value):
+    """Acrescenta `value` (inteiro >= 0) a `out` (bytearray) em LEB128"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def float_bits(value):
+    """Padrão de bits (inteiro sem sinal) de um float32"""
+    return struct.unpack('<I', struct.pack('<f', value))[0]
+
+
+def bits_float(bits):
+    return struct.unpack('<f', struct.pack('<I', bits))[0]
+
+
+def write_text(out, text):
+    encoded = text.encode('utf-8')
+    write_varint(out, len(encoded))
+    out += encoded
+
+
+def read_text(data, pos):
+    length, pos = read_varint(data, pos)
+    if len(data) < pos + length:
+        raise _NeedMoreData
+    return bytes(data[pos:pos + length]).decode('utf-8'), pos + length
+
+
+def read_varint(data, pos):
+    """Retorna (valor, nova posição); levanta _NeedMoreData se o varint está incompleto"""
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise _NeedMoreData
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class SampleEncoder:
+    """Codificador em fluxo; `append()` segue a interface de consumidor (sink) do ModbusClient.
+
+    `names` escolhe os registros de `specs` (o esquema da instalação) a gravar.
+    """
+
+    def __init__(self, stream, names=None, resolution=0.001, specs=REGISTERS):
+        self.stream = stream
+        self.names = list(names or specs)
+        self.specs = [specs[name] for name in self.names]
+        self.resolution = resolution
+        self.samples = 0
+        self.bytes_written = 0
+        self._previous = [None] * len(self.names)   # Último valor bruto conhecido
+        self._present = [False] * len(self.names)
+        self._last_time = None
+        self._last_delta = 0
+        self._write_header()
+
+    def _write_header(self):
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        out += struct.pack('<d', self.resolution)
+        write_varint(out, len(self.specs))
+        for spec in self.specs:
+            write_text(out, spec.name)
+            write_varint(out, spec.address)
+            write_text(out, spec.type)
+            write_text(out, spec.word_order)
+            out += struct.pack('<dd', spec.scale, spec.offset)
+        self._write(out)
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.bytes_written += len(data)
+
+    def append(self, timestamp, readings):
+        """Codifica uma amostra de leituras em escala (como retornadas por read_all/poll)"""
+        raw = {}
+        for spec in self.specs:
+            value = readings.get(spec.name)
+            if value is not None:
+                raw[spec.name] = spec.raw_value(value)
+        self.append_raw(timestamp, raw)
+
+    def append_raw(self, timestamp, raw):
+        """Codifica uma amostra de valores brutos {nome: inteiro, ou float para float32}"""
+        out = bytearray()
+        ticks = int(round(timestamp / self.resolution))
+        if self._last_time is None:
+            write_varint(out, zigzag(ticks))
+            self._last_delta = 0
+        else:
+            delta = ticks - self._last_time
+            write_varint(out, zigzag(delta - self._last_delta))
+            self._last_delta = delta
+        self._last_time = ticks
+
+        changed = 0
+        tokens = []
+        for index, spec in enumerate(self.specs):
+            value = raw.get(spec.name)
+            if value is not None and spec.type == 'float32':
+                value = float_bits(value)
+            if value is None:
+                if self._present[index]:
+                    changed |= 1 << index
+                    tokens.append(0)
+                    self._present[index] = False
+                continue
+            previous = self._previous[index]
+            delta = value - previous if previous is not None else value
+            if delta or not self._present[index]:
+                changed |= 1 << index
+                tokens.append(zigzag(delta) + 1)
+                self._previous[index] = value
+                self._present[index] = True
+
+        write_varint(out, changed)
+        for token in tokens:
+            write_varint(out, token)
+        self._write(out)
+        self.samples += 1
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+class SampleDecoder:
+    """Decodificador em fluxo: itera (timestamp, leituras) lendo o arquivo em blocos.
+
+    Com `raw=True` as leituras são os valores brutos; caso contrário, em escala
+    (`bruto / scale + offset`, com o esquema do cabeçalho). Um registro truncado no fim do arquivo (gravação interrompida) é ignorado.
+    """
+
+    def __init__(self, stream, raw=False, chunk_size=65536):
+        self.stream = stream
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._pos = 0
+        self._eof = False
+        self._read_header()
+
+    def _fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        del self._buffer[:self._pos]
+        self._pos = 0
+        self._buffer += chunk
+        return True
+
+    def _parse(self, parser):
+        """Executa `parser(buffer, pos)`, lendo mais dados enquanto o registro estiver incompleto"""
+        while True:
+            try:
+                result, pos = parser(self._buffer, self._pos)
+                self._pos = pos
+                return result
+            except _NeedMoreData:
+                if not self._fill():
+                    raise
+
+    def _read_header(self):
+        def header(data, pos):
+            if len(data) < pos + 13:
+                raise _NeedMoreData
+            if data[pos:pos + 4] != MAGIC:
+                raise ValueError("Arquivo não está no formato de amostras TPS")
+            if data[pos + 4] != VERSION:
+                raise ValueError(f"Versão de formato não suportada: {data[pos + 4]}")
+            resolution = struct.unpack_from('<d', data, pos + 5)[0]
+            count, pos = read_varint(data, pos + 13)
+            specs = []
+            for _ in range(count):
+                name, pos = read_text(data, pos)
+                address, pos = read_varint(data, pos)
+                type, pos = read_text(data, pos)
+                word_order, pos = read_text(data, pos)
+                if len(data) < pos + 16:
+                    raise _NeedMoreData
+                scale, offset = struct.unpack_from('<dd', data, pos)
+                specs.append(RegisterSpec(name, address, type, word_order, scale, offset))
+                pos += 16
+            return (resolution, specs), pos
+
+        try:
+            self.resolution, self.specs = self._parse(header)
+        except _NeedMoreData:
+            raise ValueError("Cabeçalho incompleto") from None
+        self.names = [spec.name for spec in self.specs]
+        self._previous = [None] * len(self.names)
+        self._present = [False] * len(self.names)
+        self._last_time = None
+        self._last_delta = 0
+
+    def _parse_sample(self, data, pos):
+        dod, pos = read_varint(data, pos)
+        changed, pos = read_varint(data, pos)
+        updates = []
+        index = 0
+        while changed:
+            if changed & 1:
+                token, pos = read_varint(data, pos)
+                updates.append((index, token))
+            changed >>= 1
+            index += 1
+        return (unzigzag(dod), updates), pos
+
+    def __iter__(self):
+        while True:
+            if self._pos >= len(self._buffer) and (self._eof or not self._fill()):
+                return
+            try:
+                dod, updates = self._parse(self._parse_sample)
+            except _NeedMoreData:
+                logger.warning("Amostra incompleta no fim do arquivo ignorada")
+                return
+
+            if self._last_time is None:
+                ticks = dod
+            else:
+                self._last_delta += dod
+                ticks = self._last_time + self._last_delta
+            self._last_time = ticks
+
+            for index, token in updates:
+                if token == 0:
+                    self._present[index] = False
+                    continue
+                delta = unzigzag(token - 1)
+                previous = self._previous[index]
+                self._previous[index] = previous + delta if previous is not None else delta
+                self._present[index] = True
+
+            readings = {}
+            for index, spec in enumerate(self.specs):
+                if not self._present[index]:
+                    readings[spec.name] = None
+                    continue
+                value = self._previous[index]
+                if spec.type == 'float32':
+                    value = bits_float(value)
+                readings[spec.name] = value if self.raw else value / spec.scale + spec.offset
+            yield ticks * self.resolution, readings
+
+
+def main(argv=None):
+    """Exporta um arquivo de amostras como CSV na saída padrão"""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Uso: python sample_codec.py arquivo.tpsc > saida.csv")
+        return 2
+    with open(argv[0], 'rb') as f:
+        decoder = SampleDecoder(f)
+        print(','.join(['timestamp'] + decoder.names))
+        for timestamp, readings in decoder:
+            values = ['' if readings[name] is None else f"{readings[name]:g}" for name in decoder.names]
+            print(','.join([f"{timestamp:.3f}"] + values))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# shm_snapshot.py
+"""Últimas leituras em memória compartilhada, para outros processos locais.
+
+Layout fixo (little-endian), na ordem do REGISTER_MAP:
+
+    cabeçalho (32 bytes): 'TPSS', versão u16, n registros u16,
+                          sequência u64, timestamp do ciclo f64, reservado
+    nomes:   n x 32 bytes (UTF-8, completados com zeros)
+    slots:   n x (valor f64, timestamp f64, qualidade u32, reservado u32)
+
+Consistência por seqlock: o escritor torna a sequência ímpar antes de
+alterar os slots e par ao terminar; o leitor repete a leitura enquanto a
+sequência for ímpar ou mudar durante a cópia, cedendo a CPU entre as
+tentativas, por até SNAPSHOT_READ_TIMEOUT segundos (TimeoutError se o
+escritor morreu no meio de uma atualização). Não há travas nem
+serialização.
+
+    reader = SnapshotReader()
+    seq, cycle_time, readings = reader.read()
+"""
+import logging
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+try:
+    from config import REGISTER_MAP, SNAPSHOT_NAME, SNAPSHOT_READ_TIMEOUT
+except ImportError:
+    from .config import REGISTER_MAP, SNAPSHOT_NAME, SNAPSHOT_READ_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TPSS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQd8x')
+SEQUENCE_OFFSET = 8
+NAME_SIZE = 32
+SLOT_DTYPE = np.dtype([('value', '<f8'), ('timestamp', '<f8'), ('quality', '<u4'), ('reserved', '<u4')])
+
+# Qualidade de cada slot
+QUALITY_NONE = 0   # Nunca lido
+QUALITY_GOOD = 1   # Última leitura bem-sucedida
+QUALITY_STALE = 2  # Última leitura falhou; valor anterior mantido
+
+
+def snapshot_size(count):
+    return HEADER.size + count * NAME_SIZE + count * SLOT_DTYPE.itemsize
+
+
+class _Layout:
+    """Views NumPy sobre o bloco de memória compartilhada"""
+
+    def __init__(self, shm, count):
+        buffer = shm.buf
+        self.sequence = np.ndarray((), dtype='<u8', buffer=buffer, offset=SEQUENCE_OFFSET)
+        self.cycle_time = np.ndarray((), dtype='<f8', buffer=buffer, offset=SEQUENCE_OFFSET + 8)
+        self.slots = np.ndarray(count, dtype=SLOT_DTYPE, buffer=buffer, offset=HEADER.size + count * NAME_SIZE)
+
+
+class SnapshotWriter:
+    """Publica as leituras em memória compartilhada; `append()` segue a interface de consumidor (sink)"""
+
+    def __init__(self, name=SNAPSHOT_NAME, names=None):
+        self.name = name
+        self.names = list(names or REGISTER_MAP)
+        self.index = {register: position for position, register in enumerate(self.names)}
+        size = snapshot_size(len(self.names))
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Sobra de uma execução interrompida: recria com o layout atual
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.shm.buf[:HEADER.size] = HEADER.pack(MAGIC, VERSION, len(self.names), 0, 0.0)
+        for position, register in enumerate(self.names):
+            start = HEADER.size + position * NAME_SIZE
+            self.shm.buf[start:start + NAME_SIZE] = register.encode('utf-8')[:NAME_SIZE].ljust(NAME_SIZE, b'\0')
+        self.layout = _Layout(self.shm, len(self.names))
+        self.layout.slots['value'] = np.nan
+        logger.info(f"Snapshot em memória compartilhada: {name} ({size} bytes)")
+
+    def append(self, timestamp, readings):
+        layout = self.layout
+        slots = layout.slots
+        layout.sequence[()] += 1  # Ímpar: escrita em andamento
+        for register, value in readings.items():
+            position = self.index.get(register)
+            if position is None:
+                continue
+            slot = slots[position]
+            if value is None:
+                if slot['quality'] != QUALITY_NONE:
+                    slot['quality'] = QUALITY_STALE
+            else:
+                slot['value'] = value
+                slot['timestamp'] = timestamp
+                slot['quality'] = QUALITY_GOOD
+        layout.cycle_time[()] = timestamp
+        layout.sequence[()] += 1  # Par: snapshot consistente
+
+    def close(self):
+        del self.layout
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SnapshotReader:
+    """Lê o snapshot publicado pelo SnapshotWriter de outro processo"""
+
+    def __init__(self, name=SNAPSHOT_NAME):
+        # O leitor não é dono do bloco: o resource_tracker não deve apagá-lo quando o leitor sair
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            self.shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        magic, version, count, _, _ = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(f"Memória compartilhada {name} não contém um snapshot TPS v{VERSION}")
+        self.names = []
+        for position in range(count):
+            start = HEADER.size + position * NAME_SIZE
+            self.names.append(bytes(self.shm.buf[start:start + NAME_SIZE]).rstrip(b'\0').decode('utf-8'))
+        self.layout = _Layout(self.shm, count)
+        self._copy = np.empty(count, dtype=SLOT_DTYPE)
+
+    @property
+    def sequence(self):
+        return int(self.layout.sequence)
+
+    def read_slots(self, timeout=SNAPSHOT_READ_TIMEOUT):
+        """Retorna (sequência, timestamp do ciclo, array de slots) consistente; o array é reutilizado.
+
+        Levanta TimeoutError se não houver cópia consistente em `timeout`
+        segundos (escritor parado com a sequência ímpar).
+        """
+        layout = self.layout
+        deadline = None
+        while True:
+            before = int(layout.sequence)
+            if not before & 1:
+                np.copyto(self._copy, layout.slots)
+                cycle_time = float(layout.cycle_time)
+                if int(layout.sequence) == before:
+                    return before, cycle_time, self._copy
+            # Escritor no meio de uma atualização
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + timeout
+            elif now >= deadline:
+                raise TimeoutError(f"Snapshot {self.shm.name} sem cópia consistente em {timeout}s "
+                                   f"(sequência {before}: escritor parado no meio de uma atualização)")
+            time.sleep(0)
+
+    def read(self, timeout=SNAPSHOT_READ_TIMEOUT):
+        """Retorna (sequência, timestamp do ciclo, {nome: (valor, timestamp, qualidade)})"""
+        sequence, cycle_time, slots = self.read_slots(timeout)
+        readings = {
+            name: (float(slot['value']), float(slot['timestamp']), int(slot['quality']))
+            for name, slot in zip(self.names, slots)
+        }
+        return sequence, cycle_time, readings
+
+    def wait_for_update(self, last_sequence, timeout=None, interval=0.005):
+        """Espera a sequência mudar em relação a `last_sequence`; retorna False no timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.sequence == last_sequence:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def close(self):
+        del self.layout
+        self.shm.close()
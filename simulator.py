@@ -0,0 +1,269 @@
+# simulator.py
+"""Simulador de TPS (escravo Modbus) para testes e benchmarks sem hardware.
+
+Serve os registros de entrada do REGISTER_MAP por um par de pseudo-terminais
+(Modbus RTU) e/ou por Modbus TCP, com latência, jitter, quadros perdidos,
+CRC corrompido e formas de onda configuráveis.
+
+    python simulator.py --pty --tcp 5020 --latency 0.005 --jitter 0.002 --drop 0.01
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import select
+import threading
+import time
+
+try:
+    from config import SLAVE_ADDRESS
+    from register_schema import REGISTERS
+    import modbus_frames as frames
+except ImportError:
+    from .config import SLAVE_ADDRESS
+    from .register_schema import REGISTERS
+    from . import modbus_frames as frames
+
+logger = logging.getLogger(__name__)
+
+
+class Waveform:
+    """Valor físico de um registro ao longo do tempo"""
+
+    KINDS = ('constant', 'sine', 'ramp', 'square')
+
+    def __init__(self, mean, kind='constant', amplitude=0.0, period=60.0, noise=0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Forma de onda desconhecida: {kind}")
+        self.mean = mean
+        self.kind = kind
+        self.amplitude = amplitude
+        self.period = period
+        self.noise = noise
+
+    def value(self, t, rng=random):
+        phase = (t % self.period) / self.period
+        if self.kind == 'sine':
+            value = self.mean + self.amplitude * math.sin(2 * math.pi * phase)
+        elif self.kind == 'ramp':
+            value = self.mean + self.amplitude * (2 * phase - 1)
+        elif self.kind == 'square':
+            value = self.mean + (self.amplitude if phase < 0.5 else -self.amplitude)
+        else:
+            value = self.mean
+        if self.noise:
+            value += rng.gauss(0, self.noise)
+        return value
+
+
+# Valores típicos de um TPS em flutuação
+DEFAULT_WAVEFORMS = {
+    'tensao_r': Waveform(220, 'sine', 2, 30, 0.5),
+    'tensao_s': Waveform(221, 'sine', 2, 30, 0.5),
+    'tensao_t': Waveform(219, 'sine', 2, 30, 0.5),
+    'corrente_r': Waveform(4.2, 'sine', 0.3, 20, 0.05),
+    'corrente_s': Waveform(4.1, 'sine', 0.3, 20, 0.05),
+    'corrente_t': Waveform(4.3, 'sine', 0.3, 20, 0.05),
+    'frequencia': Waveform(60.0, noise=0.02),
+    'tensao_retificador': Waveform(54.0, noise=0.05),
+    'tensao_bateria': Waveform(53.6, 'sine', 0.2, 120, 0.03),
+    'tensao_consumidor': Waveform(53.8, noise=0.05),
+    'corrente_retificador': Waveform(25.0, 'square', 2.0, 10, 0.1),
+    'corrente_bateria': Waveform(1.5, 'ramp', 0.5, 60, 0.05),
+    'temperatura_bateria': Waveform(27.0, 'sine', 1.0, 600, 0.05)
+}
+
+
+class TPSSimulator:
+    """Escravo Modbus que responde FC 0x04 com os registros do REGISTER_MAP"""
+
+    def __init__(self, slaves=None, latency=0.005, jitter=0.0, drop_rate=0.0, crc_error_rate=0.0,
+                 waveforms=None, strict_addresses=False, seed=None):
+        self.slaves = set(slaves or [SLAVE_ADDRESS])
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.crc_error_rate = crc_error_rate
+        self.waveforms = dict(DEFAULT_WAVEFORMS)
+        self.waveforms.update(waveforms or {})
+        self.strict_addresses = strict_addresses  # Recusa endereços fora do mapa (ex.: 75)
+        self.rng = random.Random(seed)
+        # Endereço -> (nome, índice da palavra no valor); valores de 32 bits ocupam dois endereços
+        self.addresses = {address: (name, address - spec.address)
+                          for name, spec in REGISTERS.items() for address in range(spec.address, spec.end + 1)}
+        self.stats = {'requests': 0, 'responses': 0, 'dropped': 0, 'corrupted': 0, 'bad_crc': 0}
+        self._start = time.monotonic()
+        self._stop_event = threading.Event()
+        self._pty_thread = None
+
+    def register_values(self, span, t):
+        """Palavras de 16 bits dos endereços em `span` no instante `t`, codificadas segundo o esquema"""
+        encoded = {}  # Cada valor é amostrado uma vez, mesmo ocupando dois endereços
+        words = []
+        for address in span:
+            name, index = self.addresses.get(address, (None, 0))
+            if name is None or name not in self.waveforms:
+                words.append(0)
+                continue
+            if name not in encoded:
+                encoded[name] = REGISTERS[name].encode(self.waveforms[name].value(t, self.rng))
+            words.append(encoded[name][index])
+        return words
+
+    def handle_pdu(self, pdu):
+        """Processa um PDU de requisição e retorna o PDU de resposta"""
+        function = pdu[0] if pdu else 0
+        if function != frames.READ_INPUT_REGISTERS:
+            return frames.exception_response(function, frames.ILLEGAL_FUNCTION)
+        try:
+            _, address, count = frames.parse_read_request(pdu)
+        except ValueError:
+            return frames.exception_response(function, frames.ILLEGAL_DATA_VALUE)
+        if not 1 <= count <= 125:
+            return frames.exception_response(function, frames.ILLEGAL_DATA_VALUE)
+        span = range(address, address + count)
+        if self.strict_addresses and any(a not in self.addresses for a in span):
+            return frames.exception_response(function, frames.ILLEGAL_DATA_ADDRESS)
+        t = time.monotonic() - self._start
+        return frames.read_registers_response(self.register_values(span, t))
+
+    def response_delay(self):
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def should_drop(self):
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            self.stats['dropped'] += 1
+            return True
+        return False
+
+    def handle_rtu_frame(self, frame):
+        """Processa um quadro RTU; retorna o quadro de resposta ou None (sem resposta)"""
+        try:
+            slave, pdu = frames.parse_rtu_frame(frame)
+        except ValueError:
+            self.stats['bad_crc'] += 1
+            return None
+        if slave not in self.slaves:
+            return None
+        self.stats['requests'] += 1
+        if self.should_drop():
+            return None
+        response = frames.rtu_frame(slave, self.handle_pdu(pdu))
+        if self.crc_error_rate and self.rng.random() < self.crc_error_rate:
+            self.stats['corrupted'] += 1
+            response = response[:-1] + bytes([response[-1] ^ 0xFF])
+        self.stats['responses'] += 1
+        return response
+
+    # Modbus RTU via pseudo-terminal
+
+    def start_pty(self, frame_silence=0.002):
+        """Cria o par de pseudo-terminais e atende em uma thread; retorna o caminho para o cliente"""
+        import tty  # Disponível apenas em sistemas POSIX
+
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        path = os.ttyname(slave_fd)
+        self._pty_thread = threading.Thread(
+            target=self._serve_pty, args=(master_fd, slave_fd, frame_silence), daemon=True
+        )
+        self._pty_thread.start()
+        logger.info(f"Simulador RTU em {path} (escravos {sorted(self.slaves)})")
+        return path
+
+    def _serve_pty(self, master_fd, slave_fd, frame_silence):
+        buffer = b''
+        try:
+            while not self._stop_event.is_set():
+                # Um quadro termina após `frame_silence` sem novos bytes
+                readable, _, _ = select.select([master_fd], [], [], frame_silence if buffer else 0.1)
+                if readable:
+                    buffer += os.read(master_fd, 256)
+                    continue
+                if not buffer:
+                    continue
+                response = self.handle_rtu_frame(buffer)
+                buffer = b''
+                if response is not None:
+                    time.sleep(self.response_delay())
+                    os.write(master_fd, response)
+        except OSError as e:
+            logger.error(f"Erro no pseudo-terminal: {e}")
+        finally:
+            os.close(master_fd)
+            os.close(slave_fd)
+
+    # Modbus TCP
+
+    async def serve_tcp(self, host='127.0.0.1', port=5020):
+        server = await asyncio.start_server(self._handle_tcp_client, host, port)
+        logger.info(f"Simulador TCP em {host}:{port} (unidades {sorted(self.slaves)})")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_tcp_client(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, protocol, length, unit = frames.parse_mbap_header(header)
+                pdu = await reader.readexactly(length)
+                if protocol != 0 or unit not in self.slaves:
+                    continue
+                self.stats['requests'] += 1
+                if self.should_drop():
+                    continue
+                response = self.handle_pdu(pdu)
+                await asyncio.sleep(self.response_delay())
+                writer.write(frames.mbap_frame(transaction_id, unit, response))
+                await writer.drain()
+                self.stats['responses'] += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._pty_thread:
+            self._pty_thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de TPS Modbus (RTU via pty e TCP)")
+    parser.add_argument('--pty', action='store_true', help="Serve Modbus RTU em um pseudo-terminal")
+    parser.add_argument('--tcp', type=int, metavar='PORTA', help="Serve Modbus TCP nesta porta")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço do servidor TCP")
+    parser.add_argument('--slaves', type=int, nargs='+', default=[SLAVE_ADDRESS], help="Endereços de escravo")
+    parser.add_argument('--latency', type=float, default=0.005, help="Latência de resposta (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variação uniforme da latência (s)")
+    parser.add_argument('--drop', type=float, default=0.0, help="Fração de requisições sem resposta")
+    parser.add_argument('--crc-errors', type=float, default=0.0, help="Fração de respostas RTU com CRC corrompido")
+    parser.add_argument('--strict', action='store_true', help="Recusa leituras que incluam endereços fora do mapa")
+    parser.add_argument('--seed', type=int, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+
+    if not args.pty and args.tcp is None:
+        parser.error("informe --pty e/ou --tcp")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    simulator = TPSSimulator(args.slaves, args.latency, args.jitter, args.drop, args.crc_errors,
+                             strict_addresses=args.strict, seed=args.seed)
+    if args.pty:
+        print(f"Porta serial simulada: {simulator.start_pty()}", flush=True)
+    try:
+        if args.tcp is not None:
+            asyncio.run(simulator.serve_tcp(args.host, args.tcp))
+        else:
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        logger.info(f"Estatísticas: {simulator.stats}")
+
+
+if __name__ == "__main__":
+    main()
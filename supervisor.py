@@ -0,0 +1,394 @@
+# supervisor.py
+"""Aquisição com um processo por porta serial, para instalações com muitos adaptadores.
+
+Cada porta roda em seu próprio processo (BusScheduler + AcquisitionLoop, com
+reconexão automática), livre do GIL dos demais e da interface; escravos na
+mesma porta compartilham o processo e o barramento. Os resultados
+voltam por um Pipe por processo a uma única thread agregadora, que os entrega
+aos consumidores como no AsyncAcquisitionEngine: `callback(dispositivo,
+leituras)` e `sink.append(timestamp, leituras)` por dispositivo. Processos que
+terminam ou param de dar sinal de vida são reiniciados.
+
+    supervisor = Supervisor()
+    supervisor.add_port('/dev/ttyUSB0')
+    supervisor.add_port('/dev/ttyUSB1', slave=31, name='tps31')
+    supervisor.add_port('/dev/ttyUSB1', slave=32, name='tps32')
+    supervisor.add_sink('tps31', historian.for_device('tps31'))
+    supervisor.start()
+
+    python supervisor.py /dev/ttyUSB0 /dev/ttyUSB1:31,32 --output - --metrics-port 9105
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from multiprocessing import connection
+
+try:
+    from config import (REGISTER_MAP, SLAVE_ADDRESS, BAUDRATE, PARITY, POLL_INTERVAL, SUPERVISOR_HANG_TIMEOUT,
+                        SUPERVISOR_RESTART_INITIAL, SUPERVISOR_RESTART_MAX, METRICS_HOST)
+    from bus_scheduler import BusScheduler
+    from acquisition import AcquisitionLoop
+    from metrics_exporter import MetricsExporter
+except ImportError:
+    from .config import (REGISTER_MAP, SLAVE_ADDRESS, BAUDRATE, PARITY, POLL_INTERVAL, SUPERVISOR_HANG_TIMEOUT,
+                         SUPERVISOR_RESTART_INITIAL, SUPERVISOR_RESTART_MAX, METRICS_HOST)
+    from .bus_scheduler import BusScheduler
+    from .acquisition import AcquisitionLoop
+    from .metrics_exporter import MetricsExporter
+
+logger = logging.getLogger(__name__)
+
+REGISTER_NAMES = list(REGISTER_MAP)
+REGISTER_INDEX = {name: index for index, name in enumerate(REGISTER_NAMES)}
+
+# Mensagens do processo de aquisição para o agregador
+READINGS = 0  # (READINGS, escravo, timestamp, máscara de registros, valores na ordem do REGISTER_MAP)
+STATE = 1     # (STATE, estado_anterior, novo_estado) da conexão da porta
+
+CHECK_INTERVAL = 1.0  # Verificação dos processos pelo agregador (segundos)
+
+
+def pack_readings(slave, timestamp, readings):
+    """Mensagem compacta: bit i da máscara indica o i-ésimo registro do REGISTER_MAP"""
+    mask = 0
+    values = []
+    for name, value in sorted(readings.items(), key=lambda item: REGISTER_INDEX.get(item[0], -1)):
+        index = REGISTER_INDEX.get(name)
+        if index is not None:
+            mask |= 1 << index
+            values.append(value)
+    return READINGS, slave, timestamp, mask, tuple(values)
+
+
+def unpack_readings(mask, values):
+    names = (name for index, name in enumerate(REGISTER_NAMES) if mask >> index & 1)
+    return dict(zip(names, values))
+
+
+class PortSpec:
+    """Porta serial atendida por um processo de aquisição, com seus escravos"""
+
+    def __init__(self, port, baudrate=BAUDRATE, parity=PARITY, interval=POLL_INTERVAL):
+        self.port = port
+        self.name = port
+        self.devices = {}  # Escravo -> nome do dispositivo
+        self.baudrate = baudrate
+        self.parity = parity
+        self.interval = interval
+
+
+def run_worker(spec, sender, control, heartbeat, log_level=logging.INFO):
+    """Ponto de entrada do processo de aquisição de uma porta"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C é tratado pelo supervisor
+    # force: o processo filho reimporta os módulos; nenhum handler herdado da importação prevalece
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s',
+                        force=True)
+
+    def beat(*args):
+        heartbeat.value = time.monotonic()
+
+    # Um único escravo também passa pelo BusScheduler: mesmo caminho, disjuntor por escravo
+    bus = BusScheduler(spec.port, list(spec.devices), spec.baudrate, spec.parity)
+    loop = AcquisitionLoop(bus, spec.interval, connect=bus.connect)
+    loop.add_cycle_listener(beat)
+    loop.add_error_listener(beat)
+    loop.add_connection_listener(beat)
+    loop.add_connection_listener(lambda old_state, new_state: sender.send((STATE, old_state, new_state)))
+    for slave, device in bus.devices.items():
+        device.add_sink(_PipeSink(sender, slave))
+
+    def wait_for_stop():
+        # Sem travas compartilhadas: um processo morto não pode bloquear o supervisor nem os demais
+        try:
+            control.recv()
+        except (EOFError, OSError):
+            pass  # Supervisor encerrado sem avisar
+        loop.stop()
+
+    threading.Thread(target=wait_for_stop, daemon=True).start()
+    try:
+        loop.run()
+    finally:
+        bus.disconnect()
+        sender.close()
+
+
+class _PipeSink:
+    """Consumidor do ModbusClient de um escravo que envia cada ciclo ao agregador"""
+
+    def __init__(self, sender, slave):
+        self.sender = sender
+        self.slave = slave
+
+    def append(self, timestamp, readings):
+        self.sender.send(pack_readings(self.slave, timestamp, readings))
+
+
+class _Worker:
+    """Estado de um processo de aquisição no supervisor"""
+
+    def __init__(self, spec, context):
+        self.spec = spec
+        self.heartbeat = context.Value('d', 0.0, lock=False)
+        self.process = None
+        self.receiver = None
+        self.control = None
+        self.started = 0.0
+        self.restart_delay = SUPERVISOR_RESTART_INITIAL
+        self.restart_at = None  # Instante do próximo reinício, se o processo terminou
+        self.restarts = 0
+        self.state = None
+
+
+class Supervisor:
+    """Inicia, observa e reinicia um processo de aquisição por porta serial"""
+
+    def __init__(self, hang_timeout=SUPERVISOR_HANG_TIMEOUT, log_level=logging.INFO):
+        self.hang_timeout = hang_timeout
+        self.log_level = log_level
+        # spawn: o processo filho não herda threads (Qt, historiador) nem portas abertas do pai
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = {}  # Porta -> _Worker
+        self.sinks = {}
+        self._listeners = []
+        self._state_listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_port(self, port, slave=SLAVE_ADDRESS, name=None, baudrate=BAUDRATE, parity=PARITY,
+                 interval=POLL_INTERVAL):
+        """Adiciona um escravo (antes de `start()`); escravos na mesma porta dividem o processo.
+
+        A velocidade, a paridade e o intervalo são os do primeiro escravo da porta.
+        """
+        name = name or f"{port}:{slave}"
+        if any(name in worker.spec.devices.values() for worker in self.workers.values()):
+            raise ValueError(f"Dispositivo repetido: {name}")
+        if port not in self.workers:
+            self.workers[port] = _Worker(PortSpec(port, baudrate, parity, interval), self.context)
+        devices = self.workers[port].spec.devices
+        if slave in devices:
+            raise ValueError(f"Escravo {slave} repetido em {port}")
+        devices[slave] = name
+        return name
+
+    def add_sink(self, name, sink):
+        """Entrega as leituras do dispositivo `name` a `sink.append(timestamp, leituras)`"""
+        self.sinks.setdefault(name, []).append(sink)
+
+    def add_listener(self, callback):
+        """`callback(dispositivo, leituras)` para cada ciclo com leituras, na thread agregadora"""
+        self._listeners.append(callback)
+
+    def add_state_listener(self, callback):
+        """`callback(dispositivo, estado_anterior, novo_estado)` para transições de conexão"""
+        self._state_listeners.append(callback)
+
+    def start(self):
+        self._stop_event.clear()
+        for worker in self.workers.values():
+            self._start_worker(worker)
+        self._thread = threading.Thread(target=self._run, name='supervisor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for worker in self.workers.values():
+            if worker.process is not None:
+                self._request_stop(worker)
+        for worker in self.workers.values():
+            if worker.process is None:
+                continue
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                logger.warning(f"[{worker.spec.name}] Processo não encerrou, forçando término")
+                self._kill(worker)
+            self._close_pipes(worker)
+            worker.process = None
+
+    def _start_worker(self, worker):
+        receiver, sender = self.context.Pipe(duplex=False)
+        control_receiver, control_sender = self.context.Pipe(duplex=False)
+        worker.heartbeat.value = time.monotonic()
+        worker.process = self.context.Process(
+            target=run_worker,
+            args=(worker.spec, sender, control_receiver, worker.heartbeat, self.log_level),
+            name=f"tps-{worker.spec.name}",
+            daemon=True
+        )
+        worker.process.start()
+        # Só o filho usa estas pontas; fechá-las aqui faz o fim de um lado ser visto como EOF pelo outro
+        sender.close()
+        control_receiver.close()
+        worker.receiver = receiver
+        worker.control = control_sender
+        worker.started = time.monotonic()
+        worker.restart_at = None
+        logger.info(f"[{worker.spec.name}] Processo de aquisição iniciado (pid {worker.process.pid}) "
+                    f"para {list(worker.spec.devices.values())}")
+
+    def _run(self):
+        """Thread agregadora: recebe as mensagens de todos os processos e verifica sua saúde"""
+        next_check = time.monotonic()
+        while not self._stop_event.is_set():
+            receivers = {worker.receiver: worker for worker in self.workers.values() if worker.receiver}
+            ready = connection.wait(list(receivers), timeout=CHECK_INTERVAL) if receivers else []
+            if not receivers:
+                self._stop_event.wait(CHECK_INTERVAL)
+            for receiver in ready:
+                worker = receivers[receiver]
+                try:
+                    while receiver.poll():
+                        message = receiver.recv()
+                        try:
+                            self._dispatch(worker, message)
+                        except Exception as e:
+                            logger.error(f"[{worker.spec.name}] Erro ao entregar mensagem: {e}")
+                except (EOFError, OSError):
+                    # Processo terminou: o pipe é descartado e o reinício fica com _check_workers
+                    receiver.close()
+                    worker.receiver = None
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + CHECK_INTERVAL
+
+    def _dispatch(self, worker, message):
+        if message[0] == READINGS:
+            _, slave, timestamp, mask, values = message
+            name = worker.spec.devices[slave]
+            readings = unpack_readings(mask, values)
+            for sink in self.sinks.get(name, ()):
+                sink.append(timestamp, readings)
+            if readings:
+                for callback in self._listeners:
+                    callback(name, readings)
+        elif message[0] == STATE:
+            _, old_state, new_state = message
+            worker.state = new_state
+            for name in worker.spec.devices.values():
+                for callback in self._state_listeners:
+                    callback(name, old_state, new_state)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in self.workers.values():
+            process = worker.process
+            name = worker.spec.name
+            if process is not None and process.is_alive():
+                silence = now - worker.heartbeat.value
+                if silence > self.hang_timeout:
+                    logger.error(f"[{name}] Sem sinal de vida há {silence:.0f}s, encerrando o processo")
+                    self._kill(worker)
+                    self._schedule_restart(worker, now)
+                continue
+            if process is not None:
+                logger.error(f"[{name}] Processo terminou (código {process.exitcode})")
+                self._schedule_restart(worker, now)
+            if worker.restart_at is not None and now >= worker.restart_at:
+                worker.restarts += 1
+                self._start_worker(worker)
+
+    def _schedule_restart(self, worker, now):
+        if now - worker.started > SUPERVISOR_RESTART_MAX:
+            worker.restart_delay = SUPERVISOR_RESTART_INITIAL  # Rodou bem por um tempo: volta ao início
+        worker.process = None
+        self._close_pipes(worker)
+        worker.restart_at = now + worker.restart_delay
+        logger.info(f"[{worker.spec.name}] Reinício em {worker.restart_delay:.0f}s")
+        worker.restart_delay = min(worker.restart_delay * 2, SUPERVISOR_RESTART_MAX)
+
+    def _request_stop(self, worker):
+        try:
+            worker.control.send(None)
+        except (OSError, ValueError):
+            pass  # Processo já terminou
+
+    def _close_pipes(self, worker):
+        for pipe in (worker.receiver, worker.control):
+            if pipe is not None:
+                pipe.close()
+        worker.receiver = None
+        worker.control = None
+
+    def _kill(self, worker):
+        worker.process.terminate()
+        worker.process.join(2)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+
+class JsonLinesSink:
+    """Consumidor que grava uma linha JSON por ciclo, com o nome do dispositivo"""
+
+    def __init__(self, output, device):
+        self.output = output
+        self.device = device
+
+    def append(self, timestamp, readings):
+        self.output.write(json.dumps({'timestamp': timestamp, 'device': self.device, 'readings': readings}) + '\n')
+        self.output.flush()
+
+
+def parse_port(text):
+    """'porta', 'porta:escravo' ou 'porta:escravo,escravo' (ex.: /dev/ttyUSB1:31, COM4:30,31)"""
+    port, _, slaves = text.rpartition(':')
+    if port and all(slave.isdigit() for slave in slaves.split(',')):
+        return port, [int(slave) for slave in slaves.split(',')]
+    return text, [SLAVE_ADDRESS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aquisição do TPS com um processo por porta serial")
+    parser.add_argument('ports', nargs='+', help="Portas, opcionalmente com os escravos (ex.: /dev/ttyUSB1:31,32)")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Intervalo do laço de leitura (s)")
+    parser.add_argument('--output', help="Repassa as leituras como JSON por linha ('-' para a saída padrão)")
+    parser.add_argument('--metrics-host', default=METRICS_HOST, help="Endereço do endpoint /metrics")
+    parser.add_argument('--metrics-port', type=int, default=0, help="Porta do endpoint /metrics (0 desativa)")
+    parser.add_argument('--log-level', default='INFO', help="DEBUG, INFO, WARNING ou ERROR")
+    args = parser.parse_args(argv)
+
+    log_level = getattr(logging, args.log_level.upper(), logging.INFO)
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s')
+    supervisor = Supervisor(log_level=log_level)
+    output = None
+    if args.output:
+        output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    metrics = MetricsExporter(args.metrics_host, args.metrics_port) if args.metrics_port else None
+    for text in args.ports:
+        port, slaves = parse_port(text)
+        for slave in slaves:
+            name = supervisor.add_port(port, slave, interval=args.interval)
+            if output:
+                supervisor.add_sink(name, JsonLinesSink(output, name))
+            if metrics:
+                supervisor.add_sink(name, metrics.add_source(name, slave))
+    supervisor.add_state_listener(lambda device, old_state, new_state: logger.info(f"[{device}] Conexão: {new_state}"))
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    if metrics:
+        metrics.start()
+    supervisor.start()
+    try:
+        stop.wait()
+    finally:
+        supervisor.stop()
+        if metrics:
+            metrics.stop()
+        if output and output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
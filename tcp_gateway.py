@@ -0,0 +1,212 @@
+# tcp_gateway.py
+"""Servidor Modbus TCP que repassa as últimas leituras em cache.
+
+O processo de aquisição é o único dono da porta serial; a UI, o SCADA e as
+ferramentas de teste leem os mesmos registros por TCP, em qualquer número,
+sem gerar requisições no barramento RS-485:
+
+    python daemon.py --port /dev/ttyUSB0 --gateway-port 5020
+    python benchmark.py --host 127.0.0.1 --tcp-port 5020
+"""
+import asyncio
+import logging
+import threading
+import time
+
+try:
+    from config import POLL_PERIODS, DEFAULT_POLL_PERIOD, GATEWAY_HOST, GATEWAY_PORT, GATEWAY_MAX_AGE, GATEWAY_AGE_REGISTER
+    from register_schema import REGISTERS
+    import modbus_frames as frames
+except ImportError:
+    from .config import POLL_PERIODS, DEFAULT_POLL_PERIOD, GATEWAY_HOST, GATEWAY_PORT, GATEWAY_MAX_AGE, GATEWAY_AGE_REGISTER
+    from .register_schema import REGISTERS
+    from . import modbus_frames as frames
+
+logger = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+
+
+class RegisterCache:
+    """Últimos valores brutos por endereço, alimentado como consumidor (sink) do ModbusClient.
+
+    Cada ciclo publica um novo dicionário {endereço: (valor bruto, instante)}
+    substituído em uma única atribuição; o servidor lê sempre uma versão
+    completa sem travar a thread de aquisição.
+    """
+
+    def __init__(self):
+        self.registers = {}
+        self.last_update = None
+
+    def append(self, timestamp, readings):
+        now = time.monotonic()
+        fresh = {}
+        for name, value in readings.items():
+            spec = REGISTERS.get(name)
+            if value is not None and spec is not None:
+                # Valores de 32 bits ocupam dois endereços, na ordem de palavras do esquema
+                for address, word in enumerate(spec.encode(value), spec.address):
+                    fresh[address] = (word, now)
+        if fresh:
+            # Ciclos sem nenhuma resposta não renovam o cache nem a idade
+            self.registers = {**self.registers, **fresh}
+            self.last_update = now
+
+    def age(self):
+        """Segundos desde a última atualização (None se nunca atualizado)"""
+        if self.last_update is None:
+            return None
+        return time.monotonic() - self.last_update
+
+
+class ModbusTcpGateway:
+    """Atende FC 0x03/0x04 a partir do cache de cada dispositivo, identificado pela unidade.
+
+    Endereços entre o primeiro e o último registro do esquema são
+    válidos (buracos retornam 0). Se algum registro pedido estiver atrasado
+    mais de `max_age` segundos além do seu período de leitura, responde com a
+    exceção 0x0B (dispositivo alvo não respondeu). O registro `age_register` informa a idade do cache em décimos
+    de segundo (0xFFFF se nunca atualizado).
+    """
+
+    def __init__(self, host=GATEWAY_HOST, port=GATEWAY_PORT, max_age=GATEWAY_MAX_AGE,
+                 age_register=GATEWAY_AGE_REGISTER):
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self.age_register = age_register
+        self.caches = {}  # unidade -> RegisterCache
+        self.first_address = min(spec.address for spec in REGISTERS.values())
+        self.last_address = max(spec.end for spec in REGISTERS.values())
+        # Idade máxima aceita por endereço: período de leitura do registro + max_age
+        self.limits = {address: POLL_PERIODS.get(name, DEFAULT_POLL_PERIOD) + max_age
+                       for name, spec in REGISTERS.items() for address in range(spec.address, spec.end + 1)}
+        self.stats = {'clients': 0, 'requests': 0, 'stale': 0, 'exceptions': 0, 'malformed': 0}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._writers = set()
+        self._ready = threading.Event()
+
+    def add_device(self, unit, modbus_client):
+        """Serve as leituras de `modbus_client` na unidade Modbus `unit`"""
+        cache = RegisterCache()
+        modbus_client.add_sink(cache)
+        self.caches[unit] = cache
+        return cache
+
+    def handle_pdu(self, unit, pdu):
+        """PDU de resposta para um PDU de requisição, consultando apenas o cache"""
+        self.stats['requests'] += 1
+        function = pdu[0] if pdu else 0
+        if function not in (frames.READ_INPUT_REGISTERS, READ_HOLDING_REGISTERS):
+            return self._exception(function, frames.ILLEGAL_FUNCTION)
+        try:
+            _, address, count = frames.parse_read_request(pdu)
+        except ValueError:
+            return self._exception(function, frames.ILLEGAL_DATA_VALUE)
+        if not 1 <= count <= 125:
+            return self._exception(function, frames.ILLEGAL_DATA_VALUE)
+
+        cache = self.caches.get(unit)
+        if cache is None and len(self.caches) == 1 and unit in (0, 255):
+            # Unidades 0 e 255 são usadas por clientes TCP que ignoram o endereço
+            cache = next(iter(self.caches.values()))
+        if cache is None:
+            return self._exception(function, frames.GATEWAY_TARGET_FAILED)
+
+        registers = cache.registers
+        now = time.monotonic()
+        values = []
+        for current in range(address, address + count):
+            if current == self.age_register:
+                age = cache.age()
+                values.append(0xFFFF if age is None else min(int(age * 10), 0xFFFF))
+            elif self.first_address <= current <= self.last_address:
+                entry = registers.get(current)
+                if entry is None:
+                    if current in self.limits:
+                        # Registro mapeado ainda não lido
+                        self.stats['stale'] += 1
+                        return self._exception(function, frames.GATEWAY_TARGET_FAILED)
+                    values.append(0)
+                    continue
+                value, updated = entry
+                if now - updated > self.limits[current]:
+                    self.stats['stale'] += 1
+                    return self._exception(function, frames.GATEWAY_TARGET_FAILED)
+                values.append(value)
+            else:
+                return self._exception(function, frames.ILLEGAL_DATA_ADDRESS)
+        return frames.read_registers_response(values, function)
+
+    def _exception(self, function, code):
+        self.stats['exceptions'] += 1
+        return frames.exception_response(function, code)
+
+    async def _handle_client(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        self.stats['clients'] += 1
+        self._writers.add(writer)
+        logger.info(f"Cliente Modbus TCP conectado: {peer}")
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, protocol, length, unit = frames.parse_mbap_header(header)
+                if not 1 <= length <= frames.MAX_PDU_SIZE:
+                    # Campo de tamanho inválido: não há como ressincronizar o fluxo
+                    self.stats['malformed'] += 1
+                    logger.warning(f"Quadro MBAP inválido de {peer} (tamanho {length + 1}); encerrando conexão")
+                    break
+                pdu = await reader.readexactly(length)
+                if protocol != 0:
+                    continue
+                writer.write(frames.mbap_frame(transaction_id, unit, self.handle_pdu(unit, pdu)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.stats['clients'] -= 1
+            self._writers.discard(writer)
+            writer.close()
+            logger.info(f"Cliente Modbus TCP desconectado: {peer}")
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        logger.info(f"Gateway Modbus TCP em {self.host}:{self.port} (unidades {sorted(self.caches)})")
+        self._ready.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def _close(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+
+    def start(self):
+        """Executa o servidor em thread própria, com seu próprio loop asyncio; False se não abriu a porta"""
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name='gateway', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self._server is not None
+
+    def _run(self):
+        try:
+            asyncio.run(self.serve())
+        except OSError as e:
+            logger.error(f"Não foi possível abrir o gateway em {self.host}:{self.port}: {e}")
+            self._ready.set()
+
+    def stop(self):
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._close)
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+        self._server = None
@@ -1,4 +1,5 @@
 # test_response_time.py
+import sys
 import time
 import statistics
 from pymodbus.client import ModbusSerialClient
@@ -40,7 +41,8 @@ def test_single_register_timing(client, name, address, iterations=50):
             'std_dev': statistics.stdev(times) if len(times) > 1 else 0,
             'success_count': len(times),
             'error_count': errors,
-            'success_rate': (len(times) / iterations) * 100
+            'success_rate': (len(times) / iterations) * 100,
+            'samples': times
         }
     else:
         return {
@@ -53,7 +55,8 @@ def test_single_register_timing(client, name, address, iterations=50):
             'std_dev': 0,
             'success_count': 0,
             'error_count': errors,
-            'success_rate': 0
+            'success_rate': 0,
+            'samples': []
         }
 
 def test_all_registers_timing(client, iterations=100):
@@ -120,12 +123,11 @@ def print_summary(results):
                   f"{result['min_time']:<8.2f} {result['max_time']:<8.2f} "
                   f"{result['avg_time']:<10.2f} {result['success_rate']:<8.1f}")
         
-        # Estatísticas gerais
+        # Estatísticas gerais sobre as amostras reais de todos os registros
         all_times = []
         for result in successful_results:
-            # Simula os tempos baseado na média (aproximação)
-            all_times.extend([result['avg_time']] * result['success_count'])
-        
+            all_times.extend(result['samples'])
+
         if all_times:
             print("\n" + "="*40)
             print("ESTATÍSTICAS GERAIS:")
@@ -133,17 +135,19 @@ def print_summary(results):
             print(f"Tempo máximo geral:  {max(all_times):.2f}ms")
             print(f"Tempo médio geral:   {statistics.mean(all_times):.2f}ms")
             print(f"Mediana geral:       {statistics.median(all_times):.2f}ms")
-            print(f"Desvio padrão:       {statistics.stdev(all_times):.2f}ms")
+            print(f"Desvio padrão:       {statistics.stdev(all_times) if len(all_times) > 1 else 0:.2f}ms")
     else:
         print("NENHUM REGISTRO RESPONDEU COM SUCESSO!")
 
 def main():
+    port = sys.argv[1] if len(sys.argv) > 1 else 'COM4'
     print("=== TESTE DE TEMPOS DE RESPOSTA DO TPS ===")
+    print(f"Porta: {port} (benchmark completo com JSON e baseline: benchmark.py)")
     print(f"Timeout configurado: {TIMEOUT}s")
     
     # Conecta
     client = ModbusSerialClient(
-        port='COM4',
+        port=port,
         baudrate=BAUDRATE,
         bytesize=BYTESIZE,
         parity=PARITY,
@@ -158,7 +162,7 @@ def main():
     print("Conectado com sucesso!")
     
     # Teste 1: Registro individual (mais iterações)
-    temp_result = test_single_register_timing(client, 'temperatura_bateria', 76, 100)
+    temp_result = test_single_register_timing(client, 'temperatura_bateria', REGISTER_MAP['temperatura_bateria'], 100)
     
     # Teste 2: Todos os registros
     all_results = test_all_registers_timing(client, 100)
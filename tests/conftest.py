@@ -0,0 +1,29 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# Os módulos ficam na raiz do repositório (sem pacote)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def rtu_simulator():
+    """Fábrica de simuladores RTU em pseudo-terminal: rtu_simulator(**opções) -> (simulador, porta)"""
+    if os.name != 'posix':
+        pytest.skip("Simulador RTU exige pseudo-terminais (POSIX)")
+    from simulator import TPSSimulator
+
+    simulators = []
+
+    def start(**options):
+        options.setdefault('latency', 0.002)
+        options.setdefault('seed', 1)
+        simulator = TPSSimulator(**options)
+        simulators.append(simulator)
+        return simulator, simulator.start_pty()
+
+    yield start
+    for simulator in simulators:
+        simulator.stop()
@@ -0,0 +1,60 @@
+# test_adaptive_timeout.py
+import pytest
+
+from adaptive_timeout import AdaptiveTimeout
+from config import TIMEOUT
+from modbus_client import ModbusClient
+
+
+def test_config_timeout_until_min_samples():
+    latency = AdaptiveTimeout(min_samples=5, floor=0.01, ceiling=1.0, margin=0.0)
+    for _ in range(4):
+        latency.record(0.02)
+    assert latency.timeout == pytest.approx(min(max(TIMEOUT, 0.01), 1.0))
+    latency.record(0.02)
+    assert latency.timeout == pytest.approx(0.02)
+
+
+def test_percentile_margin_and_clamp():
+    latency = AdaptiveTimeout(window=100, min_samples=1, percentile=99, margin=0.01, floor=0.05, ceiling=0.5)
+    for _ in range(98):
+        latency.record(0.001)
+    assert latency.timeout == pytest.approx(0.05)  # Piso
+    latency.record(0.2)
+    latency.record(0.2)  # p99 de 100 amostras: a segunda maior
+    assert latency.timeout == pytest.approx(0.21)
+    for _ in range(2):
+        latency.record(2.0)
+    assert latency.timeout == pytest.approx(0.5)  # Teto
+
+
+def test_timeout_doubles_until_ceiling_and_reset():
+    latency = AdaptiveTimeout(min_samples=1, margin=0.0, floor=0.05, ceiling=0.3)
+    latency.record(0.06)
+    latency.record_timeout()
+    assert latency.timeout == pytest.approx(0.12)
+    latency.record_timeout()
+    latency.record_timeout()
+    assert latency.timeout == pytest.approx(0.3)
+    latency.reset()
+    assert not latency.samples
+
+
+def test_lost_frames_are_timeouts_not_latency_samples(rtu_simulator):
+    """Com perda de quadros, cada perda conta como timeout e a latência medida continua a da resposta"""
+    simulator, port = rtu_simulator(drop_rate=0.1, seed=7)
+    client = ModbusClient()
+    assert client.connect(port)
+    try:
+        for _ in range(80):
+            client.read_all()
+        latency = client.latency
+        assert simulator.stats['dropped'] > 0
+        # Sem novas tentativas do pymodbus: cada quadro perdido é exatamente um timeout
+        assert client.stats['timeouts'] == simulator.stats['dropped']
+        assert client.stats['requests'] == simulator.stats['requests']
+        # Nenhuma amostra inclui o tempo de uma nova tentativa (múltiplos do timeout)
+        assert max(latency.samples) < latency.floor
+        assert latency.timeout < TIMEOUT
+    finally:
+        client.disconnect()
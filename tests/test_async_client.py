@@ -0,0 +1,53 @@
+# test_async_client.py
+import asyncio
+import socket
+
+from async_client import AsyncAcquisitionEngine
+from simulator import TPSSimulator
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def run_until_stopped(engine, simulator, port, ready):
+    server = asyncio.create_task(simulator.serve_tcp('127.0.0.1', port))
+    await asyncio.sleep(0.1)
+    run = asyncio.create_task(engine.run())
+    try:
+        await asyncio.wait_for(ready.wait(), 5.0)
+        await asyncio.sleep(0.3)  # Requisições à unidade morta em andamento
+        engine.stop()
+        await asyncio.wait_for(run, 3.0)
+    finally:
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+
+def test_run_returns_with_dead_unit():
+    """stop() encerra o motor mesmo com uma requisição à unidade sem resposta pendente"""
+    simulator = TPSSimulator(slaves=[30], latency=0.002, seed=1)
+    port = free_port()
+    engine = AsyncAcquisitionEngine(interval=0.05)
+    live = engine.add_tcp_device('127.0.0.1', port, slave=30, name='viva')
+    dead = engine.add_tcp_device('127.0.0.1', port, slave=32, name='morta')
+    received = []
+
+    async def main():
+        ready = asyncio.Event()
+
+        def on_readings(name, readings):
+            received.append((name, readings))
+            if name == 'viva':
+                ready.set()
+
+        engine.add_listener(on_readings)
+        await run_until_stopped(engine, simulator, port, ready)
+
+    asyncio.run(main())
+    assert any(value is not None for name, readings in received if name == 'viva' for value in readings.values())
+    assert all(value is None for name, readings in received if name == 'morta' for value in readings.values())
+    assert live.last_readings
+    assert not dead.last_readings
@@ -0,0 +1,49 @@
+# test_bus_scheduler.py
+import time
+
+import pytest
+
+from bus_scheduler import BusScheduler, inter_frame_delay
+from circuit_breaker import OPEN
+from config import POLL_INTERVAL
+
+
+def test_inter_frame_delay():
+    assert inter_frame_delay(9600, bytesize=8, parity='N', stopbits=1) == pytest.approx(3.5 * 10 / 9600)
+    assert inter_frame_delay(115200) == pytest.approx(0.00175)
+
+
+@pytest.fixture
+def bus(rtu_simulator):
+    simulator, port = rtu_simulator(slaves=[30, 31])
+    bus = BusScheduler(port, slaves=[30, 31, 32])  # 32 não responde
+    assert bus.connect()
+    yield bus
+    bus.disconnect()
+
+
+def test_poll_serves_each_due_slave_once(bus):
+    assert bus.test_connection()
+    served = []
+    bus.add_listener(lambda slave, readings: served.append(slave))
+    results = bus.poll()
+    assert sorted(served) == [30, 31, 32]
+    assert results[(30, 'tensao_bateria')] is not None
+    assert results[(32, 'tensao_bateria')] is None
+
+
+def test_dead_slave_does_not_starve_live_ones(bus):
+    """O escravo sem resposta abre o disjuntor e passa a custar só sondagens espaçadas"""
+    cycles = 0
+    started = time.monotonic()
+    while time.monotonic() - started < 3.0:
+        bus.poll()
+        cycles += 1
+        time.sleep(POLL_INTERVAL)
+    health = bus.health()
+    assert health[32]['state'] == OPEN
+    assert health[32]['last_ok'] is None
+    for slave in (30, 31):
+        assert health[slave]['errors'] == 0
+        assert health[slave]['polls'] >= cycles // 2
+    assert abs(health[30]['polls'] - health[31]['polls']) <= 1
@@ -0,0 +1,62 @@
+# test_charts.py
+import numpy as np
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from charts import decimate_minmax  # noqa: E402
+
+
+def reference(times, values, start, end, buckets):
+    """Mínimo/máximo por janela calculados amostra a amostra"""
+    low = np.full(buckets, np.nan)
+    high = np.full(buckets, np.nan)
+    width = (end - start) / buckets
+    for t, v in zip(times, values):
+        if start <= t < end and not np.isnan(v):
+            i = min(int((t - start) / width), buckets - 1)
+            low[i] = np.fmin(low[i], v)
+            high[i] = np.fmax(high[i], v)
+    return low, high
+
+
+def test_single_segment_matches_reference():
+    rng = np.random.default_rng(1)
+    times = np.sort(rng.uniform(0, 100, 5000))
+    values = rng.normal(size=5000).astype(np.float32)
+    centers, low, high = decimate_minmax([(times, values)], 10, 90, 40)
+
+    expected_low, expected_high = reference(times, values, 10, 90, 40)
+    np.testing.assert_allclose(centers, np.arange(40) * 2 + 11)
+    np.testing.assert_array_equal(low, expected_low)
+    np.testing.assert_array_equal(high, expected_high)
+
+
+def test_segments_of_a_wrapped_ring_are_combined():
+    times = np.arange(20, dtype=np.float64)
+    values = np.arange(20, dtype=np.float32)
+    segments = [(times[:7], values[:7]), (times[7:], values[7:])]  # Fronteira no meio de uma janela
+    _, low, high = decimate_minmax(segments, 0, 20, 4)
+    np.testing.assert_array_equal(low, [0, 5, 10, 15])
+    np.testing.assert_array_equal(high, [4, 9, 14, 19])
+
+
+def test_empty_windows_and_gaps_are_nan():
+    times = np.array([0.5, 0.6, 3.5])
+    values = np.array([1.0, np.nan, -2.0], dtype=np.float32)
+    _, low, high = decimate_minmax([(times, values)], 0, 4, 4)
+    np.testing.assert_array_equal(low, [1.0, np.nan, np.nan, -2.0])
+    np.testing.assert_array_equal(high, [1.0, np.nan, np.nan, -2.0])
+
+
+def test_range_is_half_open_and_outside_samples_ignored():
+    times = np.array([-1.0, 0.0, 9.999, 10.0, 11.0])
+    values = np.array([100.0, 1.0, 2.0, 100.0, 100.0], dtype=np.float32)
+    _, low, high = decimate_minmax([(times, values)], 0, 10, 2)
+    np.testing.assert_array_equal(low, [1.0, 2.0])
+    np.testing.assert_array_equal(high, [1.0, 2.0])
+
+
+def test_no_segments():
+    _, low, high = decimate_minmax([], 0, 10, 5)
+    assert np.isnan(low).all() and np.isnan(high).all()
@@ -0,0 +1,81 @@
+# test_circuit_breaker.py
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def breaker():
+    breaker = CircuitBreaker(threshold=3, probe_initial=1.0, probe_max=4.0)
+    breaker.transitions = []
+    breaker.add_listener(lambda old, new: breaker.transitions.append((old, new)))
+    return breaker
+
+
+def test_opens_after_threshold_consecutive_failures(breaker):
+    breaker.record_failure(now=0.0)
+    breaker.record_failure(now=0.1)
+    assert breaker.allows_requests()
+    breaker.record_failure(now=0.2)
+    assert breaker.state == OPEN
+    assert not breaker.allows_requests()
+    assert breaker.next_probe == pytest.approx(1.2)
+    assert breaker.transitions == [(CLOSED, OPEN)]
+
+
+def test_success_resets_failure_count(breaker):
+    breaker.record_failure(now=0.0)
+    breaker.record_failure(now=0.0)
+    breaker.record_success()
+    breaker.record_failure(now=0.0)
+    breaker.record_failure(now=0.0)
+    assert breaker.state == CLOSED
+    assert breaker.transitions == []
+
+
+def test_probe_interval_doubles_up_to_max(breaker):
+    for _ in range(3):
+        breaker.record_failure(now=0.0)
+    now = 0.0
+    intervals = []
+    for _ in range(4):
+        assert not breaker.probe_due(now=breaker.next_probe - 0.01)
+        now = breaker.next_probe
+        assert breaker.probe_due(now=now)
+        breaker.begin_probe()
+        assert breaker.state == HALF_OPEN
+        breaker.record_failure(now=now)
+        intervals.append(breaker.probe_interval)
+    assert intervals == [2.0, 4.0, 4.0, 4.0]
+
+
+def test_successful_probe_closes(breaker):
+    for _ in range(3):
+        breaker.record_failure(now=0.0)
+    breaker.begin_probe()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.probe_interval == 1.0
+    assert breaker.transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+
+def test_reset_does_not_notify(breaker):
+    for _ in range(3):
+        breaker.record_failure(now=0.0)
+    breaker.reset()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.transitions == [(CLOSED, OPEN)]
+
+
+def test_listener_errors_do_not_break_transitions(breaker):
+    def failing(old, new):
+        raise RuntimeError("falha no listener")
+
+    breaker.add_listener(failing)
+    for _ in range(3):
+        breaker.record_failure(now=0.0)
+    assert breaker.state == OPEN
+    breaker.remove_listener(failing)
+    breaker.begin_probe()
+    assert breaker.transitions[-1] == (OPEN, HALF_OPEN)
@@ -0,0 +1,43 @@
+# test_daemon.py
+import pytest
+
+from daemon import DEFAULTS, Daemon
+from sample_codec import SampleDecoder
+
+
+@pytest.fixture
+def options(rtu_simulator):
+    simulator, port = rtu_simulator(slaves=[30])
+    options = dict(DEFAULTS)
+    options.update(port=port, slave=30, interval=0.05, historian=False, rollups=False, metrics_port=0,
+                   gateway_port=0, snapshot=None)
+    return options
+
+
+class ListSink:
+    def __init__(self):
+        self.samples = []
+
+    def append(self, timestamp, readings):
+        self.samples.append((timestamp, readings))
+
+
+def run_cycles(daemon, cycles):
+    daemon.loop.add_cycle_listener(lambda duration: daemon.loop.cycles >= cycles and daemon.stop())
+    daemon.run()
+
+
+def test_archive_writes_decodable_samples(options, tmp_path):
+    options.update(interval=0.25, archive=str(tmp_path / 'leituras.tpsc'))
+    daemon = Daemon(options)
+    published = ListSink()
+    daemon.modbus_client.add_sink(published)
+    run_cycles(daemon, 4)
+    with open(options['archive'], 'rb') as f:
+        decoder = SampleDecoder(f)
+        samples = list(decoder)
+    assert len(published.samples) >= 2
+    assert len(samples) == len(published.samples)
+    for (timestamp, readings), (decoded_time, decoded) in zip(published.samples, samples):
+        assert decoded_time == pytest.approx(timestamp, abs=0.001)
+        assert decoded == pytest.approx({name: readings.get(name) for name in decoder.names})
@@ -0,0 +1,88 @@
+# test_deadband.py
+import pytest
+
+from deadband import DeadbandFilter, parse_deadband
+
+
+@pytest.fixture
+def band():
+    band = DeadbandFilter({'v': 0.15, 'i': '2%'}, default=0.0, heartbeat=10.0)
+    band.changes({'v': 50.0, 'i': 100.0, 'f': 60.0}, now=0.0)
+    return band
+
+
+@pytest.mark.parametrize('value, expected', [(0.5, (0.5, 0.0)), (2, (2.0, 0.0)), ('2%', (0.0, 0.02)),
+                                             (' 0.5 % ', (0.0, 0.005))])
+def test_parse_deadband(value, expected):
+    assert parse_deadband(value) == pytest.approx(expected)
+
+
+def test_parse_deadband_rejects_text_without_percent():
+    with pytest.raises(ValueError):
+        parse_deadband('0.5')
+
+
+def test_first_call_returns_full_state():
+    band = DeadbandFilter({}, heartbeat=10.0)
+    assert band.changes({'a': 1.0, 'b': None}, now=0.0) == {'a': 1.0, 'b': None}
+
+
+def test_absolute_band(band):
+    assert band.changes({'v': 50.1}, now=1.0) == {}
+    assert band.changes({'v': 50.2}, now=2.0) == {'v': 50.2}  # Comparado com o último publicado (50.0)
+    assert band.changes({'v': 50.1}, now=3.0) == {}
+
+
+def test_relative_band(band):
+    assert band.changes({'i': 101.5}, now=1.0) == {}
+    assert band.changes({'i': 97.9}, now=2.0) == {'i': 97.9}
+
+
+def test_relative_band_handles_negative_values():
+    band = DeadbandFilter({'i': '10%'}, heartbeat=10.0)
+    band.changes({'i': -20.0}, now=0.0)
+    assert band.changes({'i': -21.0}, now=1.0) == {}
+    assert band.changes({'i': -23.0}, now=2.0) == {'i': -23.0}
+
+
+def test_default_band_passes_any_change(band):
+    assert band.changes({'f': 60.0}, now=1.0) == {}
+    assert band.changes({'f': 60.01}, now=2.0) == {'f': 60.01}
+
+
+def test_failures_always_pass(band):
+    assert band.changes({'v': None}, now=1.0) == {'v': None}
+    assert band.changes({'v': None}, now=2.0) == {}
+    assert band.changes({'v': 50.0}, now=3.0) == {'v': 50.0}
+
+
+def test_unknown_register_passes_first_time(band):
+    assert band.changes({'novo': None}, now=1.0) == {'novo': None}
+    assert band.changes({'novo': None}, now=2.0) == {}
+
+
+def test_heartbeat_returns_full_state(band):
+    band.changes({'v': 50.3}, now=5.0)
+    assert band.changes({'v': 50.3}, now=9.9) == {}
+    assert band.changes({'v': 50.31}, now=10.0) == {'v': 50.31, 'i': 100.0, 'f': 60.0}
+    assert band.changes({'v': 50.31}, now=15.0) == {}
+
+
+def test_heartbeat_disabled():
+    band = DeadbandFilter({}, heartbeat=0)
+    band.changes({'a': 1.0}, now=0.0)
+    assert band.changes({'a': 1.0}, now=1e6) == {}
+
+
+def test_reset_republishes_everything(band):
+    band.reset()
+    assert band.changes({'v': 50.0}, now=1.0) == {'v': 50.0}
+    assert band.changes({'v': 50.0}, now=2.0) == {}
+
+
+def test_suppression_fraction():
+    band = DeadbandFilter({}, heartbeat=100.0)
+    assert band.suppression() == 0.0
+    band.changes({'a': 1.0, 'b': 2.0}, now=0.0)
+    band.changes({'a': 1.0, 'b': 3.0}, now=1.0)
+    assert band.suppression() == pytest.approx(0.25)
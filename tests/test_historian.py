@@ -0,0 +1,22 @@
+# test_historian.py
+import glob
+import os
+import sqlite3
+
+from historian import FILE_PREFIX, Historian
+
+
+def test_rotation_counts_the_wal_file(tmp_path):
+    """Antes do checkpoint automático os dados ficam no -wal; a rotação precisa somá-lo"""
+    historian = Historian(str(tmp_path), flush_interval=0.01, batch_size=50, max_file_mb=0.1, retention_days=0)
+    historian.start()
+    for index in range(3000):
+        historian.append(float(index), {'tensao_bateria': 53.6, 'corrente_bateria': index / 10})
+    historian.stop()
+
+    paths = sorted(glob.glob(os.path.join(str(tmp_path), f"{FILE_PREFIX}*.db")))
+    assert len(paths) > 1
+    rows = sum(sqlite3.connect(path).execute("SELECT COUNT(*) FROM readings").fetchone()[0] for path in paths)
+    assert rows == historian.written == 3000
+    for path in paths[:-1]:
+        assert not os.path.exists(path + '-wal') or os.path.getsize(path + '-wal') == 0
@@ -0,0 +1,92 @@
+# test_history.py
+import numpy as np
+import pytest
+
+from history import ReadingHistory
+
+
+@pytest.fixture
+def history():
+    return ReadingHistory(capacity=5, names=['a', 'b'])
+
+
+def fill(history, count, start=0):
+    for index in range(start, start + count):
+        history.append(float(index), {'a': index, 'b': -index})
+
+
+def joined(parts):
+    return np.concatenate([times for times, _ in parts]), np.concatenate([values for _, values in parts], axis=1)
+
+
+def test_append_before_wrap(history):
+    fill(history, 3)
+    assert len(history) == 3
+    parts = history.segments()
+    assert len(parts) == 1
+    times, values = parts[0]
+    assert list(times) == [0, 1, 2]
+    assert list(values[1]) == [0, -1, -2]
+
+
+def test_wrap_at_capacity_keeps_newest(history):
+    fill(history, 8)
+    assert len(history) == 5
+    assert history.head == 3
+    times, values = history.latest()
+    assert list(times) == [3, 4, 5, 6, 7]
+    assert list(values[0]) == [3, 4, 5, 6, 7]
+
+
+def test_segments_across_wrap_are_views_in_order(history):
+    fill(history, 8)
+    parts = history.segments()
+    assert [list(times) for times, _ in parts] == [[3, 4], [5, 6, 7]]
+    assert all(np.shares_memory(times, history.timestamps) for times, _ in parts)
+    assert [list(times) for times, _ in history.segments(2)] == [[6, 7]]
+    assert [list(times) for times, _ in history.segments(4)] == [[4], [5, 6, 7]]
+
+
+def test_exactly_full_buffer(history):
+    fill(history, 5)
+    times, _ = joined(history.segments())
+    assert list(times) == [0, 1, 2, 3, 4]
+
+
+def test_missing_and_failed_registers_are_nan(history):
+    history.append(0.0, {'a': 1.0, 'b': 2.0})
+    history.append(1.0, {'a': None})
+    history.append(2.0, {'b': 3.0, 'desconhecido': 9.0})
+    _, values = history.latest()
+    assert np.isnan(values[1, 1])
+    assert np.isnan(values[0, 1])
+    assert np.isnan(values[0, 2])
+    assert values[1, 2] == 3.0
+
+
+def test_overwritten_slot_does_not_keep_old_values(history):
+    fill(history, 5)
+    history.append(5.0, {'a': 50.0})  # Sobrescreve a amostra 0, que tinha 'b'
+    times, values = history.latest(1)
+    assert list(times) == [5.0]
+    assert values[0, 0] == 50.0
+    assert np.isnan(values[1, 0])
+
+
+def test_since_and_series_across_wrap(history):
+    fill(history, 8)
+    assert list(joined(history.since(4.5))[0]) == [5, 6, 7]
+    assert list(joined(history.since(3.0))[0]) == [3, 4, 5, 6, 7]
+    assert history.since(10.0) == []
+    series = history.series('b')
+    assert [list(values) for _, values in series] == [[-3, -4], [-5, -6, -7]]
+
+
+def test_empty_and_clear(history):
+    assert history.segments() == []
+    times, values = history.latest()
+    assert times.size == 0 and values.shape == (2, 0)
+    fill(history, 3)
+    history.clear()
+    assert len(history) == 0
+    assert history.segments() == []
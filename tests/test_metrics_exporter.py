@@ -0,0 +1,27 @@
+# test_metrics_exporter.py
+import time
+
+from metrics_exporter import MetricsExporter, escape_label
+
+
+def test_escape_label_plain_values_unchanged():
+    assert escape_label('/dev/ttyUSB0') == '/dev/ttyUSB0'
+    assert escape_label(30) == '30'
+
+
+def test_escape_label_windows_path_quotes_and_newline():
+    assert escape_label('C:\\capturas\\campo.tpsf') == 'C:\\\\capturas\\\\campo.tpsf'
+    assert escape_label('sala "2"') == 'sala \\"2\\"'
+    assert escape_label('a\nb') == 'a\\nb'
+
+
+def test_source_without_client_exports_readings_only():
+    exporter = MetricsExporter()
+    sink = exporter.add_source('/dev/ttyUSB1:31', 31)
+    sink.append(time.time(), {'tensao_bateria': 53.6, 'corrente_bateria': None})
+    text = exporter.snapshot.decode('utf-8')
+    assert 'tps_reading{device="/dev/ttyUSB1:31",slave="31",register="tensao_bateria"} 53.6' in text
+    assert 'register="corrente_bateria"' not in text
+    assert 'tps_reading_age_seconds{device="/dev/ttyUSB1:31",slave="31"}' in text
+    assert 'tps_link_state{' not in text
+    assert 'tps_requests_total{' not in text
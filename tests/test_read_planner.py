@@ -0,0 +1,93 @@
+# test_read_planner.py
+import pytest
+
+import read_planner
+from read_planner import PollScheduler, ReadBlock, block_members, plan_reads
+from register_schema import load_schema
+
+SCHEMA = {
+    'a': {'address': 10},
+    'b': {'address': 11, 'type': 'u32'},
+    'c': {'address': 14, 'type': 'float32'},
+    'd': {'address': 30},
+}
+
+
+@pytest.fixture
+def specs(monkeypatch):
+    specs = load_schema(SCHEMA)
+    monkeypatch.setattr(read_planner, 'REGISTERS', specs)
+    return specs
+
+
+def as_tuples(blocks):
+    return [(block.start, block.count, block.names) for block in blocks]
+
+
+def test_plan_reads_covers_both_words_of_32_bit_values(specs):
+    blocks = plan_reads(['a', 'b', 'c', 'd'], gap_tolerance=1, max_registers=125)
+    assert as_tuples(blocks) == [
+        (10, 6, [('a', 0), ('b', 1), ('c', 4)]),  # c ocupa 14-15; o buraco em 13 é tolerado
+        (30, 1, [('d', 0)]),
+    ]
+
+
+def test_plan_reads_gap_measured_from_last_word(specs):
+    # b termina em 12: o buraco até c (14) é de um registro, não de dois
+    assert as_tuples(plan_reads(['b', 'c'], gap_tolerance=0, max_registers=125)) == [
+        (11, 2, [('b', 0)]),
+        (14, 2, [('c', 0)]),
+    ]
+    assert len(plan_reads(['b', 'c'], gap_tolerance=1, max_registers=125)) == 1
+
+
+def test_plan_reads_max_registers_counts_second_word(specs):
+    # a + b ocupam 10-12 (3 registros): não cabem em 2
+    assert as_tuples(plan_reads(['a', 'b'], gap_tolerance=5, max_registers=2)) == [
+        (10, 1, [('a', 0)]),
+        (11, 2, [('b', 0)]),
+    ]
+
+
+def test_block_members_excludes_values_cut_by_the_range(specs):
+    assert block_members(10, 2, specs) == [('a', 0)]
+    assert block_members(10, 3, specs) == [('a', 0), ('b', 1)]
+
+
+def test_plan_reads_default_map_is_one_block():
+    blocks = plan_reads()
+    assert len(blocks) == 1
+    assert isinstance(blocks[0], ReadBlock)
+    assert blocks[0].start == 63 and blocks[0].count == 14
+
+
+def read_times(scheduler, name, ticks, interval, jitter):
+    """Simula o laço de aquisição com relógio falso; retorna os instantes em que `name` foi lido"""
+    times = []
+    for tick in range(ticks):
+        now = 1000.0 + tick * interval + jitter[tick % len(jitter)]
+        names = [name for block in scheduler.due_blocks(now) for name, _ in block.names]
+        scheduler.mark_read(names, now)
+        if name in names:
+            times.append(now)
+    return times
+
+
+@pytest.mark.parametrize('jitter', [[0.0], [0.004, 0.001, 0.003, 0.0]])
+def test_period_equal_to_interval_reads_every_cycle(jitter):
+    scheduler = PollScheduler({'tensao_bateria': 0.25})
+    times = read_times(scheduler, 'tensao_bateria', 40, 0.25, jitter)
+    assert len(times) == 40
+
+
+def test_average_period_does_not_drift():
+    scheduler = PollScheduler({'corrente_bateria': 0.5})
+    times = read_times(scheduler, 'corrente_bateria', 400, 0.25, [0.003, 0.0, 0.001])
+    assert (times[-1] - times[0]) / (len(times) - 1) == pytest.approx(0.5, abs=0.005)
+
+
+def test_late_read_restarts_from_now():
+    scheduler = PollScheduler({'tensao_bateria': 0.25})
+    scheduler.mark_read(['tensao_bateria'], 10.0)
+    scheduler.mark_read(['tensao_bateria'], 12.0)  # Ciclo bloqueado por 2 s
+    assert scheduler.next_due['tensao_bateria'] == pytest.approx(12.25)
@@ -0,0 +1,111 @@
+# test_register_schema.py
+import struct
+
+import pytest
+
+from register_schema import DecodePlan, RegisterSpec, compile_block, load_schema
+
+SCHEMA = {
+    'tensao': {'address': 100, 'scale': 10},
+    'corrente': {'address': 101, 'type': 's16', 'scale': 10},
+    # 102: não mapeado
+    'energia': {'address': 103, 'type': 'u32'},
+    'saldo': {'address': 105, 'type': 's32', 'word_order': 'little', 'scale': 100},
+    'potencia': {'address': 107, 'type': 'float32'},
+    'temperatura': {'address': 110, 'type': 's16', 'scale': 10, 'offset': -40.0},
+    # 111: não mapeado
+}
+START = 100
+COUNT = 12
+
+
+def registers_for(specs, values, start=START, count=COUNT):
+    registers = [0] * count
+    for name, value in values.items():
+        spec = specs[name]
+        registers[spec.address - start:spec.end - start + 1] = spec.encode(value)
+    return registers
+
+
+@pytest.fixture
+def specs():
+    return load_schema(SCHEMA)
+
+
+def members(specs):
+    return tuple((name, spec.address - START) for name, spec in specs.items())
+
+
+def test_load_schema_rejects_overlap():
+    with pytest.raises(ValueError, match='registro 11'):
+        load_schema({'a': {'address': 10, 'type': 'u32'}, 'b': {'address': 11}})
+
+
+def test_load_schema_accepts_adjacent_32_bit_values():
+    specs = load_schema({'a': {'address': 10, 'type': 'u32'}, 'b': {'address': 12, 'type': 'float32'}})
+    assert specs['a'].end == 11
+    assert specs['b'].end == 13
+
+
+def test_unknown_type_and_word_order_are_rejected():
+    with pytest.raises(ValueError):
+        RegisterSpec('x', 1, type='u64')
+    with pytest.raises(ValueError):
+        RegisterSpec('x', 1, word_order='middle')
+
+
+def test_decode_all_types_with_gaps(specs):
+    values = {'tensao': 220.5, 'corrente': -12.3, 'energia': 70000, 'saldo': -1234.56,
+              'potencia': 1.5, 'temperatura': -15.0}
+    plan = DecodePlan(COUNT, members(specs), specs)
+    decoded = plan.decode(registers_for(specs, values))
+
+    assert set(decoded) == set(values)
+    for name, value in values.items():
+        assert decoded[name] == pytest.approx(value)
+
+
+def test_decode_little_word_order(specs):
+    registers = registers_for(specs, {'saldo': 700.01})
+    # Palavra menos significativa no endereço mais baixo
+    raw = struct.unpack('>i', struct.pack('>HH', registers[6], registers[5]))[0]
+    assert raw == 70001
+    assert DecodePlan(COUNT, members(specs), specs).decode(registers)['saldo'] == pytest.approx(700.01)
+
+
+def test_decode_trailing_unmapped_registers(specs):
+    plan = DecodePlan(COUNT, (('corrente', 1),), specs)
+    registers = registers_for(specs, {'corrente': -2.5})
+    registers[COUNT - 1] = 0xFFFF
+    assert plan.decode(registers) == {'corrente': pytest.approx(-2.5)}
+
+
+def test_decode_u16_only_block(specs):
+    plan = DecodePlan(COUNT, (('tensao', 0),), specs)
+    assert plan.decode([2205] + [0] * (COUNT - 1)) == {'tensao': 220.5}
+
+
+def test_decode_rejects_member_outside_block(specs):
+    with pytest.raises(ValueError):
+        DecodePlan(4, (('energia', 3),), specs)
+
+
+@pytest.mark.parametrize('type_, value', [
+    ('u16', 0), ('u16', 65535), ('s16', -32768), ('s16', 32767),
+    ('u32', 0xFFFFFFFF), ('s32', -0x80000000), ('float32', -3.25),
+])
+@pytest.mark.parametrize('word_order', ['big', 'little'])
+def test_encode_decode_round_trip(type_, value, word_order):
+    spec = RegisterSpec('x', 0, type=type_, word_order=word_order)
+    plan = DecodePlan(spec.width, (('x', 0),), {'x': spec})
+    assert plan.decode(spec.encode(value)) == {'x': value}
+
+
+def test_raw_value_clamps_to_type_range():
+    assert RegisterSpec('x', 0, type='s16', scale=10).raw_value(-5000) == -0x8000
+    assert RegisterSpec('x', 0, scale=10).raw_value(-1) == 0
+
+
+def test_compile_block_uses_config_schema():
+    plan = compile_block(14, (('corrente_bateria', 11),))
+    assert plan.decode([0] * 11 + [0xFFF6, 0, 0]) == {'corrente_bateria': pytest.approx(-1.0)}
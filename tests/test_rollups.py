@@ -0,0 +1,105 @@
+# test_rollups.py
+import sqlite3
+import threading
+
+import pytest
+
+from rollups import RollupStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RollupStore(str(tmp_path / 'agregados.db'), resolutions=[60, 3600])
+    yield store
+    store.close()
+
+
+def feed(store, start=0.0):
+    """Três janelas de 1 min de 'v', de 10 em 10 s: valores 0..5, 6..11, 12 (janela aberta)"""
+    for index in range(13):
+        store.append(start + index * 10.0, {'v': float(index), 'falha': None})
+
+
+def wait_written(store):
+    """Espera a thread de escrita processar tudo o que já está na fila"""
+    done = threading.Event()
+    original = store._write
+
+    def marker(seq, rows):
+        original(seq, rows)
+        if not rows:
+            done.set()
+
+    store._write = marker
+    store._queue.put((store._seq, []))
+    assert done.wait(5.0)
+    store._write = original
+
+
+def test_query_includes_open_and_unwritten_windows(store):
+    feed(store)
+    result = store.query('v', 0, 180)
+    assert result['resolution'] == 60
+    assert list(result['bucket']) == [0, 60, 120]
+    assert list(result['min']) == [0, 6, 12]
+    assert list(result['max']) == [5, 11, 12]
+    assert list(result['mean']) == pytest.approx([2.5, 8.5, 12])
+    assert list(result['count']) == [6, 6, 1]
+    assert store.query('falha', 0, 180)['count'].size == 0
+
+
+def test_background_writer_persists_closed_windows(store):
+    feed(store)
+    wait_written(store)
+    rows = sqlite3.connect(store.path).execute(
+        "SELECT bucket, min, max, sum, count FROM rollups WHERE resolution = 60 ORDER BY bucket").fetchall()
+    assert rows == [(0, 0, 5, 15, 6), (60, 6, 11, 51, 6)]
+    assert not store._pending
+
+
+def test_pending_window_counted_once_while_being_written(store):
+    gate = threading.Event()
+    original = store._write
+
+    def gated(seq, rows):
+        gate.wait(5.0)
+        original(seq, rows)
+
+    store._write = gated
+    feed(store)
+    pending = {key: list(entries) for key, entries in store._pending.items()}
+    assert list(store.query('v', 0, 180)['count']) == [6, 6, 1]  # Ainda não gravadas
+    gate.set()
+    wait_written(store)
+    store._pending.update(pending)  # Instante entre o COMMIT e a retirada de _pending
+    assert list(store.query('v', 0, 180)['count']) == [6, 6, 1]
+    store._pending.clear()
+    store._write = original
+
+
+def test_merge_inserts_in_bucket_order():
+    rows = [(0, 1, 2, 3, 2), (120, 1, 1, 1, 1)]
+    RollupStore._merge(rows, [60, 5, 5, 5, 1])
+    RollupStore._merge(rows, [120, 0, 4, 4, 1])
+    RollupStore._merge(rows, [180, 7, 7, 7, 1])
+    assert rows == [(0, 1, 2, 3, 2), (60, 5, 5, 5, 1), (120, 0, 4, 5, 2), (180, 7, 7, 7, 1)]
+
+
+def test_failed_write_keeps_windows_for_the_next_one(store):
+    other = sqlite3.connect(store.path)
+    other.execute("CREATE TRIGGER falha BEFORE INSERT ON rollups BEGIN SELECT RAISE(ABORT, 'disco cheio'); END")
+    other.commit()
+    feed(store)
+    wait_written(store)
+    assert store._retry
+    assert list(store.query('v', 0, 180)['count']) == [6, 6, 1]  # Ainda nas consultas
+
+    other.execute("DROP TRIGGER falha")
+    other.commit()
+    store.append(200.0, {'v': 20.0})  # Fecha a janela de 120 s: nova gravação, com as anteriores
+    wait_written(store)
+    assert not store._retry
+    assert not store._pending
+    rows = other.execute("SELECT bucket, count FROM rollups WHERE resolution = 60 ORDER BY bucket").fetchall()
+    assert rows == [(0, 6), (60, 6), (120, 1)]
+    assert list(store.query('v', 0, 240)['count']) == [6, 6, 1, 1]
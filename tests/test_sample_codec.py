@@ -0,0 +1,154 @@
+# test_sample_codec.py
+import io
+
+import pytest
+
+from register_schema import load_schema
+from sample_codec import (SampleDecoder, SampleEncoder, read_varint, unzigzag, write_varint, zigzag,
+                          _NeedMoreData)
+
+NAMES = ['a', 'b', 'c']
+
+
+def s32_specs(names):
+    return load_schema({name: {'address': 2 * index, 'type': 's32'} for index, name in enumerate(names)})
+
+
+def encode(samples, names=NAMES, resolution=0.001):
+    stream = io.BytesIO()
+    encoder = SampleEncoder(stream, resolution=resolution, specs=s32_specs(names))
+    for timestamp, raw in samples:
+        encoder.append_raw(timestamp, raw)
+    return stream.getvalue(), encoder
+
+
+def decode(data, chunk_size=65536):
+    return list(SampleDecoder(io.BytesIO(data), raw=True, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('value', [0, 1, -1, 63, -64, 64, -65, 2 ** 31 - 1, -2 ** 31, 2 ** 63, -2 ** 63 - 1])
+def test_zigzag_round_trip(value):
+    assert zigzag(value) >= 0
+    assert unzigzag(zigzag(value)) == value
+
+
+def test_zigzag_interleaves_signs():
+    assert [zigzag(v) for v in (0, -1, 1, -2, 2)] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.parametrize('value, size', [(0, 1), (0x7F, 1), (0x80, 2), (0x3FFF, 2), (0x4000, 3), (2 ** 64, 10)])
+def test_varint_edges(value, size):
+    out = bytearray()
+    write_varint(out, value)
+    assert len(out) == size
+    assert read_varint(out, 0) == (value, size)
+
+
+def test_varint_incomplete_raises_need_more_data():
+    out = bytearray()
+    write_varint(out, 300)
+    with pytest.raises(_NeedMoreData):
+        read_varint(out[:1], 0)
+
+
+def test_round_trip_with_negative_deltas_and_missing_values():
+    samples = [
+        (1000.000, {'a': 500, 'b': -20, 'c': 7}),
+        (1000.250, {'a': 480, 'b': -20, 'c': 7}),       # delta negativo
+        (1000.500, {'a': 480, 'c': 7}),                  # b ausente (leitura falhou)
+        (1000.750, {'a': 480, 'b': -32768, 'c': 7}),    # b volta, no limite do s16
+        (1001.100, {}),                                  # tudo ausente, intervalo irregular
+        (1001.200, {'a': 0, 'b': 32767, 'c': 65535}),
+    ]
+    data, encoder = encode(samples)
+    decoded = decode(data)
+
+    assert encoder.samples == len(samples)
+    assert encoder.bytes_written == len(data)
+    assert len(decoded) == len(samples)
+    for (timestamp, raw), (decoded_time, readings) in zip(samples, decoded):
+        assert decoded_time == pytest.approx(timestamp)
+        assert readings == {name: raw.get(name) for name in NAMES}
+
+
+def test_unchanged_regular_sample_takes_two_bytes():
+    data, encoder = encode([(0.0, {'a': 1, 'b': 2, 'c': 3}), (0.5, {'a': 1, 'b': 2, 'c': 3})])
+    size = encoder.bytes_written
+    encoder.append_raw(1.0, {'a': 1, 'b': 2, 'c': 3})
+    assert encoder.bytes_written - size == 2
+
+
+def test_mask_wider_than_one_byte():
+    names = [f"r{i}" for i in range(20)]
+    samples = [(0.0, {name: i for i, name in enumerate(names)}), (1.0, {'r19': 100})]
+    data, _ = encode(samples, names=names)
+    readings = decode(data)[1][1]
+    assert readings['r19'] == 100
+    assert readings['r0'] is None
+
+
+def test_decoder_reads_across_chunk_boundaries():
+    samples = [(i * 0.1, {'a': i * 37 - 500, 'b': -i, 'c': i % 3}) for i in range(200)]
+    data, _ = encode(samples)
+    assert decode(data, chunk_size=3) == decode(data)
+
+
+def test_truncated_tail_is_ignored():
+    samples = [(0.0, {'a': 1000, 'b': 2000, 'c': 3000}), (1.0, {'a': 100000, 'b': -100000, 'c': 1})]
+    data, _ = encode(samples)
+    decoded = decode(data[:-1])
+    assert len(decoded) == 1
+    assert decoded[0][1] == {'a': 1000, 'b': 2000, 'c': 3000}
+
+
+def round_trip(schema, readings, raw=False):
+    stream = io.BytesIO()
+    encoder = SampleEncoder(stream, specs=load_schema(schema))
+    encoder.append(10.0, readings)
+    encoder.append(10.5, readings)
+    decoded = list(SampleDecoder(io.BytesIO(stream.getvalue()), raw=raw))
+    assert [timestamp for timestamp, _ in decoded] == pytest.approx([10.0, 10.5])
+    return decoded[-1][1]
+
+
+@pytest.mark.parametrize('type, value', [('s16', -3276.8), ('u32', 429496729.5), ('float32', -12.345)])
+def test_round_trip_by_type(type, value):
+    readings = round_trip({'v': {'address': 0, 'type': type, 'scale': 10}}, {'v': value})
+    assert readings['v'] == pytest.approx(value, rel=1e-6)
+
+
+def test_round_trip_with_offset_and_fractional_scale():
+    schema = {
+        'temperatura': {'address': 0, 'type': 's16', 'scale': 2.5, 'offset': -40.0},
+        'energia': {'address': 1, 'type': 'float32', 'scale': 1, 'offset': 100.0},
+    }
+    readings = round_trip(schema, {'temperatura': 25.2, 'energia': 150.25})
+    assert readings == {'temperatura': pytest.approx(25.2), 'energia': pytest.approx(150.25)}
+    raw = round_trip(schema, {'temperatura': 25.2, 'energia': 150.25}, raw=True)
+    assert raw == {'temperatura': 163, 'energia': pytest.approx(50.25)}
+
+
+def test_decoder_uses_schema_from_header():
+    stream = io.BytesIO()
+    SampleEncoder(stream, specs=load_schema({'v': {'address': 7, 'type': 'u32', 'word_order': 'little',
+                                                       'scale': 100, 'offset': 1.5}}))
+    spec = SampleDecoder(io.BytesIO(stream.getvalue())).specs[0]
+    assert (spec.name, spec.address, spec.type, spec.word_order, spec.scale, spec.offset) == \
+        ('v', 7, 'u32', 'little', 100, 1.5)
+
+
+def test_scaled_readings_use_header_scales():
+    stream = io.BytesIO()
+    encoder = SampleEncoder(stream, names=['tensao_bateria', 'corrente_bateria'])
+    encoder.append(10.0, {'tensao_bateria': 54.3, 'corrente_bateria': -12.5})
+    timestamp, readings = next(iter(SampleDecoder(io.BytesIO(stream.getvalue()))))
+    assert timestamp == pytest.approx(10.0)
+    assert readings == {'tensao_bateria': pytest.approx(54.3), 'corrente_bateria': pytest.approx(-12.5)}
+
+
+def test_rejects_foreign_or_truncated_header():
+    with pytest.raises(ValueError):
+        SampleDecoder(io.BytesIO(b'XXXX' + bytes(20)))
+    data, _ = encode([])
+    with pytest.raises(ValueError):
+        SampleDecoder(io.BytesIO(data[:8]))
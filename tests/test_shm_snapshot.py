@@ -0,0 +1,70 @@
+# test_shm_snapshot.py
+import math
+import os
+import uuid
+
+import pytest
+
+from shm_snapshot import QUALITY_GOOD, QUALITY_NONE, QUALITY_STALE, SnapshotReader, SnapshotWriter
+
+
+@pytest.fixture
+def writer():
+    writer = SnapshotWriter(f"tps_teste_{os.getpid()}_{uuid.uuid4().hex[:8]}", names=['a', 'b', 'c'])
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def reader(writer):
+    reader = SnapshotReader(writer.name)
+    yield reader
+    reader.close()
+
+
+def test_round_trip(writer, reader):
+    assert reader.names == ['a', 'b', 'c']
+    sequence, cycle_time, readings = reader.read()
+    assert sequence == 0
+    assert math.isnan(readings['a'][0]) and readings['a'][2] == QUALITY_NONE
+
+    writer.append(10.0, {'a': 1.5, 'b': -2.0, 'desconhecido': 3.0})
+    sequence, cycle_time, readings = reader.read()
+    assert sequence == 2
+    assert cycle_time == 10.0
+    assert readings['a'] == (1.5, 10.0, QUALITY_GOOD)
+    assert readings['b'] == (-2.0, 10.0, QUALITY_GOOD)
+    assert readings['c'][2] == QUALITY_NONE
+
+
+def test_failed_read_marks_stale_and_keeps_value(writer, reader):
+    writer.append(10.0, {'a': 1.5})
+    writer.append(11.0, {'a': None, 'c': None})
+    sequence, cycle_time, readings = reader.read()
+    assert cycle_time == 11.0
+    assert readings['a'] == (1.5, 10.0, QUALITY_STALE)
+    assert readings['c'][2] == QUALITY_NONE  # Nunca lido continua sem qualidade
+    writer.append(12.0, {'a': 2.0})
+    assert reader.read()[2]['a'] == (2.0, 12.0, QUALITY_GOOD)
+
+
+def test_wait_for_update(writer, reader):
+    sequence = reader.sequence
+    assert not reader.wait_for_update(sequence, timeout=0.02)
+    writer.append(1.0, {'b': 1.0})
+    assert reader.wait_for_update(sequence, timeout=0.02)
+
+
+def test_sequence_stuck_odd_raises_timeout(writer, reader):
+    writer.layout.sequence[()] += 1  # Escritor parado no meio de uma atualização
+    with pytest.raises(TimeoutError):
+        reader.read(timeout=0.05)
+    writer.layout.sequence[()] += 1
+    assert reader.read(timeout=0.05)[0] == 2
+
+
+def test_reader_rejects_foreign_block(writer):
+    writer.shm.buf[:4] = b'XXXX'
+    with pytest.raises(ValueError):
+        SnapshotReader(writer.name)
+
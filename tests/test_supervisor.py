@@ -0,0 +1,75 @@
+# test_supervisor.py
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from metrics_exporter import MetricsExporter
+from supervisor import Supervisor, pack_readings, parse_port, unpack_readings
+
+
+def test_pack_readings_round_trip():
+    readings = {'tensao_bateria': 53.6, 'corrente_bateria': None, 'frequencia': 60.0}
+    _, slave, timestamp, mask, values = pack_readings(31, 10.0, readings)
+    assert (slave, timestamp) == (31, 10.0)
+    assert unpack_readings(mask, values) == readings
+
+
+@pytest.mark.parametrize('text, expected', [('/dev/ttyUSB0', ('/dev/ttyUSB0', [30])),
+                                            ('/dev/ttyUSB1:31', ('/dev/ttyUSB1', [31])),
+                                            ('COM4:30,31', ('COM4', [30, 31]))])
+def test_parse_port(text, expected):
+    assert parse_port(text) == expected
+
+
+def test_slaves_on_one_port_share_a_worker():
+    supervisor = Supervisor()
+    assert supervisor.add_port('/dev/ttyUSB1', 31) == '/dev/ttyUSB1:31'
+    supervisor.add_port('/dev/ttyUSB1', 32, name='tps32')
+    assert list(supervisor.workers) == ['/dev/ttyUSB1']
+    assert supervisor.workers['/dev/ttyUSB1'].spec.devices == {31: '/dev/ttyUSB1:31', 32: 'tps32'}
+    with pytest.raises(ValueError):
+        supervisor.add_port('/dev/ttyUSB2', 30, name='tps32')
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_killed_worker_is_restarted_and_feeds_the_exporter(rtu_simulator):
+    simulator, port = rtu_simulator(slaves=[30, 31])
+    supervisor = Supervisor()
+    exporter = MetricsExporter()
+    received = []
+    lock = threading.Lock()
+
+    def on_readings(device, readings):
+        with lock:
+            received.append((time.monotonic(), device))
+
+    for slave in (30, 31):
+        name = supervisor.add_port(port, slave)
+        supervisor.add_sink(name, exporter.add_source(name, slave))
+    supervisor.add_listener(on_readings)
+    supervisor.start()
+    try:
+        assert wait_until(lambda: {device for _, device in received} == {f"{port}:30", f"{port}:31"}, 15.0)
+        worker = supervisor.workers[port]
+        first_pid = worker.process.pid
+        os.kill(first_pid, signal.SIGKILL)
+        killed = time.monotonic()
+
+        assert wait_until(lambda: worker.restarts == 1 and worker.process is not None, 10.0)
+        assert worker.process.pid != first_pid
+        assert wait_until(lambda: any(at > killed + 0.5 for at, _ in received), 15.0)
+        text = exporter.snapshot.decode('utf-8')
+        assert f'tps_reading{{device="{port}:31",slave="31",register="tensao_bateria"}}' in text
+    finally:
+        supervisor.stop()
@@ -0,0 +1,123 @@
+# test_tcp_gateway.py
+import socket
+import struct
+
+import pytest
+
+import modbus_frames as frames
+from tcp_gateway import READ_HOLDING_REGISTERS, ModbusTcpGateway, RegisterCache
+
+READINGS = {'tensao_r': 220.0, 'tensao_s': 221.0, 'tensao_t': 219.0, 'corrente_r': 4.2, 'corrente_s': 4.1,
+            'corrente_t': 4.3, 'frequencia': 60.0, 'tensao_retificador': 54.0, 'tensao_bateria': 53.6,
+            'tensao_consumidor': 53.8, 'corrente_retificador': 25.0, 'corrente_bateria': -1.5,
+            'temperatura_bateria': 27.0}
+
+
+@pytest.fixture
+def gateway():
+    gateway = ModbusTcpGateway('127.0.0.1', 0, age_register=100)
+    gateway.caches[30] = RegisterCache()
+    gateway.caches[30].append(0.0, READINGS)
+    return gateway
+
+
+def read(gateway, address, count, function=frames.READ_INPUT_REGISTERS, unit=30):
+    return gateway.handle_pdu(unit, frames.read_registers_request(address, count, function))
+
+
+def exception_code(pdu):
+    assert pdu[0] & 0x80
+    return pdu[1]
+
+
+@pytest.mark.parametrize('function', [frames.READ_INPUT_REGISTERS, READ_HOLDING_REGISTERS])
+def test_reads_whole_map_with_hole_as_zero(gateway, function):
+    pdu = read(gateway, 63, 14, function)
+    assert pdu[0] == function
+    registers = frames.parse_read_response(pdu)
+    assert registers[0] == 220
+    assert registers[71 - 63] == 536
+    assert registers[74 - 63] == 0x10000 - 15  # s16 em complemento de dois
+    assert registers[75 - 63] == 0  # Buraco do mapa
+    assert registers[76 - 63] == 270
+
+
+def test_single_register_and_default_unit(gateway):
+    assert frames.parse_read_response(read(gateway, 69, 1)) == [600]
+    assert frames.parse_read_response(read(gateway, 69, 1, unit=255)) == [600]
+
+
+@pytest.mark.parametrize('address, count', [(62, 2), (76, 2), (0, 1), (101, 1)])
+def test_out_of_map_is_illegal_address(gateway, address, count):
+    assert exception_code(read(gateway, address, count)) == frames.ILLEGAL_DATA_ADDRESS
+
+
+def test_illegal_function_and_values(gateway):
+    assert exception_code(gateway.handle_pdu(30, b'\x06\x00\x47\x00\x01')) == frames.ILLEGAL_FUNCTION
+    assert exception_code(gateway.handle_pdu(30, b'\x04\x00\x47')) == frames.ILLEGAL_DATA_VALUE
+    assert exception_code(read(gateway, 63, 0)) == frames.ILLEGAL_DATA_VALUE
+    assert exception_code(read(gateway, 63, 126)) == frames.ILLEGAL_DATA_VALUE
+    assert gateway.stats['exceptions'] == 4
+
+
+def test_unknown_unit_is_target_failed(gateway):
+    assert exception_code(read(gateway, 63, 1, unit=31)) == frames.GATEWAY_TARGET_FAILED
+
+
+def test_stale_register_returns_0x0b(gateway):
+    cache = gateway.caches[30]
+    limit = gateway.limits[71]
+    cache.registers = {address: (value, updated - limit - 1) if address == 71 else (value, updated)
+                       for address, (value, updated) in cache.registers.items()}
+    assert exception_code(read(gateway, 71, 1)) == frames.GATEWAY_TARGET_FAILED
+    assert frames.parse_read_response(read(gateway, 70, 1)) == [540]
+    assert gateway.stats['stale'] == 1
+
+
+def test_never_read_register_returns_0x0b():
+    gateway = ModbusTcpGateway('127.0.0.1', 0)
+    gateway.caches[30] = RegisterCache()
+    gateway.caches[30].append(0.0, {'tensao_r': 220.0})
+    assert frames.parse_read_response(read(gateway, 63, 1)) == [220]
+    assert exception_code(read(gateway, 63, 2)) == frames.GATEWAY_TARGET_FAILED
+
+
+def test_age_register(gateway):
+    cache = gateway.caches[30]
+    cache.last_update -= 2.5
+    assert frames.parse_read_response(read(gateway, 100, 1))[0] in (25, 26)
+    cache.last_update = None
+    assert frames.parse_read_response(read(gateway, 100, 1)) == [0xFFFF]
+
+
+def test_cycle_without_answers_keeps_cache(gateway):
+    cache = gateway.caches[30]
+    registers = cache.registers
+    cache.append(1.0, dict.fromkeys(READINGS))
+    assert cache.registers is registers
+
+
+@pytest.fixture
+def server(gateway):
+    assert gateway.start()
+    yield gateway, gateway._server.sockets[0].getsockname()[1]
+    gateway.stop()
+
+
+def request(sock, pdu, unit=30, transaction_id=1):
+    sock.sendall(frames.mbap_frame(transaction_id, unit, pdu))
+    header = sock.recv(7)
+    _, _, length, _ = frames.parse_mbap_header(header)
+    return sock.recv(length)
+
+
+@pytest.mark.parametrize('length', [0, 1, frames.MAX_PDU_SIZE + 2, 0xFFFF])
+def test_invalid_mbap_length_closes_connection(server, length):
+    gateway, port = server
+    with socket.create_connection(('127.0.0.1', port), timeout=2.0) as sock:
+        assert frames.parse_read_response(request(sock, frames.read_registers_request(69, 1))) == [600]
+        sock.sendall(struct.pack('>HHHB', 2, 0, length, 30))
+        assert sock.recv(16) == b''  # Conexão encerrada sem ler o restante
+    assert gateway.stats['malformed'] == 1
+    with socket.create_connection(('127.0.0.1', port), timeout=2.0) as sock:
+        assert frames.parse_read_response(request(sock, frames.read_registers_request(69, 1))) == [600]
@@ -1,51 +1,204 @@
 # ui.py
 import sys
 import os
+import asyncio
 import serial.tools.list_ports
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QComboBox, QPushButton, QGroupBox, QGridLayout, QStatusBar
+    QLabel, QComboBox, QPushButton, QGroupBox, QGridLayout, QStatusBar, QTableWidget, QTableWidgetItem
 )
-from PyQt5.QtCore import QTimer, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 from modbus_client import ModbusClient
+from acquisition import AcquisitionLoop, CONNECTING, CONNECTED, RECONNECTING
+from history import ReadingHistory
+from historian import Historian
+from rollups import RollupStore
+from charts import TrendChart
+from port_discovery import PortDiscovery
+from async_client import AsyncAcquisitionEngine
+from deadband import DeadbandFilter
 
 try:
-    from config import REGISTER_MAP
+    from config import (REGISTER_MAP, REGISTER_SCHEMA, POLL_INTERVAL, HISTORIAN_ENABLED, ROLLUP_ENABLED, SLAVE_ADDRESS,
+                        BAUDRATE, PARITY, DEADBAND_ENABLED, SITE_DEVICES)
 except ImportError:
-    from .config import REGISTER_MAP
+    from .config import (REGISTER_MAP, REGISTER_SCHEMA, POLL_INTERVAL, HISTORIAN_ENABLED, ROLLUP_ENABLED, SLAVE_ADDRESS,
+                         BAUDRATE, PARITY, DEADBAND_ENABLED, SITE_DEVICES)
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Grupos verificados por coerência (desvio > 5% da média do grupo). A corrente de bateria
+# (s16, negativa na descarga) não é comparável com a do retificador e fica fora dos grupos.
+GRUPOS_COERENCIA = [
+    ['tensao_retificador', 'tensao_consumidor', 'tensao_bateria'],  # Tensões CC
+    ['tensao_r', 'tensao_s', 'tensao_t'],  # Tensões CA
+    ['corrente_r', 'corrente_s', 'corrente_t']  # Correntes CA
+]
+GRUPO_POR_REGISTRO = {nome: tuple(grupo) for grupo in GRUPOS_COERENCIA for nome in grupo}
+
+# Legendas curtas das séries nos gráficos de tendência
+ROTULOS_GRAFICO = {
+    'tensao_retificador': 'Ret.', 'tensao_consumidor': 'Cons.', 'tensao_bateria': 'Bat.',
+    'corrente_retificador': 'Ret.', 'corrente_bateria': 'Bat.',
+    'tensao_r': 'R', 'tensao_s': 'S', 'tensao_t': 'T',
+    'corrente_r': 'R', 'corrente_s': 'S', 'corrente_t': 'T',
+    'temperatura_bateria': 'Bat.', 'frequencia': 'Freq.'
+}
+
+ESTILO_LEITURAS = """
+QLabel[estado="normal"] { color: black; }
+QLabel[estado="coerente"] { color: green; }
+QLabel[estado="divergente"] { color: red; }
+QLabel[estado="erro"] { color: red; }
+"""
+
 
 class ModbusWorker(QThread):
+    """Thread de aquisição de vida longa: executa o AcquisitionLoop e repassa os dados por sinais.
+
+    Com `change_filter`, `data_ready` leva só os registros que mudaram (e o
+    estado completo periódico); a interface acumula em `current_readings`.
+    """
     data_ready = pyqtSignal(dict)
     error_occurred = pyqtSignal(str)
-    
-    def __init__(self, modbus_client):
+    link_state_changed = pyqtSignal(str, str)  # Transições do disjuntor de comunicação
+    connection_state_changed = pyqtSignal(str, str)  # Transições da conexão (acquisition.py)
+
+    def __init__(self, modbus_client, interval=POLL_INTERVAL, connect=None, change_filter=None):
         super().__init__()
         self.modbus_client = modbus_client
-        self.running = False
-    
+        self.loop = AcquisitionLoop(modbus_client, interval, connect=connect, change_filter=change_filter)
+        self.loop.add_listener(self.data_ready.emit)
+        self.loop.add_error_listener(self.error_occurred.emit)
+        self.loop.add_connection_listener(self.connection_state_changed.emit)
+
     def run(self):
-        self.running = True
+        self.modbus_client.add_state_listener(self._on_link_state)
         try:
-            if self.modbus_client.connected:
-                readings = self.modbus_client.read_all()
-                if readings:
-                    self.data_ready.emit(readings)
-                else:
-                    self.error_occurred.emit("Falha ao obter leituras")
+            self.loop.run()
+        finally:
+            self.modbus_client.remove_state_listener(self._on_link_state)
+
+    def _on_link_state(self, old_state, new_state):
+        self.link_state_changed.emit(old_state, new_state)
+
+    def stop(self):
+        self.loop.stop()
+        self.wait()
+
+
+class AsyncEngineWorker(QThread):
+    """Executa o AsyncAcquisitionEngine em thread própria e repassa os dados à GUI"""
+    device_data_ready = pyqtSignal(str, dict)
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self._loop = None
+        self.engine.add_listener(self.device_data_ready.emit)
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.engine.run())
         except Exception as e:
-            self.error_occurred.emit(f"Erro na thread: {str(e)}")
+            logger.error(f"Erro no motor de aquisição assíncrono: {e}")
         finally:
-            self.running = False
-    
+            self._loop.close()
+            self._loop = None
+
+    def stop(self):
+        loop = self._loop
+        if loop and loop.is_running():
+            loop.call_soon_threadsafe(self.engine.stop)
+        else:
+            self.engine.stop()
+        self.wait()
+
+
+class SiteOverview(QWidget):
+    """Janela com uma linha por TPS de SITE_DEVICES, adquiridos pelo AsyncAcquisitionEngine"""
+
+    def __init__(self, devices, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Visão Geral do Site")
+        self.resize(1100, 60 + 30 * len(devices))
+        self.devices = devices
+        self.worker = None
+
+        # Um motor novo a cada abertura da janela (o motor não reinicia após stop())
+        self._engine = self._build_engine()
+        rows = [device.name for device in self._engine.devices]
+        self.rows = {name: row for row, name in enumerate(rows)}
+        self.columns = {name: column for column, name in enumerate(REGISTER_MAP)}
+
+        self.table = QTableWidget(len(self.rows), len(self.columns))
+        self.table.setVerticalHeaderLabels(rows)
+        self.table.setHorizontalHeaderLabels(
+            [f"{name}\n({REGISTER_SCHEMA[name].get('unit', '')})" for name in self.columns])
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+
+    def _build_engine(self):
+        engine = AsyncAcquisitionEngine()
+        for entry in self.devices:
+            slave = entry.get('slave', SLAVE_ADDRESS)
+            if 'host' in entry:
+                engine.add_tcp_device(entry['host'], entry.get('tcp_port', 502), slave, entry.get('name'))
+            else:
+                engine.add_serial_device(entry['port'], slave, entry.get('name'))
+        return engine
+
+    def showEvent(self, event):
+        if self.worker is None:
+            engine, self._engine = self._engine or self._build_engine(), None
+            self.worker = AsyncEngineWorker(engine)
+            self.worker.device_data_ready.connect(self.update_device, Qt.QueuedConnection)
+            self.worker.start()
+        super().showEvent(event)
+
+    def update_device(self, device, readings):
+        """Atualiza apenas as células dos registros recebidos (leituras parciais do poll)"""
+        row = self.rows.get(device)
+        if row is None:
+            return
+        for name, value in readings.items():
+            column = self.columns.get(name)
+            if column is None:
+                continue
+            text = "ERRO" if value is None else f"{value:.1f}"
+            item = self.table.item(row, column)
+            if item is None:
+                self.table.setItem(row, column, QTableWidgetItem(text))
+            elif item.text() != text:
+                item.setText(text)
+
+    def closeEvent(self, event):
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+        self.table.clearContents()
+        event.accept()
+
+
+class DiscoveryWorker(QThread):
+    """Executa a descoberta de portas/escravos (port_discovery.py) fora da thread da GUI"""
+    device_found = pyqtSignal(object)
+    discovery_finished = pyqtSignal(list)
+
+    def __init__(self, ports):
+        super().__init__()
+        self.discovery = PortDiscovery(ports)
+        self.discovery.add_listener(self.device_found.emit)
+
+    def run(self):
+        self.discovery_finished.emit(self.discovery.run())
+
     def stop(self):
-        self.running = False
-        self.quit()
+        self.discovery.stop()
         self.wait()
 
 
@@ -56,10 +209,24 @@ class TPSMonitorUI(QMainWindow):
         self.setGeometry(100, 100, 1200, 700)
 
         self.modbus_client = ModbusClient()
+        self.history = ReadingHistory()  # Alimentado pela thread de aquisição a cada ciclo
+        self.modbus_client.add_sink(self.history)
+        self.historian = None
+        if HISTORIAN_ENABLED:
+            self.historian = Historian()
+            self.historian.start()
+            self.modbus_client.add_sink(self.historian)
+        self.rollups = None
+        if ROLLUP_ENABLED:
+            self.rollups = RollupStore()
+            self.modbus_client.add_sink(self.rollups)
         self.worker = None
-        self.timer = QTimer()
-        self.timer.setInterval(3000)  # 3 segundos
-        self.timer.timeout.connect(self.start_reading_worker)
+        self.discovery_worker = None
+        self.site_overview = None
+        self.discovered = {}  # Porta -> DiscoveredDevice (baud rate, paridade e escravo encontrados)
+        self.current_readings = {}  # Últimos valores de cada registro (leituras parciais)
+        self.error_names = set()  # Registros exibidos como ERRO (para a barra de status)
+        self.label_state = {}  # Último (texto, estado) desenhado em cada label
 
         self.init_ui()
         self.refresh_ports()
@@ -77,15 +244,20 @@ class TPSMonitorUI(QMainWindow):
         self.port_combo = QComboBox()
         self.port_combo.setMinimumWidth(200)
         self.refresh_btn = QPushButton("Atualizar Portas")
+        self.discover_btn = QPushButton("Procurar Dispositivos")
         self.connect_btn = QPushButton("Conectar")
         self.disconnect_btn = QPushButton("Desconectar")
         self.disconnect_btn.setEnabled(False)
+        self.site_btn = QPushButton("Visão Geral")
+        self.site_btn.setEnabled(bool(SITE_DEVICES))  # Dispositivos em config.SITE_DEVICES
 
         connection_layout.addWidget(QLabel("Porta COM:"))
         connection_layout.addWidget(self.port_combo)
         connection_layout.addWidget(self.refresh_btn)
+        connection_layout.addWidget(self.discover_btn)
         connection_layout.addWidget(self.connect_btn)
         connection_layout.addWidget(self.disconnect_btn)
+        connection_layout.addWidget(self.site_btn)
         connection_group.setLayout(connection_layout)
 
         # Painéis de leitura organizados
@@ -130,6 +302,9 @@ class TPSMonitorUI(QMainWindow):
         tabs_layout.addWidget(temperatura_group)
         tabs_layout.addWidget(frequencia_group)
 
+        # Cores dos labels por estado (propriedade dinâmica 'estado')
+        self.setStyleSheet(ESTILO_LEITURAS)
+
         # Labels para as leituras
         self.reading_labels = {}
 
@@ -217,6 +392,21 @@ class TPSMonitorUI(QMainWindow):
         frequencia_layout.addWidget(self.reading_labels['frequencia'], 0, 1)
         frequencia_layout.addWidget(QLabel("Hz"), 0, 2)
 
+        # Gráficos de tendência abaixo das leituras de cada painel
+        self.charts = []
+        paineis = [
+            (tensoes_cc_layout, ['tensao_retificador', 'tensao_consumidor', 'tensao_bateria']),
+            (correntes_cc_layout, ['corrente_retificador', 'corrente_bateria']),
+            (tensoes_ca_layout, ['tensao_r', 'tensao_s', 'tensao_t']),
+            (correntes_ca_layout, ['corrente_r', 'corrente_s', 'corrente_t']),
+            (temperatura_layout, ['temperatura_bateria']),
+            (frequencia_layout, ['frequencia'])
+        ]
+        for layout, names in paineis:
+            chart = TrendChart(self.history, names, ROTULOS_GRAFICO, self.rollups)
+            layout.addWidget(chart, layout.rowCount(), 0, 1, 3)
+            self.charts.append(chart)
+
         # Adiciona grupos ao layout principal
         main_layout.addWidget(connection_group)
         main_layout.addLayout(tabs_layout)
@@ -228,132 +418,220 @@ class TPSMonitorUI(QMainWindow):
 
         # Conecta sinais
         self.refresh_btn.clicked.connect(self.refresh_ports)
+        self.discover_btn.clicked.connect(self.discover_devices)
         self.connect_btn.clicked.connect(self.connect_device)
         self.disconnect_btn.clicked.connect(self.disconnect_device)
+        self.site_btn.clicked.connect(self.open_site_overview)
     
-    def start_reading_worker(self):
-        if not self.modbus_client.connected:
-            return
-        
-        # Se já existe um worker rodando, não inicia outro
-        if self.worker and self.worker.running:
+    def start_reading_worker(self, connect):
+        if self.worker:
             return
-        
-        self.worker = ModbusWorker(self.modbus_client)
-        self.worker.data_ready.connect(self.process_readings)
-        self.worker.error_occurred.connect(self.handle_worker_error)
+
+        # Abertura da porta, teste e reconexões acontecem na thread do worker
+        change_filter = DeadbandFilter() if DEADBAND_ENABLED else None
+        self.worker = ModbusWorker(self.modbus_client, connect=connect, change_filter=change_filter)
+        self.worker.data_ready.connect(self.process_readings, Qt.QueuedConnection)
+        self.worker.error_occurred.connect(self.handle_worker_error, Qt.QueuedConnection)
+        self.worker.link_state_changed.connect(self.handle_link_state, Qt.QueuedConnection)
+        self.worker.connection_state_changed.connect(self.handle_connection_state, Qt.QueuedConnection)
         self.worker.start()
-    
+
+    def stop_reading_worker(self):
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+
     def process_readings(self, readings):
+        """Redesenha apenas os registros recebidos e os grupos de coerência que os contêm"""
         try:
-            errors = 0
-            # Processa todos os valores
-            for name, value in readings.items():
-                if name not in self.reading_labels:
+            current = self.current_readings
+            current.update(readings)
+
+            # Estado de cada label: erro, coerente/divergente no grupo ou normal
+            names = set(readings)
+            states = {}
+            for grupo in {GRUPO_POR_REGISTRO[nome] for nome in readings if nome in GRUPO_POR_REGISTRO}:
+                names.update(grupo)
+                valores_validos = [current[nome] for nome in grupo if current.get(nome) is not None]
+                if len(valores_validos) < 2:
                     continue
-
+                media = sum(valores_validos) / len(valores_validos)
+                for nome in grupo:
+                    valor = current.get(nome)
+                    if valor is not None:
+                        diferenca_percentual = abs(valor - media) / media * 100 if media != 0 else 0
+                        states[nome] = 'divergente' if diferenca_percentual > 5 else 'coerente'
+
+            for name in names:
+                if name not in self.reading_labels or name not in current:
+                    continue
+                value = current[name]
                 if value is None:
-                    self.reading_labels[name].setText("ERRO")
-                    self.reading_labels[name].setStyleSheet("color: red;")
-                    errors += 1
+                    self.error_names.add(name)
+                    self.render_label(name, "ERRO", 'erro')
                 else:
-                    self.reading_labels[name].setStyleSheet("color: black;")
-                    if isinstance(value, float):
-                        self.reading_labels[name].setText(f"{value:.1f}")
-                    else:
-                        self.reading_labels[name].setText(str(value))
-
-            # Verifica diferenças nos grupos (mesmo código anterior)
-            grupos = [
-                {'nomes': ['tensao_retificador', 'tensao_consumidor', 'tensao_bateria'], 'descricao': 'Tensões CC'},
-                {'nomes': ['corrente_retificador', 'corrente_bateria'], 'descricao': 'Correntes CC'},
-                {'nomes': ['tensao_r', 'tensao_s', 'tensao_t'], 'descricao': 'Tensões CA'},
-                {'nomes': ['corrente_r', 'corrente_s', 'corrente_t'], 'descricao': 'Correntes CA'}
-            ]
-
-            for grupo in grupos:
-                nomes = grupo['nomes']
-                valores_validos = []
-
-                for nome in nomes:
-                    if (nome in readings and readings[nome] is not None and not isinstance(readings[nome], str)):
-                        valores_validos.append(readings[nome])
-
-                if len(valores_validos) >= 2:
-                    media = sum(valores_validos) / len(valores_validos)
-                    for nome in nomes:
-                        if nome in readings and readings[nome] is not None:
-                            valor = readings[nome]
-                            diferenca_percentual = abs(valor - media) / media * 100 if media != 0 else 0
-                            if diferenca_percentual > 5:
-                                self.reading_labels[nome].setStyleSheet("color: red;")
-                            else:
-                                self.reading_labels[nome].setStyleSheet("color: green;")
+                    self.error_names.discard(name)
+                    text = f"{value:.1f}" if isinstance(value, float) else str(value)
+                    self.render_label(name, text, states.get(name, 'normal'))
 
+            errors = len(self.error_names)
             status = "Leituras atualizadas com sucesso." if errors == 0 else f"Leituras atualizadas com {errors} erro(s)."
-            self.status_bar.showMessage(status)
+            if status != self.status_bar.currentMessage():
+                self.status_bar.showMessage(status)
         except Exception as e:
             logger.error(f"Erro no processamento: {e}")
             self.status_bar.showMessage(f"Erro no processamento: {str(e)}", 5000)
-    
+
+    def render_label(self, name, text, state):
+        """Atualiza o label apenas se o texto ou o estado de alarme mudou"""
+        last_text, last_state = self.label_state.get(name, (None, None))
+        label = self.reading_labels[name]
+        if text != last_text:
+            label.setText(text)
+        if state != last_state:
+            # A cor vem da folha de estilo da janela; só é preciso repolir o label
+            label.setProperty('estado', state)
+            label.style().unpolish(label)
+            label.style().polish(label)
+        self.label_state[name] = (text, state)
+
     def handle_worker_error(self, error_msg):
         self.status_bar.showMessage(error_msg, 3000)
 
+    def handle_link_state(self, old_state, new_state):
+        if new_state == 'open' and old_state == 'closed':
+            self.status_bar.showMessage("Dispositivo sem resposta. Tentando reconectar...")
+        elif new_state == 'closed':
+            self.status_bar.showMessage("Dispositivo voltou a responder.", 3000)
+
+    def handle_connection_state(self, old_state, new_state):
+        port = self.port_combo.currentData()
+        if new_state == CONNECTING:
+            self.status_bar.showMessage(f"Conectando a {port}...")
+        elif new_state == CONNECTED:
+            self.status_bar.showMessage(f"Conectado a {port}. Atualizando leituras...")
+        elif new_state == RECONNECTING and old_state == CONNECTED:
+            # Leituras antigas não valem mais; a falha em si chega por error_occurred
+            self.current_readings.clear()
+            self.error_names.clear()
+            for name in self.reading_labels:
+                self.render_label(name, "--", 'normal')
+
     def refresh_ports(self):
         self.port_combo.clear()
         ports = serial.tools.list_ports.comports()
         for port in ports:
-            self.port_combo.addItem(f"{port.device} - {port.description}", port.device)
+            device = self.discovered.get(port.device)
+            if device:
+                self.port_combo.addItem(self.discovered_label(device), port.device)
+            else:
+                self.port_combo.addItem(f"{port.device} - {port.description}", port.device)
 
         if ports:
             self.status_bar.showMessage(f"{len(ports)} portas encontradas.")
         else:
             self.status_bar.showMessage("Nenhuma porta serial encontrada!")
 
+    def discovered_label(self, device):
+        return f"{device.port} - TPS escravo {device.slave} ({device.baudrate} baud, paridade {device.parity})"
+
+    def discover_devices(self):
+        ports = [self.port_combo.itemData(index) for index in range(self.port_combo.count())]
+        if not ports:
+            self.status_bar.showMessage("Nenhuma porta serial para procurar.")
+            return
+
+        self.connect_btn.setEnabled(False)
+        self.refresh_btn.setEnabled(False)
+        self.discover_btn.setEnabled(False)
+        self.port_combo.setEnabled(False)
+        self.status_bar.showMessage(f"Procurando dispositivos em {len(ports)} porta(s)...")
+
+        self.discovery_worker = DiscoveryWorker(ports)
+        self.discovery_worker.device_found.connect(self.handle_device_found, Qt.QueuedConnection)
+        self.discovery_worker.discovery_finished.connect(self.handle_discovery_finished, Qt.QueuedConnection)
+        self.discovery_worker.start()
+
+    def handle_device_found(self, device):
+        index = self.port_combo.findData(device.port)
+        if index >= 0:
+            self.port_combo.setItemText(index, self.discovered_label(device))
+            if self.port_combo.currentData() not in self.discovered:
+                self.port_combo.setCurrentIndex(index)  # Seleciona o primeiro encontrado
+        self.discovered[device.port] = device
+        self.status_bar.showMessage(f"Dispositivo encontrado: {self.discovered_label(device)}")
+
+    def handle_discovery_finished(self, devices):
+        if self.discovery_worker:
+            self.discovery_worker.wait()
+            self.discovery_worker = None
+        self.connect_btn.setEnabled(True)
+        self.refresh_btn.setEnabled(True)
+        self.discover_btn.setEnabled(True)
+        self.port_combo.setEnabled(True)
+        if devices:
+            self.status_bar.showMessage(f"{len(devices)} dispositivo(s) encontrado(s).")
+        else:
+            self.status_bar.showMessage("Nenhum dispositivo respondeu. Verifique cabos e alimentação.")
+
+    def open_site_overview(self):
+        if self.site_overview is None:
+            self.site_overview = SiteOverview(SITE_DEVICES, self)
+        self.site_overview.show()
+        self.site_overview.raise_()
+
     def connect_device(self):
         if self.port_combo.currentIndex() < 0:
             self.status_bar.showMessage("Selecione uma porta COM primeiro.")
             return
 
         port = self.port_combo.currentData()
-        self.status_bar.showMessage(f"Conectando a {port}...")
-
-        if self.modbus_client.connect(port):
-            if self.modbus_client.test_connection():
-                self.connect_btn.setEnabled(False)
-                self.disconnect_btn.setEnabled(True)
-                self.port_combo.setEnabled(False)
-                self.refresh_btn.setEnabled(False)
-                self.timer.start()
-                self.status_bar.showMessage(f"Conectado a {port}. Atualizando leituras...")
-            else:
-                self.status_bar.showMessage("Teste de comunicação falhou. Verifique configurações.")
-                self.modbus_client.disconnect()
+        device = self.discovered.get(port)
+        if device:
+            # Usa o escravo e a configuração serial encontrados pela descoberta
+            self.modbus_client.slave = device.slave
+            baudrate, parity = device.baudrate, device.parity
         else:
-            self.status_bar.showMessage("Falha na conexão. Verifique a porta e o cabo.")
+            self.modbus_client.slave = SLAVE_ADDRESS
+            baudrate, parity = BAUDRATE, PARITY
+
+        self.connect_btn.setEnabled(False)
+        self.disconnect_btn.setEnabled(True)  # Também cancela tentativas em andamento
+        self.port_combo.setEnabled(False)
+        self.refresh_btn.setEnabled(False)
+        self.discover_btn.setEnabled(False)
+        self.start_reading_worker(lambda: self.modbus_client.connect(port, baudrate, parity))
 
     def disconnect_device(self):
-        self.timer.stop()
+        self.stop_reading_worker()
         if self.modbus_client.connected:
             self.modbus_client.disconnect()
         self.connect_btn.setEnabled(True)
         self.disconnect_btn.setEnabled(False)
         self.port_combo.setEnabled(True)
         self.refresh_btn.setEnabled(True)
+        self.discover_btn.setEnabled(True)
         self.status_bar.showMessage("Desconectado.")
 
         # Reseta as leituras
-        for label in self.reading_labels.values():
-            label.setText("--")
-            label.setStyleSheet("color: black;")
+        self.current_readings.clear()
+        self.error_names.clear()
+        for name in self.reading_labels:
+            self.render_label(name, "--", 'normal')
 
 
 
     def closeEvent(self, event):
-        """Garante a parada do timer, worker e desconexão ao fechar a janela"""
-        self.timer.stop()
-        if self.worker:
-            self.worker.stop()
+        """Garante a parada do worker e desconexão ao fechar a janela"""
+        if self.discovery_worker:
+            self.discovery_worker.stop()
+        if self.site_overview:
+            self.site_overview.close()
+        self.stop_reading_worker()
         if self.modbus_client.connected:
             self.modbus_client.disconnect()
+        if self.historian:
+            self.historian.stop()
+        if self.rollups:
+            self.rollups.close()
         event.accept()
\ No newline at end of file